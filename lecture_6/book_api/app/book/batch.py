@@ -0,0 +1,146 @@
+import asyncio
+import json
+from typing import List, Optional
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from starlette.middleware.exceptions import ExceptionMiddleware
+from starlette.types import Message, Scope
+from .changes import change_feed
+from .schemas import BatchOperation
+from ...core.encoding import unpack
+from ...core.metrics import metrics
+from ...repository.database import shared_session, transaction
+
+RESULT_HEADERS = ("etag",)
+
+
+class _WriteFailed(Exception):
+    """Raised inside the write transaction to roll it back; `args[0]` is the failed operation."""
+
+
+async def dispatch(parent: Scope, operation: BatchOperation) -> dict:
+    """Run one operation through the application's router, in process.
+
+    The sub-request goes through the innermost layers of the application
+    stack (exception handlers, FastAPI's exit stack, router), so it gets the
+    routing, validation and error responses of a real request, but skips the
+    user middlewares (admission, compression, ...), which have already run
+    for the batch request itself.
+
+    Returns:
+        dict: Status, selected headers and decoded body of the response
+        (JSON or MessagePack, so an operation may ask for columns).
+    """
+    path, _, query = operation.path.partition("?")
+    body = b"" if operation.body is None else json.dumps(operation.body).encode()
+    headers = [(b"host", b"batch"), (b"content-type", b"application/json"),
+               (b"content-length", str(len(body)).encode())]
+    headers += [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in operation.headers.items()]
+
+    scope = {
+        "type": "http", "asgi": parent.get("asgi", {"version": "3.0"}), "http_version": "1.1",
+        "method": operation.method, "scheme": parent.get("scheme", "http"),
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": headers, "client": parent.get("client"), "server": parent.get("server"),
+        "app": parent["app"], "state": {},
+    }
+
+    request_sent = False
+
+    async def receive() -> Message:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()  # no disconnect: the batch request owns the lifetime
+
+    status, response_headers, chunks = 500, {}, []
+
+    async def send(message: Message) -> None:
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = {name.decode("latin-1"): value.decode("latin-1")
+                                for name, value in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    app = parent["app"]
+    inner = ExceptionMiddleware(AsyncExitStackMiddleware(app.router), handlers=app.exception_handlers, debug=app.debug)
+    await inner(scope, receive, send)
+
+    content = b"".join(chunks)
+    content_type = response_headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        decoded = json.loads(content) if content else None
+    elif content_type.endswith("msgpack"):
+        decoded = unpack(content) if content else None
+    else:
+        decoded = content.decode("utf-8", errors="replace") or None
+
+    return {"status": status, "body": decoded,
+            "headers": {name: response_headers[name] for name in RESULT_HEADERS if name in response_headers}}
+
+
+async def _run_reads(parent: Scope, operations: List[BatchOperation], indexes: range,
+                     results: List[Optional[dict]]) -> None:
+    """Run adjacent reads concurrently, each on its own pooled session.
+
+    An `AsyncSession` cannot run statements concurrently; point lookups of
+    several reads are still merged into one query by `book_loader`.
+    """
+    for index, result in zip(indexes, await asyncio.gather(*(dispatch(parent, operations[i]) for i in indexes))):
+        results[index] = result
+
+
+async def execute_batch(parent: Scope, operations: List[BatchOperation]) -> dict:
+    """Run the operations of a `POST /batch` request in request order.
+
+    Every operation sees the effect of the writes listed before it and none
+    of the writes after it:
+
+    - Reads (GET) before the first write run concurrently (see `_run_reads`).
+    - From the first to the last write, operations run one after another on
+      one session inside one transaction: `get_db` hands the same session
+      to each of them and a service `commit()` only flushes (see
+      `transaction`), so reads in between see the batch's uncommitted
+      writes. The first write answered with a 4xx/5xx (or a read failing
+      with a 5xx) rolls the whole transaction back, and every later
+      operation is skipped (424).
+    - Reads after the last write run concurrently once it has committed.
+
+    Returns:
+        dict: `results` in the order of `operations` and `committed`
+        (None without writes).
+    """
+    results: List[Optional[dict]] = [None] * len(operations)
+    writes = [index for index, operation in enumerate(operations) if operation.method != "GET"]
+    committed = None
+
+    await _run_reads(parent, operations, range(writes[0] if writes else len(operations)), results)
+
+    if writes:
+        try:
+            async with transaction() as session:
+                token = shared_session.set(session)
+                try:
+                    for index in range(writes[0], writes[-1] + 1):
+                        results[index] = await dispatch(parent, operations[index])
+                        limit = 500 if operations[index].method == "GET" else 400
+                        if results[index]["status"] >= limit:
+                            raise _WriteFailed(index)
+                finally:
+                    shared_session.reset(token)
+        except _WriteFailed as failed:
+            committed = False
+            metrics.inc("batch.rolled_back")
+            for skipped in range(failed.args[0] + 1, len(operations)):
+                results[skipped] = {"status": 424, "headers": {},
+                                    "body": {"detail": "Skipped: an earlier operation in the batch failed"}}
+        else:
+            committed = True
+            change_feed.notify()
+            await _run_reads(parent, operations, range(writes[-1] + 1, len(operations)), results)
+
+    metrics.inc("batch.requests")
+    metrics.inc("batch.operations", len(operations))
+    return {"results": results, "committed": committed}
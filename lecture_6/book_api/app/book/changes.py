@@ -0,0 +1,205 @@
+import asyncio
+import json
+import traceback
+from typing import AsyncIterator, List, Optional, Set
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from .models import BookChange
+from ...core.metrics import metrics
+from ...core.utils import logger
+from ...repository.database import async_session
+
+FETCH_BATCH_SIZE = 500
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def change_to_event(change: BookChange) -> dict:
+    """Serializable form of a change log row."""
+    return {"seq": change.id, "op": change.op, "book_id": change.book_id, "book": change.payload}
+
+
+def format_sse(event: dict) -> str:
+    """Format a change event as a Server-Sent Events message."""
+    return f"id: {event['seq']}\nevent: {event['op']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def fetch_changes(after: int, limit: int = FETCH_BATCH_SIZE) -> List[dict]:
+    """Read change log rows with a sequence number greater than `after`."""
+    async with async_session() as session:
+        statement = (
+            select(BookChange)
+            .where(BookChange.id > after)
+            .order_by(BookChange.id)
+            .limit(limit)
+        )
+        return [change_to_event(change) for change in (await session.execute(statement)).scalars()]
+
+
+async def last_sequence() -> int:
+    """Highest sequence number in the change log (0 when it is empty)."""
+    async with async_session() as session:
+        return (await session.execute(select(func.coalesce(func.max(BookChange.id), 0)))).scalar_one()
+
+
+class _Subscriber:
+    """Bounded mailbox of one stream client."""
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class ChangeFeed:
+    """Fan-out of the 'book__change' log to streaming clients.
+
+    One tailer task per worker reads new change rows and hands every batch
+    to all subscribers, so the number of queries does not depend on the
+    number of connected clients. The tailer is woken by `notify()` after a
+    local commit and polls every `poll_interval` seconds to pick up writes
+    of other worker processes. While nobody is subscribed it only tracks
+    the current end of the log.
+
+    A subscriber that falls `SUBSCRIBER_QUEUE_SIZE` batches behind is
+    disconnected instead of buffering without bound; the client reconnects
+    with `Last-Event-ID` and catches up from the log.
+    """
+
+    def __init__(self, poll_interval: float = 1.0, keepalive: float = 15.0) -> None:
+        self.poll_interval = poll_interval
+        self.keepalive = keepalive
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._cursor: Optional[int] = None
+        self._subscribers: Set[_Subscriber] = set()
+        metrics.gauge("changes.subscribers", lambda: len(self._subscribers))
+
+    def start(self) -> None:
+        """Start the tailer on the running loop (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._task = None
+            self._wake = asyncio.Event()
+            self._cursor = None
+            self._subscribers = set()
+
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the tailer and wait for it to finish."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def notify(self) -> None:
+        """Wake the tailer after a commit (no-op if it is not running on this loop)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if loop is self._loop:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        """Tail the change log and fan new rows out to the subscribers."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            try:
+                if not self._subscribers or self._cursor is None:
+                    sequence = await last_sequence()
+                    if not self._subscribers or self._cursor is None:
+                        self._cursor = sequence
+                    continue
+
+                while self._subscribers:
+                    events = await fetch_changes(self._cursor)
+                    if not events:
+                        break
+                    self._cursor = events[-1]["seq"]
+                    metrics.inc("changes.batches")
+                    metrics.inc("changes.events", len(events))
+                    self._publish(events)
+            except SQLAlchemyError:
+                logger.error("Change feed tailer error:\n%s", traceback.format_exc())
+
+    def _publish(self, events: List[dict]) -> None:
+        """Put a batch into every mailbox, dropping subscribers that lag behind."""
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(events)
+            except asyncio.QueueFull:
+                subscriber.overflowed = True
+                self._subscribers.discard(subscriber)
+                metrics.inc("changes.dropped_subscribers")
+
+    async def stream(self, last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+        """Server-Sent Events of book changes.
+
+        The subscriber is registered before the backlog is read and the tailer
+        is moved back to the end of that backlog if needed, so no change
+        committed in between can be missed; events already sent are skipped
+        by their sequence number.
+
+        Args:
+            last_event_id (Optional[int]): Resume after this sequence number;
+                None streams only changes made from now on.
+
+        Yields:
+            str: SSE messages and keep-alive comments.
+        """
+        self.start()
+        subscriber = _Subscriber()
+        self._subscribers.add(subscriber)
+        try:
+            if last_event_id is None:
+                cursor = await last_sequence()
+            else:
+                cursor = last_event_id
+                while True:
+                    events = await fetch_changes(cursor)
+                    for event in events:
+                        yield format_sse(event)
+                    if len(events) < FETCH_BATCH_SIZE:
+                        break
+                    cursor = events[-1]["seq"]
+                if events:
+                    cursor = events[-1]["seq"]
+
+            # the tailer must not skip anything this subscriber has not seen yet
+            self._cursor = cursor if self._cursor is None else min(self._cursor, cursor)
+            self._wake.set()
+            yield ": connected\n\n"
+
+            while True:
+                try:
+                    events = await asyncio.wait_for(subscriber.queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    if subscriber.overflowed:
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+
+                for event in events:
+                    if event["seq"] > cursor:
+                        cursor = event["seq"]
+                        yield format_sse(event)
+
+                if subscriber.overflowed and subscriber.queue.empty():
+                    return
+        finally:
+            self._subscribers.discard(subscriber)
+
+
+change_feed = ChangeFeed()
+"""Process-wide change feed; started in the application lifespan."""
@@ -0,0 +1,404 @@
+import asyncio
+import json
+import time
+import traceback
+from typing import Awaitable, Callable, Dict, List, Optional
+from fastapi import HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy import func, insert, or_, select, text, update
+from sqlalchemy.exc import SQLAlchemyError
+from .models import Book, Job
+from .schemas import BookItemCreate
+from .services import upsert_books, UPSERT_BATCH_SIZE
+from ...core import config
+from ...core.metrics import metrics
+from ...core.retry import retry_transient
+from ...core.utils import logger
+from ...repository.database import async_session, get_engine
+from ...repository.init_db import rebuild_facets
+
+EXPORT_CHUNK_SIZE = 1000
+PROGRESS_INTERVAL = 0.5
+HEARTBEAT_INTERVAL = config.JOB_STALE_AFTER / 4
+"""Seconds between two heartbeats of a running job (see `Job.heartbeat_at`)."""
+WORKER_BACKOFF = 1.0
+"""Pause of a worker after a database error outside the job handler."""
+
+
+class JobCancelled(Exception):
+    """Raised by `JobContext.progress` when the job was cancelled through the API.
+
+    A plain exception rather than `asyncio.CancelledError`, which stays
+    reserved for cancelling the task itself (worker shutdown).
+    """
+
+
+class JobContext:
+    """Handle passed to a job handler for progress reporting.
+
+    `progress()` persists at most every `PROGRESS_INTERVAL` seconds. Each
+    write is conditional on the job still being "running", so a job cancelled
+    through the API (by any worker process) stops at its next report with
+    `JobCancelled`.
+    """
+
+    def __init__(self, job_id: int) -> None:
+        self.job_id = job_id
+        self._written_at = 0.0
+
+    async def progress(self, done: int, total: Optional[int] = None) -> None:
+        """Report `done` of `total` units of work.
+
+        Raises:
+            JobCancelled: If the job is no longer "running".
+        """
+        now = time.monotonic()
+        if now - self._written_at < PROGRESS_INTERVAL and done != total:
+            return
+        self._written_at = now
+
+        values = {"done": done} if total is None else {"done": done, "total": total}
+        async with async_session() as session:
+            result = await session.execute(
+                update(Job).where(Job.id == self.job_id, Job.status == "running").values(**values)
+            )
+            await session.commit()
+
+        if result.rowcount == 0:
+            raise JobCancelled(self.job_id)
+
+
+JobHandler = Callable[[JobContext, dict], Awaitable[dict]]
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register a coroutine function as the handler of jobs of `kind`."""
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return register
+
+
+@job_handler("import")
+async def import_books(ctx: JobContext, params: dict) -> dict:
+    """Upsert `params["books"]` in batches, one transaction per batch."""
+    items = TypeAdapter(List[BookItemCreate]).validate_python(params.get("books", []))
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0, "duplicates": 0}
+    await ctx.progress(0, len(items))
+
+    for start in range(0, len(items), UPSERT_BATCH_SIZE):
+        chunk = items[start:start + UPSERT_BATCH_SIZE]
+        async with async_session() as session:
+            counts = await upsert_books(session, chunk)
+        for key in totals:
+            totals[key] += counts[key]
+        await ctx.progress(start + len(chunk), len(items))
+
+    return totals
+
+
+@job_handler("reindex")
+async def reindex_books(ctx: JobContext, params: dict) -> dict:
+    """Rebuild the facet aggregates, the book indexes and the planner statistics."""
+    await ctx.progress(0, 3)
+    async with get_engine().begin() as conn:
+        await conn.run_sync(rebuild_facets)
+    await ctx.progress(1, 3)
+
+    async with get_engine().begin() as conn:
+        await conn.execute(text(f"REINDEX {Book.__tablename__}"))
+    await ctx.progress(2, 3)
+
+    async with get_engine().begin() as conn:
+        await conn.execute(text("ANALYZE"))
+    await ctx.progress(3, 3)
+
+    return {"tables": [Book.__tablename__]}
+
+
+@job_handler("export")
+async def export_books(ctx: JobContext, params: dict) -> dict:
+    """Write all books as NDJSON to `config.EXPORT_DIR`, paging by id.
+
+    Every chunk is read on a short session of its own: a read transaction
+    held for the whole export would pin its WAL snapshot and keep SQLite
+    from checkpointing until the export ends. All file system calls run in
+    worker threads, so a slow disk does not stall the event loop.
+    """
+    await asyncio.to_thread(config.EXPORT_DIR.mkdir, parents=True, exist_ok=True)
+    path = config.EXPORT_DIR / f"books-{ctx.job_id}.ndjson"
+    partial = path.with_suffix(".part")
+    written, last_id = 0, 0
+
+    async with async_session() as session:
+        total = (await session.execute(select(func.count(Book.id)))).scalar_one()
+    await ctx.progress(0, total)
+
+    file = await asyncio.to_thread(open, partial, "w", encoding="utf-8")
+    try:
+        while True:
+            async with async_session() as session:
+                rows = (await session.execute(
+                    select(Book.id, Book.title, Book.author, Book.year, Book.version)
+                    .where(Book.id > last_id)
+                    .order_by(Book.id)
+                    .limit(EXPORT_CHUNK_SIZE)
+                )).all()
+            if not rows:
+                break
+
+            chunk = "".join(json.dumps(row._asdict()) + "\n" for row in rows)
+            await asyncio.to_thread(file.write, chunk)
+            written += len(rows)
+            last_id = rows[-1].id
+            await ctx.progress(written, max(total, written))
+    finally:
+        await asyncio.to_thread(file.close)
+
+    await asyncio.to_thread(partial.replace, path)
+    return {"path": str(path), "count": written}
+
+
+class JobRunner:
+    """In-process runner of background jobs with state persisted in 'book__job'.
+
+    `submit()` stores a "queued" row and hands its id to one of `workers`
+    worker tasks, so at most `workers` jobs run at once per process. A worker
+    claims a job with a conditional UPDATE (queued -> running), which keeps
+    a job from running twice when several processes recover the same queue.
+    Jobs run on their own sessions, independent of the request that submitted
+    them, so a client may disconnect and poll later.
+
+    On shutdown running jobs are put back to "queued"; on start every queued
+    job of the database is enqueued again. While a job runs its worker
+    refreshes `heartbeat_at` every `HEARTBEAT_INTERVAL` seconds, and every
+    `config.JOB_STALE_AFTER` seconds the runner re-queues "running" jobs
+    whose heartbeat is older than that: their process died without the
+    shutdown hook. Handlers must therefore be safe to re-run (upserts,
+    rebuilds and exports are).
+
+    Database errors of the runner's own bookkeeping (claim, heartbeat,
+    final state) are retried like service calls; if they persist, the
+    worker logs them, pauses `WORKER_BACKOFF` seconds, puts the job id back
+    into the queue and goes on with the next job.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[int, asyncio.Task] = {}
+        self._stopping = False
+        metrics.gauge("jobs.running", lambda: len(self._running))
+        metrics.gauge("jobs.queued", lambda: self._queue.qsize() if self._queue is not None else 0)
+
+    def start(self) -> None:
+        """Start the workers on the running loop and re-enqueue queued jobs (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop and self._tasks:
+            return
+
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._running = {}
+        self._stopping = False
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(loop.create_task(self._recover()))
+
+    async def stop(self) -> None:
+        """Cancel the workers; interrupted jobs go back to "queued"."""
+        self._stopping = True
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def submit(self, kind: str, params: dict) -> Job:
+        """Persist a new job and queue it for execution.
+
+        Args:
+            kind (str): Key of `JOB_HANDLERS`.
+            params (dict): Parameters passed to the handler.
+
+        Returns:
+            Job: The stored job in "queued" status.
+        """
+        self.start()
+        async with async_session() as session:
+            job = (await session.execute(
+                insert(Job).values(kind=kind, status="queued", params=params, done=0).returning(Job)
+            )).scalar_one()
+            await session.commit()
+
+        metrics.inc("jobs.submitted")
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def get(self, job_id: int) -> Optional[Job]:
+        """Return the stored state of a job, or None."""
+        async with async_session() as session:
+            return await session.get(Job, job_id)
+
+    async def recent(self, limit: int) -> List[Job]:
+        """Return the most recently submitted jobs."""
+        async with async_session() as session:
+            result = await session.execute(select(Job).order_by(Job.id.desc()).limit(limit))
+            return list(result.scalars().all())
+
+    async def cancel(self, job_id: int) -> Optional[Job]:
+        """Cancel a queued or running job.
+
+        Returns:
+            Job | None: The job in "cancelled" status, or None if it does not
+            exist or has already finished.
+        """
+        async with async_session() as session:
+            job = (await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status.in_(("queued", "running")))
+                .values(status="cancelled", finished_at=func.current_timestamp())
+                .returning(Job)
+                .execution_options(synchronize_session=False)
+            )).scalar_one_or_none()
+            await session.commit()
+
+        if job is None:
+            return None
+
+        metrics.inc("jobs.cancelled")
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        return job
+
+    async def _recover(self) -> None:
+        """Enqueue jobs left "queued" by a previous run, then keep re-queuing stale "running" jobs."""
+        async with async_session() as session:
+            result = await session.execute(select(Job.id).where(Job.status == "queued").order_by(Job.id))
+            for job_id in result.scalars():
+                self._queue.put_nowait(job_id)
+
+        while True:
+            try:
+                for job_id in await self._requeue_stale():
+                    logger.warning("Job %s was left running by a dead worker, queued again", job_id)
+                    metrics.inc("jobs.recovered")
+                    self._queue.put_nowait(job_id)
+            except (SQLAlchemyError, HTTPException):
+                logger.error("Recovery of stale jobs failed:\n%s", traceback.format_exc())
+            await asyncio.sleep(config.JOB_STALE_AFTER)
+
+    @retry_transient()
+    async def _requeue_stale(self) -> List[int]:
+        """Put "running" jobs without a heartbeat for `config.JOB_STALE_AFTER` seconds back to "queued"."""
+        cutoff = func.datetime("now", f"-{int(config.JOB_STALE_AFTER)} seconds")
+        async with async_session() as session:
+            result = await session.execute(
+                update(Job)
+                .where(Job.status == "running", or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < cutoff))
+                .values(status="queued", started_at=None, heartbeat_at=None)
+                .returning(Job.id)
+            )
+            job_ids = list(result.scalars())
+            await session.commit()
+            return job_ids
+
+    @retry_transient()
+    async def _claim(self, job_id: int) -> Optional[Job]:
+        """Move a job from "queued" to "running"; None if someone else got it."""
+        async with async_session() as session:
+            job = (await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued")
+                .values(status="running", started_at=func.current_timestamp(),
+                        heartbeat_at=func.current_timestamp())
+                .returning(Job)
+                .execution_options(synchronize_session=False)
+            )).scalar_one_or_none()
+            await session.commit()
+            return job
+
+    async def _heartbeat(self, job_id: int) -> None:
+        """Refresh `heartbeat_at` of a running job until cancelled."""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                async with async_session() as session:
+                    await session.execute(
+                        update(Job)
+                        .where(Job.id == job_id, Job.status == "running")
+                        .values(heartbeat_at=func.current_timestamp())
+                    )
+                    await session.commit()
+            except SQLAlchemyError:
+                logger.warning("Heartbeat of job %s failed:\n%s", job_id, traceback.format_exc())
+
+    @retry_transient()
+    async def _finish(self, job_id: int, **values) -> None:
+        """Store the final state of a job unless it has been cancelled meanwhile."""
+        async with async_session() as session:
+            await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "running")
+                .values(finished_at=func.current_timestamp(), **values)
+            )
+            await session.commit()
+
+    @retry_transient()
+    async def _requeue(self, job_id: int) -> None:
+        """Put an interrupted job back into the queue of the next start."""
+        async with async_session() as session:
+            await session.execute(
+                update(Job).where(Job.id == job_id, Job.status == "running")
+                .values(status="queued", started_at=None, heartbeat_at=None)
+            )
+            await session.commit()
+
+    async def _worker(self) -> None:
+        """Take job ids from the queue and run them one at a time."""
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except (SQLAlchemyError, HTTPException):
+                metrics.inc("jobs.worker_errors")
+                logger.error("Job worker failed on job %s, retrying in %ss:\n%s",
+                             job_id, WORKER_BACKOFF, traceback.format_exc())
+                await asyncio.sleep(WORKER_BACKOFF)
+                self._queue.put_nowait(job_id)
+
+    async def _run(self, job_id: int) -> None:
+        """Claim, run and finish one job; a job someone else claimed is skipped."""
+        job = await self._claim(job_id)
+        if job is None:
+            return
+
+        task = asyncio.create_task(JOB_HANDLERS[job.kind](JobContext(job.id), job.params))
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        self._running[job.id] = task
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if self._stopping:
+                task.cancel()
+                await asyncio.shield(self._requeue(job.id))
+                raise
+            logger.info("Job %s (%s) cancelled", job.id, job.kind)
+        except JobCancelled:
+            logger.info("Job %s (%s) cancelled", job.id, job.kind)
+        except Exception as error:  # noqa: BLE001 - handlers run arbitrary work; any failure fails the job
+            metrics.inc("jobs.failed")
+            logger.error("Job %s (%s) failed:\n%s", job.id, job.kind, traceback.format_exc())
+            await self._finish(job.id, status="failed", error=str(error))
+        else:
+            metrics.inc("jobs.succeeded")
+            await self._finish(job.id, status="succeeded", result=result)
+        finally:
+            heartbeat.cancel()
+            self._running.pop(job.id, None)
+
+
+job_runner = JobRunner(config.JOB_WORKERS)
+"""Process-wide job runner; started in the application lifespan."""
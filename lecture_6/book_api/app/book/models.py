@@ -1,5 +1,7 @@
+import json
+from datetime import datetime
 from typing import Optional
-from sqlalchemy import CheckConstraint, String, Integer
+from sqlalchemy import JSON, CheckConstraint, DateTime, Index, String, Integer, func
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
 
 
@@ -12,15 +14,35 @@ class Base(DeclarativeBase):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
 
+def natural_key(title: str, author: str) -> str:
+    """Normalised natural key of a book: case- and whitespace-insensitive (title, author).
+
+    Computed in Python (`strip()` and Unicode `casefold()`) rather than with
+    SQLite's lower()/trim(), which only fold ASCII letters and trim spaces,
+    and stored as a JSON pair so no title/author split can collide.
+    """
+    return json.dumps([title.strip().casefold(), author.strip().casefold()], ensure_ascii=False)
+
+
+def _natural_key_default(context) -> str:
+    row = context.get_current_parameters()
+    return natural_key(row["title"], row["author"])
+
+
 class Book(Base):
     """SQLAlchemy model for storing book information.
 
     Represents a book record in the 'book_book' table.
+    Books are unique by their normalised (title, author), see `NATURAL_KEY_INDEX`.
 
     Attributes:
         title (str): Title of the book. Required.
         author (str): Author of the book. Required.
         year (Optional[int]): Publication year. Optional.
+        version (int): Row version, incremented by every update; used for
+                       optimistic concurrency (`ETag` / `If-Match`).
+        natural_key (str): `natural_key(title, author)`; filled on insert,
+                           recomputed by the services when title or author change.
     """
 
     __tablename__ = "book__book"
@@ -28,7 +50,107 @@ class Book(Base):
     title: Mapped[str] = mapped_column(String, nullable=False)
     author: Mapped[str] = mapped_column(String, nullable=False, index=True)
     year: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    natural_key: Mapped[str] = mapped_column(String, nullable=False, default=_natural_key_default)
 
     __table_args__ = (
         CheckConstraint('year >= 0 OR year IS NULL', name='year_non_negative_or_null'),
     )
+
+
+NATURAL_KEY_INDEX = Index("ux_book__book_natural_key", Book.natural_key, unique=True)
+
+
+class AuthorFacet(Base):
+    """Incrementally maintained "books per author" aggregate.
+
+    Rows are kept in sync with 'book__book' by triggers created in
+    `repository.init_db.ensure_schema`, so every write to the books table
+    updates the counters in the same transaction.
+
+    Attributes:
+        author (str): Author name, unique.
+        count (int): Number of books by this author.
+    """
+
+    __tablename__ = "book__facet_author"
+
+    author: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class YearFacet(Base):
+    """Incrementally maintained "books per year" aggregate.
+
+    Books without a publication year are not counted.
+
+    Attributes:
+        year (int): Publication year, unique.
+        count (int): Number of books published in this year.
+    """
+
+    __tablename__ = "book__facet_year"
+
+    year: Mapped[int] = mapped_column(Integer, nullable=False, unique=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class BookChange(Base):
+    """Append-only change log (outbox) of book mutations.
+
+    A row is written in the same transaction as every create, update and
+    delete in `services.py`, so the log never misses or invents a change.
+    `id` is an AUTOINCREMENT sequence: it only grows and is never reused,
+    which makes it usable as an event id / sync watermark.
+
+    Attributes:
+        book_id (int): ID of the changed book.
+        op (str): "create", "update" or "delete".
+        payload (Optional[dict]): Book data after the change; None for deletes.
+        created_at (datetime): Time of the change.
+    """
+
+    __tablename__ = "book__change"
+
+    book_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    op: Mapped[str] = mapped_column(String, nullable=False)
+    payload: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        {"sqlite_autoincrement": True},
+    )
+
+
+class Job(Base):
+    """State of a background job (import, reindex, export), see `jobs.py`.
+
+    Attributes:
+        kind (str): Job type, a key of `jobs.JOB_HANDLERS`.
+        status (str): "queued", "running", "succeeded", "failed" or "cancelled".
+        params (dict): Parameters the job was submitted with.
+        done (int): Units of work completed so far.
+        total (Optional[int]): Total units of work, once known.
+        result (Optional[dict]): Result of a succeeded job.
+        error (Optional[str]): Error message of a failed job.
+        created_at (datetime): Submission time.
+        started_at (Optional[datetime]): Time a worker picked the job up.
+        finished_at (Optional[datetime]): Time the job reached a final status.
+        heartbeat_at (Optional[datetime]): Last sign of life of the worker running
+                                           the job; a "running" job whose heartbeat
+                                           is too old belonged to a dead process.
+    """
+
+    __tablename__ = "book__job"
+
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False, index=True, default="queued")
+    params: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    result: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.current_timestamp())
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
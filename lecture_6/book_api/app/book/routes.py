@@ -1,16 +1,34 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from .models import Book
-from .schemas import BookItemCreate, BookItemRead, BookItemUpdate, MessageResponse
+from .schemas import (BookItemCreate, BookItemRead, BookItemUpdate, MessageResponse, FacetsResponse,
+                      BookUpsertResult, BookIdsRequest, BooksBatchResponse, BookChangesResponse,
+                      JobSubmit, JobRead, BatchOperation, BatchResponse, BATCH_MAX_OPERATIONS)
 from .views import (list_items_view, add_item_view, remove_item_view, update_book_view,
-                    search_books_view, get_book_view)
+                    search_books_view, get_book_view, get_facets_view, upsert_books_view,
+                    get_books_batch_view, get_changes_view, stream_changes_view, submit_job_view,
+                    get_job_view, list_jobs_view, cancel_job_view, get_job_result_view, stream_search_view,
+                    run_batch_view, etag, BOOK_FORMATS, BATCH_FORMATS)
+from ...core import config
+from ...core.encoding import negotiate
+from ...core.query_guard import statement_timeout
 from ...repository.database import get_db
 
 router = APIRouter()
+batch_router = APIRouter()
+
+READ_TIMEOUT = statement_timeout(config.QUERY_TIMEOUT)
+SEARCH_TIMEOUT = statement_timeout(config.SEARCH_QUERY_TIMEOUT)
+
+ACCEPT_DESCRIPTION = ("application/json (default), application/msgpack "
+                      "or application/vnd.book-api.columns+msgpack (one array per field)")
+BINARY_CONTENT = {"application/msgpack": {}, "application/vnd.book-api.columns+msgpack": {}}
 
 @router.get(
     "/",
+    dependencies=[Depends(READ_TIMEOUT)],
     response_model=List[BookItemRead],
     summary="Retrieve paginated list of books",
     description="""
@@ -20,16 +38,23 @@ router = APIRouter()
         - **page**: int — Page number (starting from 1)
         - **limit**: int — Number of items per page
 
+        *Accept:* `application/json` (default), `application/msgpack` or
+        `application/vnd.book-api.columns+msgpack` (one array per field).
+
         *Returns:* List of books matching pagination.
     """,
     responses={
-        200: {"description": "A list of books"},
+        200: {"description": "A list of books", "content": BINARY_CONTENT},
+        400: {"description": "Page too deep for sharded storage"},
         500: {"description": "Database error occurred"},
+        504: {"description": "Query exceeded its time limit"},
     },
 )
 async def list_items(
+        response: Response,
         page: int = Query(1, ge=1, description="Page number (starting from 1)"),
         limit: int = Query(10, ge=1, le=100, description="Items per page"),
+        accept: Optional[str] = Header(None, description=ACCEPT_DESCRIPTION),
         db: AsyncSession = Depends(get_db),
 ) -> list[BookItemRead]:
     """Retrieve paginated list of books.
@@ -37,12 +62,16 @@ async def list_items(
     Args:
         page (int): Which page to return (1-based index).
         limit (int): Number of items per page.
+        response (Response): Response whose headers are sent with JSON bodies.
+        accept (str | None): Requested media type.
         db (AsyncSession): Database session.
 
     Returns:
-        list[BookItemRead]: A portion of books based on pagination.
+        list[BookItemRead]: A portion of books based on pagination,
+        or a MessagePack response.
     """
-    return await list_items_view(db, page, limit)
+    response.headers["Vary"] = "Accept"
+    return await list_items_view(db, page, limit, negotiate(accept, BOOK_FORMATS))
 
 
 @router.post(
@@ -60,7 +89,13 @@ async def list_items(
         - **year**: int — Publication year (optional, pass `null` to clear)
 
         Returns the created book record.
+        Returns **409** if a book with the same title and author exists.
     """,
+    responses={
+        201: {"description": "Book created"},
+        409: {"description": "Book with this title and author already exists"},
+        500: {"description": "Database error occurred"},
+    },
 )
 async def add_item(
     item: BookItemCreate,
@@ -78,6 +113,48 @@ async def add_item(
     return await add_item_view(db, item)
 
 
+@router.post(
+    "/upsert",
+    response_model=BookUpsertResult,
+    summary="Bulk insert or update books",
+    description="""
+        **Insert new books and update existing ones in one request.**
+
+        Books are matched on their natural key: title and author,
+        compared case-insensitively (Unicode case folding) and ignoring
+        surrounding whitespace. Repeated keys inside one request are
+        collapsed, the last one wins.
+
+        - new key — the book is inserted
+        - existing key with a different **year** — the year is updated
+        - existing key with the same data — nothing is written
+
+        Re-sending the same feed is idempotent.
+        Returns the number of inserted, updated and unchanged books and of
+        collapsed duplicates.
+    """,
+    responses={
+        200: {"description": "Upsert counts"},
+        500: {"description": "Database error occurred"},
+        501: {"description": "Not available with sharded storage"},
+    },
+)
+async def upsert_items(
+    items: List[BookItemCreate] = Body(..., max_length=10000),
+    db: AsyncSession = Depends(get_db),
+) -> BookUpsertResult:
+    """Insert or update a list of books keyed on (title, author).
+
+    Args:
+        items (List[BookItemCreate]): Books to insert or update.
+        db (AsyncSession): Active SQLAlchemy async session.
+
+    Returns:
+        BookUpsertResult: Counts of inserted, updated, unchanged and duplicate books.
+    """
+    return await upsert_books_view(db, items)
+
+
 @router.delete(
     "/{book_id}",
     summary="Delete a book by ID",
@@ -88,29 +165,39 @@ async def add_item(
 
         Returns a confirmation message if the deletion is successful.
         Raises a 404 error if the book does not exist.
+
+        Optional **If-Match** header (the book's `ETag`): the book is deleted
+        only if it has not been modified since; otherwise **412** is returned.
     """,
     response_model=MessageResponse,
     responses={
     200: {"description": "Book successfully removed"},
     404: {"description": "Book not found"},
+    412: {"description": "Book was modified (If-Match mismatch)"},
     500: {"description": "Database error occurred"},
     },
 )
-async def remove_item(book_id: int, db: AsyncSession = Depends(get_db)) -> MessageResponse:
+async def remove_item(
+    book_id: int,
+    db: AsyncSession = Depends(get_db),
+    if_match: Optional[str] = Header(None),
+) -> MessageResponse:
     """Delete a book by its ID and return a confirmation message.
 
     Args:
         book_id (int): ID of the book to delete.
         db (AsyncSession): Active SQLAlchemy async session.
+        if_match (str | None): ETag the book must still have.
 
     Raises:
-        HTTPException: If the book with the given ID does not exist (404).
+        HTTPException: If the book with the given ID does not exist (404)
+                       or its version differs from If-Match (412).
 
     Returns:
         MessageResponse: Pydantic model containing a confirmation message.
                          Example: "Book successfully removed".
     """
-    return await remove_item_view(db, book_id)
+    return await remove_item_view(db, book_id, if_match)
 
 
 @router.put(
@@ -127,18 +214,25 @@ async def remove_item(book_id: int, db: AsyncSession = Depends(get_db)) -> Messa
 
         To explicitly clear a field, pass `null` for that field.
 
-        Returns the updated book record.
+        Optional **If-Match** header (the book's `ETag`): the update is applied
+        only if the book has not been modified since; otherwise **412** is returned.
+
+        Returns the updated book record and its new `ETag`.
     """,
     responses={
         200: {"description": "Book successfully updated"},
         404: {"description": "Book not found"},
+        409: {"description": "Book with this title and author already exists"},
+        412: {"description": "Book was modified (If-Match mismatch)"},
         500: {"description": "Database error occurred"},
     },
 )
 async def update_book(
     book_id: int,
     item: BookItemUpdate,
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    if_match: Optional[str] = Header(None),
 ) -> BookItemRead:
     """Update an existing book by its ID and return the updated record.
 
@@ -148,19 +242,25 @@ async def update_book(
     Args:
         book_id (int): ID of the book to update.
         item (BookItemUpdate): Pydantic model containing fields to update.
+        response (Response): Outgoing response, receives the new `ETag`.
         db (AsyncSession): Active SQLAlchemy async session.
+        if_match (str | None): ETag the book must still have.
 
     Raises:
-        HTTPException: If the book with the given ID does not exist (404).
+        HTTPException: If the book with the given ID does not exist (404)
+                       or its version differs from If-Match (412).
 
     Returns:
         BookItemRead: Updated book record as a Pydantic model.
     """
-    return await update_book_view(db, book_id, item)
+    book = await update_book_view(db, book_id, item, if_match)
+    response.headers["ETag"] = etag(book)
+    return book
 
 
 @router.get(
     "/search",
+    dependencies=[Depends(SEARCH_TIMEOUT)],
     response_model=List[BookItemRead],
     summary="Search books with optional filters",
     description="""
@@ -173,18 +273,29 @@ async def update_book(
 
         Pagination is controlled using:
         - **page** — page number (starting from 1)
-        - **limit** — number of items per page
+        - **limit** — number of items per page (at most 100)
 
         If no filters are provided, an empty list is returned.
-    """
+        Use `/books/search/stream` for all matches at once.
+
+        The `Accept` header selects JSON (default), MessagePack rows or columns.
+    """,
+    responses={
+        200: {"description": "Matching books", "content": BINARY_CONTENT},
+        400: {"description": "Page too deep for sharded storage"},
+        422: {"description": "page or limit out of range"},
+        504: {"description": "Query exceeded its time limit"},
+    },
 )
 async def search_books(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    page: int = 1,
-    limit: int = 10,
+    page: int = Query(1, ge=1, description="Page number (starting from 1)"),
+    limit: int = Query(10, ge=1, le=100, description="Items per page"),
     title: Optional[str] = None,
     author: Optional[str] = None,
-    year: Optional[int] = None
+    year: Optional[int] = None,
+    accept: Optional[str] = Header(None, description=ACCEPT_DESCRIPTION),
 ):
     """Search for books using optional filters and pagination.
 
@@ -194,16 +305,399 @@ async def search_books(
 
     Args:
         page (int, optional): Page number (starting from 1). Defaults to 1.
-        limit (int, optional): Number of items per page. Defaults to 10.
+        limit (int, optional): Number of items per page (1-100). Defaults to 10.
+        title (str | None, optional): Filter books by title substring. Defaults to None.
+        author (str | None, optional): Filter books by author substring. Defaults to None.
+        year (int | None, optional): Filter books by exact publication year. Defaults to None.
+        db (AsyncSession): Active SQLAlchemy database session (injected by Depends on).
+        response (Response): Response whose headers are sent with JSON bodies.
+        accept (str | None): Requested media type.
+
+    Returns:
+        List[BookItemRead]: A list of books matching the search criteria or [] if empty,
+        or a MessagePack response.
+    """
+    response.headers["Vary"] = "Accept"
+    return await search_books_view(db, page, limit, title, author, year, negotiate(accept, BOOK_FORMATS))
+
+
+@router.get(
+    "/search/stream",
+    dependencies=[Depends(SEARCH_TIMEOUT)],
+    summary="Stream all search matches as NDJSON",
+    description="""
+        Stream **every** book matching the filters, one JSON object per line
+        (`application/x-ndjson`), in id order.
+
+        Accepts the filters of `/books/search`:
+        - **title** — partial match by book title
+        - **author** — partial match by author name
+        - **year** — exact match by publication year
+
+        Without filters all books are streamed. Books are read in chunks
+        continuing after the last id, so memory per request stays bounded
+        however many books match.
+
+        With `Accept: application/msgpack` the stream is a sequence of packed
+        books; with `application/vnd.book-api.columns+msgpack` a sequence of
+        packed column maps, one per chunk.
+    """,
+    responses={
+        200: {"description": "NDJSON stream of books",
+              "content": {"application/x-ndjson": {}, **BINARY_CONTENT}},
+        501: {"description": "Not available with sharded storage"},
+    },
+)
+async def stream_search(
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    year: Optional[int] = None,
+    accept: Optional[str] = Header(None, description=ACCEPT_DESCRIPTION),
+) -> StreamingResponse:
+    """Stream all books matching the search filters.
+
+    Args:
+        title (str | None, optional): Filter books by title substring. Defaults to None.
+        author (str | None, optional): Filter books by author substring. Defaults to None.
+        year (int | None, optional): Filter books by exact publication year. Defaults to None.
+        accept (str | None): Requested media type.
+
+    Returns:
+        StreamingResponse: Matching books as NDJSON or MessagePack.
+    """
+    return await stream_search_view(title, author, year, negotiate(accept, BOOK_FORMATS))
+
+
+@router.get(
+    "/facets",
+    dependencies=[Depends(SEARCH_TIMEOUT)],
+    response_model=FacetsResponse,
+    summary="Facet counts: books per author and per year",
+    description="""
+        Return "books per author" and "books per year" facet counts.
+
+        Accepts the same optional filters as `/books/search`:
+        - **title** — partial match by book title
+        - **author** — partial match by author name
+        - **year** — exact match by publication year
+
+        Without filters the counts come from incrementally maintained
+        aggregate tables; with filters they are computed over matching books.
+
+        - **limit** — maximum number of values per facet
+    """,
+    responses={
+        200: {"description": "Facet counts"},
+        500: {"description": "Database error occurred"},
+        504: {"description": "Query exceeded its time limit"},
+    },
+)
+async def get_facets(
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100, description="Values per facet"),
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    year: Optional[int] = None
+) -> FacetsResponse:
+    """Return author and year facet counts, optionally scoped by filters.
+
+    Args:
+        limit (int): Maximum number of values returned per facet.
         title (str | None, optional): Filter books by title substring. Defaults to None.
         author (str | None, optional): Filter books by author substring. Defaults to None.
         year (int | None, optional): Filter books by exact publication year. Defaults to None.
         db (AsyncSession): Active SQLAlchemy database session (injected by Depends on).
 
     Returns:
-        List[BookItemRead]: A list of books matching the search criteria or [] if empty.
+        FacetsResponse: Facet counts ordered by count descending.
     """
-    return await search_books_view(db, page, limit, title, author, year)
+    return await get_facets_view(db, limit, title, author, year)
+
+
+@router.get(
+    "/batch",
+    dependencies=[Depends(READ_TIMEOUT)],
+    response_model=BooksBatchResponse,
+    summary="Get many books by ID",
+    description="""
+        Retrieve many books by their IDs with a single database query.
+
+        - **ids** — comma-separated book IDs, e.g. `ids=3,1,2`
+
+        Books are returned in the order of the requested IDs.
+        IDs without a book are listed in **missing** instead of failing with 404.
+        Use `POST /books/batch` for long lists.
+
+        The `Accept` header selects JSON (default), MessagePack rows or columns for **items**.
+    """,
+    responses={
+        200: {"description": "Found books and missing ids", "content": BINARY_CONTENT},
+        422: {"description": "Malformed ids"},
+        500: {"description": "Database error occurred"},
+        504: {"description": "Query exceeded its time limit"},
+    },
+)
+async def get_books_batch(
+    response: Response,
+    ids: str = Query(..., description="Comma-separated book IDs"),
+    accept: Optional[str] = Header(None, description=ACCEPT_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+) -> BooksBatchResponse:
+    """Retrieve many books by comma-separated IDs.
+
+    Args:
+        ids (str): Comma-separated book IDs.
+        response (Response): Response whose headers are sent with JSON bodies.
+        accept (str | None): Requested media type.
+        db (AsyncSession): Active SQLAlchemy database session.
+
+    Raises:
+        HTTPException: If `ids` is not a list of integers (422).
+
+    Returns:
+        BooksBatchResponse: Found books in request order and the missing IDs.
+    """
+    try:
+        book_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be comma-separated integers")
+
+    if not book_ids:
+        raise HTTPException(status_code=422, detail="ids must not be empty")
+
+    response.headers["Vary"] = "Accept"
+    return await get_books_batch_view(db, book_ids, negotiate(accept, BOOK_FORMATS))
+
+
+@router.post(
+    "/batch",
+    dependencies=[Depends(READ_TIMEOUT)],
+    response_model=BooksBatchResponse,
+    summary="Get many books by ID (long lists)",
+    description="""
+        Same as `GET /books/batch`, with the IDs sent in the request body:
+
+        `{"ids": [3, 1, 2]}`
+    """,
+    responses={
+        200: {"description": "Found books and missing ids", "content": BINARY_CONTENT},
+        500: {"description": "Database error occurred"},
+        504: {"description": "Query exceeded its time limit"},
+    },
+)
+async def post_books_batch(
+    request: BookIdsRequest,
+    response: Response,
+    accept: Optional[str] = Header(None, description=ACCEPT_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+) -> BooksBatchResponse:
+    """Retrieve many books by IDs sent in the request body.
+
+    Args:
+        request (BookIdsRequest): Body with the list of book IDs.
+        response (Response): Response whose headers are sent with JSON bodies.
+        accept (str | None): Requested media type.
+        db (AsyncSession): Active SQLAlchemy database session.
+
+    Returns:
+        BooksBatchResponse: Found books in request order and the missing IDs.
+    """
+    response.headers["Vary"] = "Accept"
+    return await get_books_batch_view(db, request.ids, negotiate(accept, BOOK_FORMATS))
+
+
+@router.get(
+    "/changes",
+    dependencies=[Depends(READ_TIMEOUT)],
+    response_model=BookChangesResponse,
+    summary="Delta sync: changes since a watermark",
+    description="""
+        **Incremental sync** for clients that keep a local copy of the books.
+
+        *Query parameters:*
+        - **since**: int — watermark from the previous response (`0` for a full sync)
+        - **limit**: int — maximum number of change log entries per page
+
+        *Returns:* books created or updated after the watermark (latest state),
+        ids of deleted books (**deleted**), the new **watermark** and **has_more**.
+        Repeat with the returned watermark while `has_more` is true.
+    """,
+    responses={
+        200: {"description": "Changes after the watermark"},
+        500: {"description": "Database error occurred"},
+        504: {"description": "Query exceeded its time limit"},
+        501: {"description": "Not available with sharded storage"},
+    },
+)
+async def get_changes(
+    since: int = Query(0, ge=0, description="Watermark of the last applied change"),
+    limit: int = Query(500, ge=1, le=1000, description="Change log entries per page"),
+    db: AsyncSession = Depends(get_db),
+) -> BookChangesResponse:
+    """Return book changes after a watermark.
+
+    Args:
+        since (int): Watermark returned by the previous call (0 for everything).
+        limit (int): Maximum number of change log entries to read.
+        db (AsyncSession): Active SQLAlchemy database session.
+
+    Returns:
+        BookChangesResponse: Changed books, tombstones and the next watermark.
+    """
+    return await get_changes_view(db, since, limit)
+
+
+@router.get(
+    "/changes/stream",
+    response_class=StreamingResponse,
+    summary="Stream book changes (Server-Sent Events)",
+    description="""
+        **Live feed of book changes** as `text/event-stream`.
+
+        Every create, update, upsert and delete is sent as one event:
+
+        - **id** — sequence number of the change
+        - **event** — `create`, `update` or `delete`
+        - **data** — JSON `{"seq", "op", "book_id", "book"}` (`book` is `null` for deletes)
+
+        Send the **Last-Event-ID** header (browsers' `EventSource` does this
+        on reconnect) to resume after the last received event; without it
+        only new changes are streamed.
+    """,
+    responses={
+        200: {"description": "Event stream"},
+        501: {"description": "Not available with sharded storage"},
+    },
+)
+async def stream_changes(
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID", description="Resume after this event id"),
+) -> StreamingResponse:
+    """Stream book changes as Server-Sent Events.
+
+    Args:
+        last_event_id (Optional[int]): Sequence number of the last received event.
+
+    Returns:
+        StreamingResponse: Long-lived `text/event-stream` response.
+    """
+    return await stream_changes_view(last_event_id)
+
+
+@router.post(
+    "/jobs",
+    response_model=JobRead,
+    status_code=202,
+    summary="Start a background job",
+    description="""
+        **Queue a long-running catalogue operation.**
+
+        - **kind**: `import` — upsert `params.books` (same items as `POST /books/upsert`),
+          `reindex` — rebuild facet aggregates, indexes and statistics,
+          `export` — write all books to an NDJSON file
+        - **params**: object — job parameters
+
+        The job runs in the background; poll `GET /books/jobs/{job_id}` for its status
+        and progress (`done` of `total`).
+    """,
+    responses={
+        202: {"description": "Job queued"},
+        422: {"description": "Invalid job parameters"},
+        501: {"description": "Not available with sharded storage"},
+    },
+)
+async def submit_job(request: JobSubmit) -> JobRead:
+    """Queue a background job.
+
+    Args:
+        request (JobSubmit): Job kind and parameters.
+
+    Returns:
+        JobRead: The queued job.
+    """
+    return await submit_job_view(request)
+
+
+@router.get(
+    "/jobs",
+    response_model=List[JobRead],
+    summary="List recent background jobs",
+)
+async def list_jobs(
+    limit: int = Query(20, ge=1, le=100, description="Number of jobs"),
+) -> List[JobRead]:
+    """Return the most recently submitted jobs.
+
+    Args:
+        limit (int): Maximum number of jobs.
+
+    Returns:
+        List[JobRead]: Jobs, newest first.
+    """
+    return await list_jobs_view(limit)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobRead,
+    summary="Get background job status",
+    responses={404: {"description": "Job not found"}},
+)
+async def get_job(job_id: int) -> JobRead:
+    """Return the status and progress of a job.
+
+    Args:
+        job_id (int): Job id.
+
+    Returns:
+        JobRead: Current state of the job.
+    """
+    return await get_job_view(job_id)
+
+
+@router.delete(
+    "/jobs/{job_id}",
+    response_model=JobRead,
+    summary="Cancel a background job",
+    description="""
+        Cancels a queued or running job. Work already committed by the job
+        (e.g. imported batches) is kept.
+    """,
+    responses={
+        404: {"description": "Job not found"},
+        409: {"description": "Job has already finished"},
+    },
+)
+async def cancel_job(job_id: int) -> JobRead:
+    """Cancel a job.
+
+    Args:
+        job_id (int): Job id.
+
+    Returns:
+        JobRead: The cancelled job.
+    """
+    return await cancel_job_view(job_id)
+
+
+@router.get(
+    "/jobs/{job_id}/result",
+    response_class=FileResponse,
+    summary="Download the file of an export job",
+    responses={
+        404: {"description": "Job not found"},
+        409: {"description": "Job has no downloadable result"},
+    },
+)
+async def get_job_result(job_id: int) -> FileResponse:
+    """Download the NDJSON file written by a succeeded export job.
+
+    Args:
+        job_id (int): Job id.
+
+    Returns:
+        FileResponse: The exported books.
+    """
+    return await get_job_result_view(job_id)
 
 
 @router.get(
@@ -218,13 +712,67 @@ async def search_books(
 
         - **book_id**: int — ID of the book 
         If the book is not found, a **404 Not Found** error is returned.
+
+        The `ETag` header carries the book version for `If-Match` on update/delete.
     """,
     responses={
         200: {"description": "Book found"},
         404: {"description": "Book not found"},
     },
 )
-async def get_book(book_id: int, db: AsyncSession = Depends(get_db)):
-    """Retrieve a single book by ID (using for tests)."""
+async def get_book(book_id: int, response: Response):
+    """Retrieve a single book by ID (using for tests); its version is sent as `ETag`."""
 
-    return await get_book_view(db, book_id)
+    book = await get_book_view(book_id)
+    response.headers["ETag"] = etag(book)
+    return book
+
+
+@batch_router.post(
+    "/batch",
+    response_model=BatchResponse,
+    summary="Run several book API calls in one request",
+    description="""
+        **Batch** up to 50 calls of the `/books` routes in one round trip.
+
+        The body is an array of operations:
+        `{"method": "GET", "path": "/books/search?title=Python"}`,
+        `{"method": "PUT", "path": "/books/3", "body": {"year": 2001}, "headers": {"If-Match": "2"}}`
+
+        Operations keep **request order**: each one sees the writes listed before it.
+
+        - Reads (GET) before the first write and after the last one run concurrently.
+        - From the first to the last write, operations run one by one in **one transaction**:
+          if a write fails, it is rolled back and every later operation is skipped (424).
+
+        *Returns:* one result (**status**, **headers**, **body**) per operation, in request
+        order, and **committed** (null without writes). Streaming routes cannot be batched,
+        and jobs can only be read: they run outside the batch transaction.
+
+        With `Accept: application/msgpack` the whole answer is MessagePack.
+    """,
+    responses={
+        200: {"description": "Results of all operations", "content": {"application/msgpack": {}}},
+        422: {"description": "Malformed operation"},
+        501: {"description": "Batched writes are not available with sharded storage"},
+    },
+)
+async def run_batch(
+    request: Request,
+    response: Response,
+    operations: List[BatchOperation] = Body(..., min_length=1, max_length=BATCH_MAX_OPERATIONS),
+    accept: Optional[str] = Header(None, description="application/json (default) or application/msgpack"),
+) -> BatchResponse:
+    """Execute several book API calls and return all results together.
+
+    Args:
+        request (Request): The batch request; sub-requests reuse its application.
+        operations (List[BatchOperation]): Calls to make.
+        response (Response): Response whose headers are sent with JSON bodies.
+        accept (str | None): Requested media type.
+
+    Returns:
+        BatchResponse: Result of every operation and whether the writes were committed.
+    """
+    response.headers["Vary"] = "Accept"
+    return await run_batch_view(request.scope, operations, negotiate(accept, BATCH_FORMATS))
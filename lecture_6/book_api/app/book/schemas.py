@@ -1,5 +1,6 @@
-from typing import Optional
-from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional, List, Union
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class BookItemCreate(BaseModel):
@@ -25,12 +26,14 @@ class BookItemRead(BaseModel):
         title (str): Title of the book.
         author (str): Author of the book.
         year (Optional[int]): Publication year of the book. Optional.
+        version (int): Row version; sent as `ETag` and expected in `If-Match`.
     """
 
     id: int
     title: str
     author: str
     year: Optional[int]
+    version: int = 1
 
     model_config = {
         "from_attributes": True
@@ -57,3 +60,189 @@ class MessageResponse(BaseModel):
     """
 
     message: str
+
+
+class FacetCount(BaseModel):
+    """A single facet value with the number of matching books.
+
+    Attributes:
+        value (str | int): Facet value (author name or publication year).
+        count (int): Number of books with this value.
+    """
+
+    value: Union[str, int]
+    count: int
+
+
+class FacetsResponse(BaseModel):
+    """Facet counts returned alongside book search results.
+
+    Attributes:
+        authors (List[FacetCount]): Books per author, most frequent first.
+        years (List[FacetCount]): Books per publication year, most frequent first.
+    """
+
+    authors: List[FacetCount]
+    years: List[FacetCount]
+
+
+class BookUpsertResult(BaseModel):
+    """Outcome of a bulk upsert.
+
+    Attributes:
+        inserted (int): Books that did not exist and were created.
+        updated (int): Existing books whose data changed.
+        unchanged (int): Books that already existed with identical data.
+        duplicates (int): Books dropped because a later book of the same
+                          request has the same natural key.
+    """
+
+    inserted: int
+    updated: int
+    unchanged: int
+    duplicates: int
+
+
+class BookIdsRequest(BaseModel):
+    """Request body for fetching many books by id.
+
+    Attributes:
+        ids (List[int]): Book ids; the response preserves their order.
+    """
+
+    ids: List[int] = Field(..., min_length=1, max_length=10000)
+
+
+class BooksBatchResponse(BaseModel):
+    """Books fetched by id together with the ids that do not exist.
+
+    Attributes:
+        items (List[BookItemRead]): Found books in the order of the requested ids.
+        missing (List[int]): Requested ids with no matching book.
+    """
+
+    items: List[BookItemRead]
+    missing: List[int]
+
+
+class BookChangesResponse(BaseModel):
+    """Changes after a watermark, collapsed to the latest state per book.
+
+    Attributes:
+        items (List[BookItemRead]): Books created or updated after the watermark.
+        deleted (List[int]): Ids of books deleted after the watermark (tombstones).
+        watermark (int): Pass as `since` in the next request.
+        has_more (bool): True if further changes are available right away.
+    """
+
+    items: List[BookItemRead]
+    deleted: List[int]
+    watermark: int
+    has_more: bool
+
+
+class JobSubmit(BaseModel):
+    """Request to start a background job.
+
+    Attributes:
+        kind (str): "import" (params: {"books": [...]}), "reindex" or "export".
+        params (Dict[str, Any]): Job parameters.
+    """
+
+    kind: Literal["import", "reindex", "export"]
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+class JobRead(BaseModel):
+    """State and progress of a background job.
+
+    Attributes:
+        id (int): Job id.
+        kind (str): Job type.
+        status (str): "queued", "running", "succeeded", "failed" or "cancelled".
+        done (int): Units of work completed.
+        total (Optional[int]): Total units of work, if known.
+        result (Optional[dict]): Result of a succeeded job.
+        error (Optional[str]): Error of a failed job.
+        created_at, started_at, finished_at (datetime): Lifecycle timestamps.
+    """
+
+    id: int
+    kind: str
+    status: str
+    done: int
+    total: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+BATCH_MAX_OPERATIONS = 50
+BATCH_UNSUPPORTED_SUFFIXES = ("/stream", "/result")
+BATCH_READ_ONLY_PREFIXES = ("/books/jobs",)
+"""Routes whose writes do not use the request's session, so a batch transaction cannot cover them."""
+
+
+class BatchOperation(BaseModel):
+    """One sub-request of `POST /batch`.
+
+    Attributes:
+        method (str): HTTP method; GET operations are reads, the others writes.
+        path (str): Path of a book route with an optional query string,
+                    e.g. "/books/search?title=Python".
+        body (Any): JSON body of a write.
+        headers (Dict[str, str]): Extra request headers, e.g. {"If-Match": "3"}.
+    """
+
+    method: Literal["GET", "POST", "PUT", "DELETE"] = "GET"
+    path: str = Field(..., pattern=r"^/books(/[^?#]*)?(\?[^#]*)?$")
+    body: Optional[Any] = None
+    headers: Dict[str, str] = Field(default_factory=dict)
+
+    @field_validator("path")
+    @classmethod
+    def no_streaming(cls, path: str) -> str:
+        """Streams and file downloads would be buffered whole, so they are not batchable."""
+        if path.partition("?")[0].rstrip("/").endswith(BATCH_UNSUPPORTED_SUFFIXES):
+            raise ValueError("streaming and download routes cannot be batched")
+        return path
+
+    @model_validator(mode="after")
+    def transactional_writes_only(self) -> "BatchOperation":
+        """Job submission and cancellation would not be rolled back with the batch, so they are refused."""
+        if self.method != "GET" and self.path.partition("?")[0].startswith(BATCH_READ_ONLY_PREFIXES):
+            raise ValueError("jobs run outside the batch transaction; submit or cancel them directly")
+        return self
+
+
+class BatchResult(BaseModel):
+    """Outcome of one batch operation, as the route would have answered it.
+
+    Attributes:
+        status (int): HTTP status code; 424 for operations skipped after a failed one.
+        headers (Dict[str, str]): Selected response headers (ETag).
+        body (Any): Decoded JSON response body.
+    """
+
+    status: int
+    headers: Dict[str, str] = Field(default_factory=dict)
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    """Results of `POST /batch` in the order of the operations.
+
+    Attributes:
+        results (List[BatchResult]): One result per operation.
+        committed (Optional[bool]): Whether the writes were committed;
+                                    None for a batch without writes.
+    """
+
+    results: List[BatchResult]
+    committed: Optional[bool] = None
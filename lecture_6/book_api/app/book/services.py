@@ -1,15 +1,61 @@
+import functools
 import traceback
-from sqlite3 import IntegrityError
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List
 from fastapi import HTTPException
-from sqlalchemy import select, and_
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import Integer, Select, bindparam, select, insert, update, delete, and_, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from .models import Book
+from .models import Book, BookChange, AuthorFacet, YearFacet, natural_key
+from .changes import change_feed
 from .schemas import BookItemCreate, BookItemUpdate
+from ...core.metrics import metrics
+from ...core.query_guard import is_interrupted
+from ...core.retry import is_transient, retry_transient
 from ...core.utils import logger
+from ...repository.database import async_session
 
+STREAM_CHUNK_SIZE = 500
+SQLITE_MAX_PARAMETERS = 999
+UPSERT_COLUMNS = ("title", "author", "year", "version", "natural_key")
+UPSERT_BATCH_SIZE = SQLITE_MAX_PARAMETERS // len(UPSERT_COLUMNS)
 
+# Hot read statements are built once (see also `_search_statement`): SQLAlchemy
+# memoizes the cache key of a statement object, so executing them again skips
+# re-building the expression and re-deriving the key, and hits the compiled cache.
+BOOKS_PAGE = (
+    select(Book)
+    .offset(bindparam("offset", type_=Integer))
+    .limit(bindparam("limit", type_=Integer))
+)
+BOOK_BY_ID = select(Book).where(Book.id == bindparam("book_id"))
+BOOKS_BY_IDS = select(Book).where(Book.id.in_(bindparam("book_ids", expanding=True)))
+
+NATURAL_KEY_VIOLATION = f"UNIQUE constraint failed: {Book.__tablename__}.{Book.natural_key.key}"
+"""SQLite's message for a second book with the same natural key."""
+
+
+def _is_duplicate_book(error: SQLAlchemyError) -> bool:
+    """True if `error` violates the natural key index, not another constraint (e.g. the year CHECK)."""
+    return isinstance(error, IntegrityError) and NATURAL_KEY_VIOLATION in str(error.orig)
+
+
+async def _reraise_transient(db: AsyncSession, error: SQLAlchemyError) -> None:
+    """Roll back and re-raise lock contention errors for `retry_transient` to retry.
+
+    A statement aborted by its route timeout (see `core.query_guard`) is
+    answered with 504 instead of 500.
+    """
+    if is_transient(error):
+        await db.rollback()
+        raise error
+    if is_interrupted(error):
+        await db.rollback()
+        metrics.inc("query.timeouts")
+        raise HTTPException(status_code=504, detail="Query exceeded its time limit")
+
+
+@retry_transient()
 async def get_books(db: AsyncSession, page: int, limit: int) -> list[Book]:
     """Fetch paginated books from the database.
 
@@ -29,22 +75,40 @@ async def get_books(db: AsyncSession, page: int, limit: int) -> list[Book]:
     offset = (page - 1) * limit
 
     try:
-        result = await db.execute(
-            select(Book).offset(offset).limit(limit)
-        )
+        result = await db.execute(BOOKS_PAGE, {"offset": offset, "limit": limit})
 
         return list(result.scalars().all())
 
     except SQLAlchemyError as e:
+        await _reraise_transient(db, e)
         logger.error("Database transaction rolled back in book get "
                      "due to an error:\n%s", traceback.format_exc())
 
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
+def _change_row(op: str, book) -> dict:
+    """Build a 'book__change' row for a book (ORM object or RETURNING row)."""
+    payload = None
+    if op != "delete":
+        payload = {"id": book.id, "title": book.title, "author": book.author,
+                   "year": book.year, "version": book.version}
+    return {"book_id": book.id, "op": op, "payload": payload}
+
+
+async def _record_changes(db: AsyncSession, rows: List[dict]) -> None:
+    """Append rows to the change log inside the caller's transaction."""
+    if rows:
+        await db.execute(insert(BookChange), rows)
+
+
+@retry_transient()
 async def create_book(db: AsyncSession, item: BookItemCreate) -> Book:
     """Create a new book record in the database.
 
+    Uses a single `INSERT ... RETURNING` statement, so the generated id is
+    read back without a separate refresh query.
+
     Args:
         db (AsyncSession): Active database session.
         item (BookItemCreate): Incoming book data.
@@ -55,22 +119,29 @@ async def create_book(db: AsyncSession, item: BookItemCreate) -> Book:
     Raises:
         HTTPException: If a database error occurs during the query.
                        The transaction is rolled back in this case.
+                       409 if a book with the same normalised title and author exists.
     """
-    book = Book(title=item.title, author=item.author, year=item.year)
-
-    db.add(book)
+    statement = (
+        insert(Book)
+        .values(title=item.title, author=item.author, year=item.year,
+                natural_key=natural_key(item.title, item.author))
+        .returning(Book)
+    )
 
     try:
+        book = (await db.execute(statement)).scalar_one()
+        await _record_changes(db, [_change_row("create", book)])
         await db.commit()
-        await db.refresh(book)
+        change_feed.notify()
 
-    except IntegrityError as e:
-        await db.rollback()
-        logger.error("Database error occurred in books create_book:\n%s", traceback.format_exc())
+    except SQLAlchemyError as e:
+        if _is_duplicate_book(e):
+            await db.rollback()
+            logger.error("Database error occurred in books create_book:\n%s", traceback.format_exc())
 
-        raise HTTPException(status_code=400, detail=f"Integrity error: {str(e)}")
+            raise HTTPException(status_code=409, detail="Book with this title and author already exists")
 
-    except SQLAlchemyError as e:
+        await _reraise_transient(db, e)
         logger.error("Database transaction rolled back in book create_book "
                      "due to an error:\n%s", traceback.format_exc())
 
@@ -81,12 +152,33 @@ async def create_book(db: AsyncSession, item: BookItemCreate) -> Book:
     return book
 
 
-async def remove_book(db: AsyncSession, book_id: int) -> dict:
+async def _missing_or_stale(db: AsyncSession, book_id: int, expected_version: Optional[int]) -> HTTPException:
+    """Explain why a conditional write matched no row: 404 or 412.
+
+    Only runs on the failure path, so successful writes stay one statement.
+    """
+    await db.rollback()
+
+    if expected_version is not None:
+        exists = (await db.execute(select(Book.id).where(Book.id == book_id))).scalar_one_or_none()
+        if exists is not None:
+            return HTTPException(status_code=412, detail="Book was modified by another request")
+
+    return HTTPException(status_code=404, detail="Book not found")
+
+
+@retry_transient()
+async def remove_book(db: AsyncSession, book_id: int, expected_version: Optional[int] = None) -> dict:
     """Remove a book by its ID from the database.
 
+    Uses a single `DELETE ... WHERE id = ? [AND version = ?] RETURNING id`
+    statement; no returned row means the book does not exist (or, with
+    `expected_version`, that it has been changed since it was read).
+
     Args:
         db (AsyncSession): Active SQLAlchemy asynchronous session.
         book_id (int): ID of the book to delete.
+        expected_version (int | None): Delete only if the row still has this version.
 
     Returns:
         dict: A confirmation message indicating successful deletion.
@@ -94,22 +186,27 @@ async def remove_book(db: AsyncSession, book_id: int) -> dict:
     Raises:
         HTTPException:
             - 404: If no book with the specified ID exists.
+            - 412: If the book's version differs from `expected_version`.
             - 500: If a database error occurs (transaction is rolled back on error).
     """
+    statement = delete(Book).where(Book.id == book_id).returning(Book.id)
+    if expected_version is not None:
+        statement = statement.where(Book.version == expected_version)
+
     try:
-        result = await db.execute(select(Book).where(Book.id == book_id))
-        item = result.scalars().first()
+        deleted_id = (await db.execute(statement)).scalar_one_or_none()
 
-        if not item:
-            logger.error("Database error occurred in books remove_book:\n%s", traceback.format_exc())
-            raise HTTPException(status_code=404, detail="Item not found")
+        if deleted_id is None:
+            raise await _missing_or_stale(db, book_id, expected_version)
 
-        await db.delete(item)
+        await _record_changes(db, [{"book_id": deleted_id, "op": "delete", "payload": None}])
         await db.commit()
+        change_feed.notify()
 
         return {"message": f"Item {book_id} removed from database"}
 
     except SQLAlchemyError as e:
+        await _reraise_transient(db, e)
         logger.error("Database transaction rolled back in book remove_book "
                      "due to an error:\n%s", traceback.format_exc())
 
@@ -117,15 +214,30 @@ async def remove_book(db: AsyncSession, book_id: int) -> dict:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
-async def update_book_in_db(db: AsyncSession, book_id: int, item: BookItemUpdate) -> Book:
+@retry_transient()
+async def update_book_in_db(
+    db: AsyncSession,
+    book_id: int,
+    item: BookItemUpdate,
+    expected_version: Optional[int] = None
+) -> Book:
     """Update an existing book in the database.
 
     Supports partial updates: only fields provided in `item` are modified.
+    The change is a single `UPDATE ... WHERE id = ? [AND version = ?]
+    RETURNING *` statement that also increments `version` (compare-and-swap
+    when `expected_version` is given); no returned row means the book does
+    not exist or has been changed by someone else. When both title and
+    author are given, the new natural key is set by the same statement; a
+    change of only one of them is followed by a second UPDATE in the same
+    transaction that computes it from the updated row. An empty update
+    writes nothing and returns the book as it is (404/412 still apply).
 
     Args:
         db (AsyncSession): Active SQLAlchemy asynchronous session.
         book_id (int): ID of the book to update.
         item (BookItemUpdate): Pydantic model containing fields to update.
+        expected_version (int | None): Update only if the row still has this version.
 
     Returns:
         Book: The updated SQLAlchemy model instance.
@@ -133,26 +245,56 @@ async def update_book_in_db(db: AsyncSession, book_id: int, item: BookItemUpdate
     Raises:
         HTTPException:
             - 404: If no book with the specified ID exists.
+            - 409: If the new title and author belong to another book.
+            - 412: If the book's version differs from `expected_version`.
             - 500: If a database error occurs (transaction is rolled back on error).
     """
+    values = item.model_dump(exclude_unset=True)
+    if values.get("title") is not None and values.get("author") is not None:
+        values["natural_key"] = natural_key(values["title"], values["author"])
+
+    statement = (
+        update(Book)
+        .where(Book.id == book_id)
+        .values(**values, version=Book.version + 1)
+        .returning(Book)
+        .execution_options(synchronize_session=False)
+    )
+    if expected_version is not None:
+        statement = statement.where(Book.version == expected_version)
+
     try:
-        result = await db.execute(select(Book).where(Book.id == book_id))
-        book = result.scalars().first()
+        if not values:
+            book = (await db.execute(BOOK_BY_ID, {"book_id": book_id})).scalar_one_or_none()
+            if book is None or expected_version not in (None, book.version):
+                raise await _missing_or_stale(db, book_id, expected_version)
+            return book
 
-        if not book:
-            logger.error("Database error occurred in books update_book_in_db:\n%s", traceback.format_exc())
-            raise HTTPException(status_code=404, detail="Book not found")
+        book = (await db.execute(statement)).scalar_one_or_none()
 
-        for field, value in item.model_dump(exclude_unset=True).items():
-            setattr(book, field, value)
+        if book is None:
+            raise await _missing_or_stale(db, book_id, expected_version)
 
-        db.add(book)
+        if ("title" in values or "author" in values) and "natural_key" not in values:
+            await db.execute(
+                update(Book).where(Book.id == book_id)
+                .values(natural_key=natural_key(book.title, book.author))
+                .execution_options(synchronize_session=False)
+            )
 
+        await _record_changes(db, [_change_row("update", book)])
         await db.commit()
-        await db.refresh(book)
+        change_feed.notify()
         return book
 
     except SQLAlchemyError as e:
+        if _is_duplicate_book(e):
+            await db.rollback()
+            logger.error("Database error occurred in books update_book_in_db:\n%s", traceback.format_exc())
+
+            raise HTTPException(status_code=409, detail="Book with this title and author already exists")
+
+        await _reraise_transient(db, e)
         logger.error("Database transaction rolled back in book update_book_in_db "
                      "due to an error:\n%s", traceback.format_exc())
 
@@ -161,6 +303,47 @@ async def update_book_in_db(db: AsyncSession, book_id: int, item: BookItemUpdate
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
+def _build_filters(
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    year: Optional[int] = None
+) -> list:
+    """Build the WHERE clauses shared by search and facet queries.
+
+    Returns:
+        list: SQLAlchemy boolean expressions, empty if no filter is given.
+    """
+    filters = []
+
+    if title:
+        filters.append(Book.title.ilike(f"%{title}%"))
+    if author:
+        filters.append(Book.author.ilike(f"%{author}%"))
+    if year is not None:
+        filters.append(Book.year == year)
+
+    return filters
+
+
+@functools.lru_cache(maxsize=None)
+def _search_statement(by_title: bool, by_author: bool, by_year: bool) -> Select:
+    """Pre-built search query for one combination of filters.
+
+    The filters match `_build_filters`, with the values as bound parameters
+    (`title` / `author` patterns, `year`, `offset`, `limit`), so there are at
+    most seven statement objects and each derives its cache key only once.
+    """
+    statement = select(Book)
+    if by_title:
+        statement = statement.where(Book.title.ilike(bindparam("title")))
+    if by_author:
+        statement = statement.where(Book.author.ilike(bindparam("author")))
+    if by_year:
+        statement = statement.where(Book.year == bindparam("year"))
+    return statement.offset(bindparam("offset", type_=Integer)).limit(bindparam("limit", type_=Integer))
+
+
+@retry_transient()
 async def search_books_in_db(
     db: AsyncSession,
     page: int,
@@ -181,24 +364,18 @@ async def search_books_in_db(
     """
     try:
         offset = (page - 1) * limit
-        filters = []
-
-        if title:
-            filters.append(Book.title.ilike(f"%{title}%"))
-        if author:
-            filters.append(Book.author.ilike(f"%{author}%"))
-        if year is not None:
-            filters.append(Book.year == year)
 
-        if not filters:
+        if not title and not author and year is None:
             return []
 
-        query = select(Book).where(and_(*filters)).offset(offset).limit(limit)
-        result = await db.execute(query)
+        statement = _search_statement(bool(title), bool(author), year is not None)
+        params = {"title": f"%{title}%", "author": f"%{author}%", "year": year, "offset": offset, "limit": limit}
+        result = await db.execute(statement, params)
         books: List[Book] = result.scalars().all()  # type: ignore[list-item]
         return books
 
     except SQLAlchemyError as e:
+        await _reraise_transient(db, e)
         logger.error(
             "Database transaction rolled back in search_books_in_db:\n%s",
             traceback.format_exc()
@@ -207,6 +384,54 @@ async def search_books_in_db(
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
+@functools.lru_cache(maxsize=None)
+def _search_chunk_statement(by_title: bool, by_author: bool, by_year: bool) -> Select:
+    """Keyset variant of `_search_statement` for streaming: plain columns,
+    `id > :after ORDER BY id LIMIT :limit`, so every chunk is an index range
+    scan and no ORM object is kept in the session's identity map."""
+    statement = select(Book.id, Book.title, Book.author, Book.year, Book.version)
+    if by_title:
+        statement = statement.where(Book.title.ilike(bindparam("title")))
+    if by_author:
+        statement = statement.where(Book.author.ilike(bindparam("author")))
+    if by_year:
+        statement = statement.where(Book.year == bindparam("year"))
+    return (statement.where(Book.id > bindparam("after", type_=Integer))
+            .order_by(Book.id).limit(bindparam("limit", type_=Integer)))
+
+
+async def iter_search_chunks(
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    year: Optional[int] = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> AsyncIterator[List[dict]]:
+    """Yield every book matching the filters, `chunk_size` books at a time.
+
+    Without filters all books are yielded. Each chunk is a separate short
+    query on a session of its own, continuing after the last id of the
+    previous chunk, so memory stays bounded by one chunk however many books
+    match, and writers are not blocked between chunks.
+
+    Yields:
+        List[dict]: Books (id, title, author, year, version) in id order.
+    """
+    statement = _search_chunk_statement(bool(title), bool(author), year is not None)
+    params = {"title": f"%{title}%", "author": f"%{author}%", "year": year, "limit": chunk_size}
+    after = 0
+
+    async with async_session() as session:
+        while True:
+            result = await session.execute(statement, {**params, "after": after})
+            rows = [row._asdict() for row in result]
+            await session.rollback()  # end the read transaction between chunks
+            if not rows:
+                return
+            yield rows
+            after = rows[-1]["id"]
+
+
+@retry_transient()
 async def get_book_in_db(db: AsyncSession, book_id: int) -> Book:
     """Service layer method for retrieving a book by its ID from the database.
 
@@ -225,10 +450,241 @@ async def get_book_in_db(db: AsyncSession, book_id: int) -> Book:
     Raises:
         HTTPException: If the book with the given ID does not exist.
     """
-    result = await db.execute(select(Book).where(Book.id == book_id))
+    result = await db.execute(BOOK_BY_ID, {"book_id": book_id})
     book = result.scalar_one_or_none()
 
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
     return book
+
+
+@retry_transient()
+async def get_facets_in_db(
+    db: AsyncSession,
+    limit: Optional[int],
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    year: Optional[int] = None
+) -> dict:
+    """Return "books per author" and "books per year" facet counts.
+
+    Without filters the counts are read from the aggregate tables that
+    triggers keep up to date on every write, so the cost does not depend
+    on the size of 'book__book'. With filters (same semantics as
+    `search_books_in_db`) an indexed GROUP BY over the matching rows is used.
+
+    Args:
+        db (AsyncSession): Active database session.
+        limit (int | None): Maximum number of values returned per facet (None for all).
+        title (str | None): Partial match by book title.
+        author (str | None): Partial match by author name.
+        year (int | None): Exact match by publication year.
+
+    Returns:
+        dict: {"authors": [(author, count), ...], "years": [(year, count), ...]},
+              each ordered by count descending.
+
+    Raises:
+        HTTPException: If a database error occurs.
+    """
+    try:
+        filters = _build_filters(title, author, year)
+
+        if not filters:
+            authors_query = (
+                select(AuthorFacet.author, AuthorFacet.count)
+                .order_by(AuthorFacet.count.desc(), AuthorFacet.author)
+                .limit(limit)
+            )
+            years_query = (
+                select(YearFacet.year, YearFacet.count)
+                .order_by(YearFacet.count.desc(), YearFacet.year)
+                .limit(limit)
+            )
+        else:
+            author_count = func.count().label("count")
+            authors_query = (
+                select(Book.author, author_count)
+                .where(and_(*filters))
+                .group_by(Book.author)
+                .order_by(author_count.desc(), Book.author)
+                .limit(limit)
+            )
+            year_count = func.count().label("count")
+            years_query = (
+                select(Book.year, year_count)
+                .where(and_(*filters), Book.year.is_not(None))
+                .group_by(Book.year)
+                .order_by(year_count.desc(), Book.year)
+                .limit(limit)
+            )
+
+        authors = (await db.execute(authors_query)).all()
+        years = (await db.execute(years_query)).all()
+
+        return {
+            "authors": [(row[0], row[1]) for row in authors],
+            "years": [(row[0], row[1]) for row in years],
+        }
+
+    except SQLAlchemyError as e:
+        await _reraise_transient(db, e)
+        logger.error(
+            "Database error occurred in get_facets_in_db:\n%s",
+            traceback.format_exc()
+        )
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@retry_transient()
+async def upsert_books(db: AsyncSession, items: List[BookItemCreate]) -> dict:
+    """Insert new books and update the year of existing ones, keyed on (title, author).
+
+    Items are written in batches of `UPSERT_BATCH_SIZE` with
+    `INSERT ... ON CONFLICT (natural key) DO UPDATE ... RETURNING`;
+    every returned row is also appended to the change log.
+    The update only fires when the year actually changes, so rows that are
+    re-sent unchanged are neither rewritten nor returned. Rows returned with
+    an id above the largest id seen before the upsert are new inserts.
+    Duplicate keys inside one request are collapsed (the last one wins) and
+    counted as `duplicates`.
+
+    Args:
+        db (AsyncSession): Active database session.
+        items (List[BookItemCreate]): Books to insert or update.
+
+    Returns:
+        dict: {"inserted": int, "updated": int, "unchanged": int, "duplicates": int}.
+
+    Raises:
+        HTTPException: If a database error occurs (the whole request is rolled back).
+    """
+    unique = {natural_key(item.title, item.author): item for item in items}
+    # Every column is bound per row, `version` too (a Python-side default
+    # would be bound anyway), so a batch stays within SQLITE_MAX_PARAMETERS.
+    rows = [dict(zip(UPSERT_COLUMNS, (item.title, item.author, item.year, 1, key)))
+            for key, item in unique.items()]
+
+    inserted = updated = 0
+
+    try:
+        max_id_before = (await db.execute(select(func.coalesce(func.max(Book.id), 0)))).scalar_one()
+
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            statement = sqlite_insert(Book).values(rows[start:start + UPSERT_BATCH_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=[Book.natural_key],
+                set_={"year": statement.excluded.year, "version": Book.version + 1},
+                where=Book.year.is_distinct_from(statement.excluded.year),
+            ).returning(Book.id, Book.title, Book.author, Book.year, Book.version)
+
+            changes = []
+            for row in (await db.execute(statement)).all():
+                if row.id > max_id_before:
+                    inserted += 1
+                    changes.append(_change_row("create", row))
+                else:
+                    updated += 1
+                    changes.append(_change_row("update", row))
+
+            await _record_changes(db, changes)
+
+        await db.commit()
+        change_feed.notify()
+
+    except SQLAlchemyError as e:
+        await _reraise_transient(db, e)
+        logger.error("Database transaction rolled back in upsert_books "
+                     "due to an error:\n%s", traceback.format_exc())
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    return {"inserted": inserted, "updated": updated, "unchanged": len(rows) - inserted - updated,
+            "duplicates": len(items) - len(rows)}
+
+
+@retry_transient()
+async def get_books_by_ids(db: AsyncSession, book_ids: List[int]) -> dict[int, Book]:
+    """Fetch many books by id with `WHERE id IN (...)` queries.
+
+    Ids are de-duplicated and split into chunks of `SQLITE_MAX_PARAMETERS`
+    (the smallest SQLite bound-parameter limit), so any number of ids takes
+    one query per chunk instead of one query per id.
+
+    Args:
+        db (AsyncSession): Active database session.
+        book_ids (List[int]): Requested ids, in any order.
+
+    Returns:
+        dict[int, Book]: Found books by id; missing ids are absent.
+
+    Raises:
+        HTTPException: If a database error occurs.
+    """
+    unique_ids = list(dict.fromkeys(book_ids))
+    found: dict[int, Book] = {}
+
+    try:
+        for start in range(0, len(unique_ids), SQLITE_MAX_PARAMETERS):
+            chunk = unique_ids[start:start + SQLITE_MAX_PARAMETERS]
+            result = await db.execute(BOOKS_BY_IDS, {"book_ids": chunk})
+            found.update((book.id, book) for book in result.scalars())
+
+        return found
+
+    except SQLAlchemyError as e:
+        await _reraise_transient(db, e)
+        logger.error("Database error occurred in get_books_by_ids:\n%s", traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@retry_transient()
+async def get_changes_since(db: AsyncSession, since: int, limit: int) -> dict:
+    """Read up to `limit` change log entries after the watermark `since`.
+
+    The change sequence is the INTEGER PRIMARY KEY of 'book__change', so the
+    range scan `id > since ORDER BY id` walks the table's own b-tree.
+    Several changes of one book inside the page collapse to the last one:
+    the payload of a create/update is the state after that change, and a
+    delete becomes a tombstone.
+
+    Args:
+        db (AsyncSession): Active database session.
+        since (int): Sequence number of the last change already applied (0 for all).
+        limit (int): Maximum number of change log entries to read.
+
+    Returns:
+        dict: {"items": [dict], "deleted": [int], "watermark": int, "has_more": bool}.
+
+    Raises:
+        HTTPException: If a database error occurs.
+    """
+    try:
+        statement = (
+            select(BookChange.id, BookChange.book_id, BookChange.op, BookChange.payload)
+            .where(BookChange.id > since)
+            .order_by(BookChange.id)
+            .limit(limit + 1)
+        )
+        rows = (await db.execute(statement)).all()
+
+    except SQLAlchemyError as e:
+        await _reraise_transient(db, e)
+        logger.error("Database error occurred in get_changes_since:\n%s", traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest: dict[int, tuple] = {}
+    for row in rows:
+        latest.pop(row.book_id, None)
+        latest[row.book_id] = row
+
+    return {
+        "items": [row.payload for row in latest.values() if row.op != "delete"],
+        "deleted": [row.book_id for row in latest.values() if row.op == "delete"],
+        "watermark": rows[-1].id if rows else since,
+        "has_more": has_more,
+    }
@@ -0,0 +1,245 @@
+import heapq
+import traceback
+import asyncio
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import Optional, List
+from fastapi import HTTPException
+from sqlalchemy import select, and_, insert, func, literal
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from .models import Book, natural_key
+from .schemas import BookItemCreate, BookItemUpdate
+from . import services
+from .services import _build_filters, _is_duplicate_book, get_facets_in_db, get_books_by_ids as get_shard_books_by_ids
+from ...core import config
+from ...core.utils import logger
+from ...repository.sharding import ShardRouter
+
+
+async def _merge_pages(router: ShardRouter, query, page: int, limit: int) -> List[Book]:
+    """Run `query` on all shards and merge the results ordered by id.
+
+    Every shard returns at most `page * limit` rows in id order (the most
+    a single shard can contribute to the requested page); the sorted
+    streams are merged and the global page is sliced out. As that grows
+    with the page number on every shard, pages ending past
+    `config.SHARD_MAX_OFFSET` rows are refused.
+
+    Raises:
+        HTTPException: 400 if the page lies past `config.SHARD_MAX_OFFSET`.
+    """
+    offset = (page - 1) * limit
+    if offset + limit > config.SHARD_MAX_OFFSET:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Sharded storage serves the first {config.SHARD_MAX_OFFSET} results only; narrow the filters",
+        )
+
+    async def fetch(session: AsyncSession) -> List[Book]:
+        result = await session.execute(query.order_by(Book.id).limit(offset + limit))
+        return list(result.scalars().all())
+
+    shards = await router.fan_out(fetch)
+    merged = heapq.merge(*shards, key=lambda book: book.id)
+    return list(islice(merged, offset, offset + limit))
+
+
+async def _key_taken(router: ShardRouter, key: str, exclude_id: Optional[int] = None) -> bool:
+    """True if a book with natural key `key` exists on any shard (other than `exclude_id`).
+
+    Needed besides the shard's unique index because a renamed book stays on
+    the shard that owns its id, not on the shard its new key hashes to.
+    """
+    query = select(Book.id).where(Book.natural_key == key).limit(1)
+    if exclude_id is not None:
+        query = query.where(Book.id != exclude_id)
+
+    async def find(session: AsyncSession) -> bool:
+        return (await session.execute(query)).first() is not None
+
+    return any(await router.fan_out(find))
+
+
+async def get_books(router: ShardRouter, page: int, limit: int) -> List[Book]:
+    """Fetch a page of books across all shards, ordered by id.
+
+    Raises:
+        HTTPException: If a database error occurs.
+    """
+    try:
+        return await _merge_pages(router, select(Book), page, limit)
+
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred in sharded get_books:\n%s", traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+async def search_books_in_db(
+    router: ShardRouter,
+    page: int,
+    limit: int,
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    year: Optional[int] = None
+) -> List[Book]:
+    """Search books on all shards concurrently; same filters as the single-file search.
+
+    Raises:
+        HTTPException: If a database error occurs.
+    """
+    filters = _build_filters(title, author, year)
+
+    if not filters:
+        return []
+
+    try:
+        return await _merge_pages(router, select(Book).where(and_(*filters)), page, limit)
+
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred in sharded search_books_in_db:\n%s", traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+async def create_book(router: ShardRouter, item: BookItemCreate) -> Book:
+    """Insert a book into the shard of its natural key, allocating an id from its residue class.
+
+    The id is computed and the row inserted by a single INSERT ... SELECT,
+    so it is atomic under the shard's write lock. Two inserts of the same
+    book land on the same shard, where the unique index rejects the second.
+
+    Raises:
+        HTTPException: 409 if a book with the same natural key exists on
+                       any shard, 500 if a database error occurs.
+    """
+    key = natural_key(item.title, item.author)
+    shard = router.shard_for_key(key)
+    first_id = shard + 1
+
+    next_id = select(
+        func.coalesce(func.max(Book.id), first_id - router.count) + router.count
+    ).scalar_subquery()
+
+    statement = (
+        insert(Book)
+        .from_select(
+            ["id", "title", "author", "year", "natural_key"],
+            select(next_id, literal(item.title), literal(item.author), literal(item.year, Book.year.type),
+                   literal(key)),
+        )
+        .returning(Book)
+    )
+
+    async with router.session(shard) as session:
+        try:
+            if await _key_taken(router, key):
+                raise HTTPException(status_code=409, detail="Book with this title and author already exists")
+
+            book = (await session.execute(statement)).scalar_one()
+            await session.commit()
+            return book
+
+        except SQLAlchemyError as e:
+            if _is_duplicate_book(e):
+                await session.rollback()
+                raise HTTPException(status_code=409, detail="Book with this title and author already exists")
+
+            logger.error("Database transaction rolled back in sharded create_book "
+                         "due to an error:\n%s", traceback.format_exc())
+            await session.rollback()
+            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+async def update_book_in_db(
+    router: ShardRouter,
+    book_id: int,
+    item: BookItemUpdate,
+    expected_version: Optional[int] = None
+) -> Book:
+    """Partially update a book on the shard that owns its id.
+
+    A new title or author is checked against the books of every shard
+    first: the book stays on its shard, where the unique index only
+    covers that shard's books.
+
+    Raises:
+        HTTPException: 404 if the book does not exist, 409 if the new title
+                       and author belong to another book, 412 on a version
+                       mismatch, 500 on database errors.
+    """
+    values = item.model_dump(exclude_unset=True)
+
+    async with router.session(router.shard_for(book_id)) as session:
+        if values.get("title") or values.get("author"):
+            try:
+                current = (await session.execute(
+                    select(Book.title, Book.author).where(Book.id == book_id)
+                )).first()
+                taken = False
+                if current is not None:
+                    key = natural_key(values.get("title") or current.title, values.get("author") or current.author)
+                    taken = await _key_taken(router, key, exclude_id=book_id)
+
+            except SQLAlchemyError as e:
+                logger.error("Database error occurred in sharded update_book_in_db:\n%s", traceback.format_exc())
+                raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+            if taken:
+                raise HTTPException(status_code=409, detail="Book with this title and author already exists")
+
+        return await services.update_book_in_db(session, book_id, item, expected_version)
+
+
+async def remove_book(router: ShardRouter, book_id: int, expected_version: Optional[int] = None) -> dict:
+    """Delete a book from the shard that owns its id.
+
+    Raises:
+        HTTPException: 404 if the book does not exist, 412 on a version
+                       mismatch, 500 on database errors.
+    """
+    async with router.session(router.shard_for(book_id)) as session:
+        return await services.remove_book(session, book_id, expected_version)
+
+
+async def get_facets(
+    router: ShardRouter,
+    limit: int,
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    year: Optional[int] = None
+) -> dict:
+    """Sum the facet counts of all shards and keep the `limit` most frequent values.
+
+    Each shard returns its complete counts (a shard-local top-N could drop
+    values that are frequent globally).
+    """
+    per_shard = await router.fan_out(
+        lambda session: get_facets_in_db(session, None, title, author, year)
+    )
+
+    merged = {}
+    for facet in ("authors", "years"):
+        totals = Counter()
+        for facets in per_shard:
+            for value, count in facets[facet]:
+                totals[value] += count
+        merged[facet] = sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    return merged
+
+
+async def get_books_by_ids(router: ShardRouter, book_ids: List[int]) -> dict[int, Book]:
+    """Group ids by owning shard and fetch every group concurrently."""
+    by_shard = defaultdict(list)
+    for book_id in book_ids:
+        by_shard[router.shard_for(book_id)].append(book_id)
+
+    async def fetch(shard: int, ids: List[int]) -> dict[int, Book]:
+        async with router.session(shard) as session:
+            return await get_shard_books_by_ids(session, ids)
+
+    found: dict[int, Book] = {}
+    for books in await asyncio.gather(*(fetch(shard, ids) for shard, ids in by_shard.items())):
+        found.update(books)
+
+    return found
@@ -1,69 +1,170 @@
 import os
+import shutil
 import sys
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+import anyio.from_thread
+import httpx
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, text
 import pytest
-from lecture_5.book_api.core.utils import logger
+import pytest_asyncio
+
+# One database file per test process, so `pytest -n <workers>` (pytest-xdist) can run in parallel.
+TEST_DB_DIR = Path(tempfile.mkdtemp(prefix=f"book_api_{os.getenv('PYTEST_XDIST_WORKER', 'main')}_"))
+TEST_DB_FILE = TEST_DB_DIR / "test_books.db"
+TEST_DATABASE_URL = f"sqlite:///{TEST_DB_FILE}"
+os.environ["BOOK_API_DATABASE_URL"] = f"sqlite+aiosqlite:///{TEST_DB_FILE}"
+os.environ.setdefault("BOOK_API_SQL_ECHO", "0")
+
+from lecture_6.book_api.core.utils import configure_logging, logger
+from lecture_6.book_api.core.test_log import test_logger
+
+configure_logging()
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, "../../../../.."))
 sys.path.insert(0, project_root)
 
 try:
-    from lecture_5.book_api.main import app
-    from lecture_5.book_api.app.book.models import Base, Book
+    from lecture_6.book_api.main import app
+    from lecture_6.book_api.app.book.models import Base
+    from lecture_6.book_api.repository.init_db import ensure_schema
+    from lecture_6.book_api.repository.database import get_engine, bind_sessions, async_session
     logger.info("Imported app and models")
 except ImportError as e:
     raise ImportError(f"Cannot import app/models: {e}")
 
-TEST_DATABASE_URL = "sqlite:///./test_books.db"
+RUN_SLOW = os.getenv("BOOK_API_RUN_SLOW", "0") == "1"
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: starts processes or measures time/memory; run with BOOK_API_RUN_SLOW=1")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip tests marked `slow` unless `BOOK_API_RUN_SLOW=1`."""
+    if RUN_SLOW:
+        return
+
+    skip = pytest.mark.skip(reason="slow test, set BOOK_API_RUN_SLOW=1 to run it")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
 
 @pytest.fixture(scope="session")
 def engine():
     """A fixture for the database engine."""
     engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False}, echo=False)
 
-    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        ensure_schema(conn)
     logger.info("Created database tables")
 
     yield engine
 
     Base.metadata.drop_all(bind=engine)
-    if os.path.exists("test_books.db"):
-        os.remove("test_books.db")
+    engine.dispose()
+    shutil.rmtree(TEST_DB_DIR, ignore_errors=True)
     logger.info("Dropped database tables and deleted test DB file")
 
 
-@pytest.fixture
-def db_session(engine):
-    """The fixture for the DB session."""
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    session = TestingSessionLocal()
+@asynccontextmanager
+async def rolled_back_connection():
+    """An open transaction on the test database, rolled back on exit.
+
+    Every session of the application (`get_db`, the batch loader, services
+    called directly) is bound to this connection and works in a SAVEPOINT,
+    so the test sees its own writes and leaves nothing behind.
+    """
+    connection = await get_engine().connect()
+    transaction = await connection.begin()
+    bind_sessions(connection)
 
     try:
-        yield session
+        yield connection
     finally:
-        session.rollback()
-        session.close()
+        bind_sessions(None)
+        await transaction.rollback()
+        await connection.close()
+
+
+@pytest_asyncio.fixture
+async def db_connection(engine):
+    """The test transaction of an async test, see `rolled_back_connection`."""
+    async with rolled_back_connection() as connection:
+        yield connection
+
+
+@pytest_asyncio.fixture
+async def async_db(db_connection):
+    """An async session inside the test transaction, for service-level tests."""
+    async with async_session() as session:
+        yield session
+
+
+@pytest_asyncio.fixture
+async def async_client(db_connection):
+    """An async API client whose requests run inside the test transaction.
+
+    Requests are served one at a time on the shared connection; tests that
+    need real concurrency use `client` and the committed database.
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        yield http
 
 
 @pytest.fixture
-def client():
-    """A fixture for the FastAPI test client."""
-    return TestClient(app)
+def client(engine):
+    """A FastAPI test client whose requests run inside the test transaction.
 
+    The client and the test connection share one event loop (a blocking
+    portal), and everything the requests write is rolled back afterwards.
+    """
+    with anyio.from_thread.start_blocking_portal() as portal:
+        with portal.wrap_async_context_manager(rolled_back_connection()):
+            test_client = TestClient(app)
+            test_client.portal = portal
+            yield test_client
 
-@pytest.fixture(autouse=True)
-def clean_database(db_session):
-    """Automatically clears the Book table after each test."""
-    yield
 
-    try:
-        db_session.query(Book).delete()
-        db_session.commit()
-        logger.info(" : Database cleaned after test")
+@pytest.fixture
+def committed_client(engine):
+    """A FastAPI test client on the committed database.
+
+    For tests that need real concurrency or the real transaction path
+    (several connections, event loops or processes); all tables are
+    emptied and the change log sequence restarts after the test.
+    """
+    yield TestClient(app)
+
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+        conn.execute(text("DELETE FROM sqlite_sequence"))
+    logger.info(" : Database cleaned after test")
+
+
+@pytest.fixture
+def created_book_id(client) -> int:
+    """Create a book through the API inside the test transaction and return its id."""
+
+    book_data = {
+        "title": "API Test Book",
+        "author": "API Test Author",
+        "year": 2024,
+        "description": "Created via fixture"
+    }
+
+    response = client.post("/books/", json=book_data)
+    assert response.status_code in [200, 201]
+
+    book_id = response.json()["id"]
+    test_logger.info(f"Fixture: Created book with ID: {book_id}")
+    test_logger.info(f"Fixture: Response JSON: {response.json()}")
+    test_logger.info(f"Fixture: Response status: {response.status_code}")
 
-    except Exception as er:
-        db_session.rollback()
-        logger.info(f"Could not clean database: {er}")
+    return book_id
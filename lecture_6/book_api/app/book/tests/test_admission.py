@@ -0,0 +1,88 @@
+import asyncio
+import httpx
+from fastapi import FastAPI
+from ....core.admission import AdmissionControlMiddleware
+from ....core.test_log import test_logger
+
+
+def _slow_app(**limits) -> FastAPI:
+    """A tiny app with one slow route behind the admission middleware."""
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow() -> dict:
+        await asyncio.sleep(0.2)
+        return {"status": "done"}
+
+    @app.get("/books/changes/stream")
+    async def stream() -> dict:
+        await asyncio.sleep(0.2)
+        return {"status": "streamed"}
+
+    app.add_middleware(AdmissionControlMiddleware, **limits)
+    return app
+
+
+async def _concurrent_get(app: FastAPI, count: int) -> list[httpx.Response]:
+    """Send `count` concurrent GET /slow requests to `app`."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.get("/slow") for _ in range(count)))
+
+
+def test_overload_is_shed_with_503():
+    """Requests beyond the concurrency limit and queue get fast 503 + Retry-After."""
+
+    test_name = "test_overload_is_shed_with_503"
+    test_logger.info(f"Starting test: {test_name}")
+
+    app = _slow_app(max_concurrency=1, queue_size=1, queue_timeout=0.05)
+    responses = asyncio.run(_concurrent_get(app, 4))
+    statuses = sorted(response.status_code for response in responses)
+
+    test_logger.info(f"{test_name}: statuses {statuses}")
+    assert statuses == [200, 503, 503, 503]
+    assert all("Retry-After" in response.headers for response in responses if response.status_code == 503)
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_rate_limit_per_client():
+    """A client exceeding its token bucket gets 429 with Retry-After."""
+
+    test_name = "test_rate_limit_per_client"
+    test_logger.info(f"Starting test: {test_name}")
+
+    app = _slow_app(rate_limit=1.0, rate_burst=2)
+
+    async def sequential() -> list[int]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [(await client.get("/slow")).status_code for _ in range(3)]
+
+    assert asyncio.run(sequential()) == [200, 200, 429]
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_streams_do_not_take_route_slots():
+    """Long-lived streams have their own limit and never block or queue behind a route slot."""
+
+    test_name = "test_streams_do_not_take_route_slots"
+    test_logger.info(f"Starting test: {test_name}")
+
+    app = _slow_app(max_concurrency=1, queue_size=0, queue_timeout=0.05, max_streams=3)
+
+    async def run() -> tuple[list[int], int]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            streams = [client.get("/books/changes/stream") for _ in range(5)]
+            responses = await asyncio.gather(client.get("/slow"), *streams)
+        return sorted(response.status_code for response in responses[1:]), responses[0].status_code
+
+    streams, slow = asyncio.run(run())
+    test_logger.info(f"{test_name}: streams {streams}, /slow {slow}")
+    assert streams == [200, 200, 200, 503, 503]
+    assert slow == 200
+
+    test_logger.info(f"Test passed: {test_name}")
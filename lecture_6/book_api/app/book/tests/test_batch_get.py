@@ -0,0 +1,46 @@
+from ....core.test_log import test_logger
+
+
+def test_get_books_batch_preserves_order(client):
+    """API test: GET /books/batch - request order kept, missing ids reported."""
+
+    test_name = "test_get_books_batch_preserves_order"
+    test_logger.info(f"Starting test: {test_name}")
+
+    ids = [
+        client.post("/books/", json={"title": f"Batch Book {i}", "author": "Batch Author"}).json()["id"]
+        for i in range(3)
+    ]
+    missing_id = max(ids) + 1000
+    requested = [ids[2], missing_id, ids[0], ids[1]]
+
+    response = client.get("/books/batch", params={"ids": ",".join(map(str, requested))})
+    test_logger.info(f"{test_name}: GET /books/batch -> {response.status_code}")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert [book["id"] for book in data["items"]] == [ids[2], ids[0], ids[1]]
+    assert data["missing"] == [missing_id]
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_post_books_batch_long_list(client):
+    """API test: POST /books/batch - more ids than one SQLite IN chunk."""
+
+    test_name = "test_post_books_batch_long_list"
+    test_logger.info(f"Starting test: {test_name}")
+
+    book_id = client.post("/books/", json={"title": "Long Batch", "author": "Batch Author"}).json()["id"]
+    requested = [book_id] + list(range(10**6, 10**6 + 1500))
+
+    response = client.post("/books/batch", json={"ids": requested})
+    assert response.status_code == 200
+
+    data = response.json()
+    assert [book["id"] for book in data["items"]] == [book_id]
+    assert len(data["missing"]) == 1500
+
+    assert client.get("/books/batch?ids=1,x").status_code == 422
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -0,0 +1,135 @@
+import pytest
+from ....core.test_log import test_logger
+
+
+def test_batch_keeps_request_order(committed_client):
+    """Writes commit together and each read sees exactly the writes listed before it.
+
+    The trailing reads run concurrently, each on its own connection, so the
+    test uses the committed database.
+    """
+
+    test_name = "test_batch_keeps_request_order"
+    test_logger.info(f"Starting test: {test_name}")
+
+    client = committed_client
+    created_book_id = client.post("/books/", json={"title": "Batch Target", "author": "Batch"}).json()["id"]
+    version = client.get(f"/books/{created_book_id}").headers["ETag"]
+    response = client.post("/batch", json=[
+        {"path": "/books/search?author=Batch%20Author"},
+        {"method": "POST", "path": "/books/", "body": {"title": "Batch Book", "author": "Batch Author"}},
+        {"path": "/books/search?author=Batch%20Author"},
+        {"method": "PUT", "path": f"/books/{created_book_id}", "body": {"year": 1999},
+         "headers": {"If-Match": version}},
+        {"path": f"/books/{created_book_id}"},
+        {"path": "/books/?page=1&limit=5"},
+        {"path": "/books/facets?limit=3"},
+        {"path": "/books/999999"},
+    ])
+    assert response.status_code == 200
+
+    batch = response.json()
+    statuses = [result["status"] for result in batch["results"]]
+    test_logger.info(f"{test_name}: statuses {statuses}, committed {batch['committed']}")
+
+    assert batch["committed"] is True
+    assert statuses == [200, 201, 200, 200, 200, 200, 200, 404]
+    before, created, after, updated, fetched = (result["body"] for result in batch["results"][:5])
+    assert before == []
+    assert [book["title"] for book in after] == ["Batch Book"]
+    assert created["title"] == "Batch Book"
+    assert updated["year"] == fetched["year"] == 1999
+    assert batch["results"][4]["headers"]["etag"] == f'"{fetched["version"]}"'
+    assert batch["results"][7]["body"] == {"detail": "Book not found"}
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+@pytest.mark.asyncio
+async def test_read_before_delete_sees_the_book(async_client):
+    """A read listed before a delete of the same book still finds it; one listed after does not."""
+
+    test_name = "test_read_before_delete_sees_the_book"
+    test_logger.info(f"Starting test: {test_name}")
+
+    book = (await async_client.post("/books/", json={"title": "Ordered", "author": "Batch"})).json()
+    response = await async_client.post("/batch", json=[
+        {"path": f"/books/{book['id']}"},
+        {"method": "DELETE", "path": f"/books/{book['id']}"},
+        {"path": f"/books/{book['id']}"},
+    ])
+    batch = response.json()
+    test_logger.info(f"{test_name}: {batch}")
+
+    assert batch["committed"] is True
+    assert [result["status"] for result in batch["results"]] == [200, 200, 404]
+    assert batch["results"][0]["body"]["title"] == "Ordered"
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+@pytest.mark.asyncio
+async def test_failed_write_rolls_back_the_batch(async_client):
+    """One failing write undoes the earlier writes and skips every later operation."""
+
+    test_name = "test_failed_write_rolls_back_the_batch"
+    test_logger.info(f"Starting test: {test_name}")
+
+    existing = (await async_client.post("/books/", json={"title": "Kept", "author": "Batch"})).json()
+    response = await async_client.post("/batch", json=[
+        {"method": "POST", "path": "/books/", "body": {"title": "Undone", "author": "Batch"}},
+        {"method": "POST", "path": "/books/", "body": {"title": "kept", "author": "BATCH"}},
+        {"method": "DELETE", "path": f"/books/{existing['id']}"},
+        {"path": "/books/search?author=Batch"},
+    ])
+    batch = response.json()
+    test_logger.info(f"{test_name}: {batch}")
+
+    assert batch["committed"] is False
+    assert [result["status"] for result in batch["results"]] == [201, 409, 424, 424]
+    assert (await async_client.get(f"/books/{existing['id']}")).status_code == 200
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_failed_batch_is_atomic_in_the_database(committed_client):
+    """Without the test transaction, a failed batch still leaves no trace of its earlier writes."""
+
+    test_name = "test_failed_batch_is_atomic_in_the_database"
+    test_logger.info(f"Starting test: {test_name}")
+
+    client = committed_client
+    original = client.post("/books/", json={"title": "Committed", "author": "Batch"}).json()
+    created_book_id = original["id"]
+    response = client.post("/batch", json=[
+        {"method": "PUT", "path": f"/books/{created_book_id}", "body": {"title": "Undone"}},
+        {"method": "POST", "path": "/books/", "body": {"title": "Atomic", "author": "Batch"}},
+        {"method": "POST", "path": "/books/", "body": {"title": "ATOMIC", "author": "batch"}},
+    ])
+    batch = response.json()
+    test_logger.info(f"{test_name}: {batch}")
+
+    assert batch["committed"] is False
+    assert [result["status"] for result in batch["results"]] == [200, 201, 409]
+    assert client.get(f"/books/{created_book_id}").json() == original
+    assert client.get("/books/search", params={"title": "Atomic"}).json() == []
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_batch_rejects_foreign_and_streaming_paths(client):
+    """Only non-streaming `/books` routes can be batched, at most 50 at a time, and jobs only read."""
+
+    test_name = "test_batch_rejects_foreign_and_streaming_paths"
+    test_logger.info(f"Starting test: {test_name}")
+
+    assert client.post("/batch", json=[{"path": "/admin/profiles"}]).status_code == 422
+    assert client.post("/batch", json=[{"path": "/batch"}]).status_code == 422
+    assert client.post("/batch", json=[{"path": "/books/search/stream?title=a"}]).status_code == 422
+    assert client.post("/batch", json=[{"path": "/books/"}] * 51).status_code == 422
+    job = {"method": "POST", "path": "/books/jobs", "body": {"kind": "reindex"}}
+    assert client.post("/batch", json=[job]).status_code == 422
+    assert client.post("/batch", json=[{"method": "DELETE", "path": "/books/jobs/1"}]).status_code == 422
+    assert client.post("/batch", json=[]).status_code == 422
+
+    test_logger.info(f"Test passed: {test_name}")
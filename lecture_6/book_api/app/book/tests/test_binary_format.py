@@ -0,0 +1,79 @@
+from ....core.encoding import COLUMNS, MSGPACK, negotiate, pack, unpack, unpack_all
+from ....core.test_log import test_logger
+
+
+def test_msgpack_codec_round_trip():
+    """The encoder covers every type the book API returns, at every size class."""
+
+    test_name = "test_msgpack_codec_round_trip"
+    test_logger.info(f"Starting test: {test_name}")
+
+    values = [None, True, False, 0, 127, 128, 65536, 2**40, -1, -33, -200, -2**40, 1.5, "",
+              "a" * 31, "ж" * 100, "b" * 70000, b"\x00\x01", list(range(20)), {str(i): i for i in range(20)},
+              {"id": 1, "title": "Title", "author": "Author", "year": None, "version": 1}]
+    for value in values:
+        assert unpack(pack(value)) == value
+    assert unpack_all(b"".join(pack(value) for value in values)) == values
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_accept_negotiation():
+    """JSON stays the default; q-values and MessagePack aliases are honoured."""
+
+    test_name = "test_accept_negotiation"
+    test_logger.info(f"Starting test: {test_name}")
+
+    offered = ("application/json", MSGPACK, COLUMNS)
+    assert negotiate(None, offered) == "application/json"
+    assert negotiate("*/*", offered) == "application/json"
+    assert negotiate("text/html", offered) == "application/json"
+    assert negotiate("application/x-msgpack", offered) == MSGPACK
+    assert negotiate(f"application/json;q=0.5, {COLUMNS}", offered) == COLUMNS
+    assert negotiate(f"{MSGPACK};q=0.2, application/json", offered) == "application/json"
+    assert negotiate(COLUMNS, ("application/json", MSGPACK)) == "application/json"
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_book_endpoints_answer_in_requested_format(client):
+    """List, search and get-many return the JSON data as MessagePack rows or columns on request."""
+
+    test_name = "test_book_endpoints_answer_in_requested_format"
+    test_logger.info(f"Starting test: {test_name}")
+
+    books = [{"title": f"Packed {i}", "author": "Packer", "year": 2000 + i} for i in range(5)]
+    assert client.post("/books/upsert", json=books).status_code == 200
+
+    search = client.get("/books/search", params={"author": "Packer"})
+    assert search.headers["content-type"] == "application/json"
+    assert "Accept" in search.headers["vary"]
+    rows = search.json()
+    ids = ",".join(str(book["id"]) for book in rows)
+
+    packed = client.get("/books/search", params={"author": "Packer"}, headers={"Accept": MSGPACK})
+    assert packed.headers["content-type"] == MSGPACK
+    assert "Accept" in packed.headers["vary"]
+    assert unpack(packed.content) == rows
+
+    columns = unpack(client.get("/books/search", params={"author": "Packer"}, headers={"Accept": COLUMNS}).content)
+    assert list(columns) == ["id", "title", "author", "year", "version"]
+    assert [dict(zip(columns, values)) for values in zip(*columns.values())] == rows
+
+    listed = client.get("/books/", params={"limit": 100}, headers={"Accept": MSGPACK})
+    assert unpack(listed.content) == client.get("/books/", params={"limit": 100}).json()
+
+    many = unpack(client.get("/books/batch", params={"ids": f"{ids},999999"}, headers={"Accept": COLUMNS}).content)
+    assert many["items"]["title"] == [book["title"] for book in rows]
+    assert many["missing"] == [999999]
+
+    streamed = client.get("/books/search/stream", params={"author": "Packer"}, headers={"Accept": MSGPACK})
+    assert unpack_all(streamed.content) == rows
+
+    batch = client.post("/batch", json=[{"path": "/books/search?author=Packer", "headers": {"Accept": COLUMNS}}],
+                        headers={"Accept": MSGPACK})
+    assert unpack(batch.content)["results"][0]["body"] == columns
+    test_logger.info(f"{test_name}: JSON {len(search.content)} B, MessagePack {len(packed.content)} B")
+    assert len(packed.content) < len(search.content)
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import httpx
+from ..changes import change_feed, last_sequence
+from ....core.test_log import test_logger
+
+
+async def _next_event(stream) -> dict:
+    """Skip SSE comments and return the data of the next event."""
+    while True:
+        message = await asyncio.wait_for(stream.__anext__(), 5)
+        if not message.startswith(":"):
+            data = message.split("data: ", 1)[1]
+            return json.loads(data)
+
+
+async def _live_and_resume(app) -> tuple[list[dict], list[dict]]:
+    """Write books while a subscriber is connected, then resume from an event id."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        live = change_feed.stream()
+        assert (await live.__anext__()).startswith(":")
+
+        book_id = (await http.post("/books/", json={"title": "Feed Book", "author": "Feed Author"})).json()["id"]
+        await http.put(f"/books/{book_id}", json={"year": 2001})
+        await http.delete(f"/books/{book_id}")
+
+        received = [await _next_event(live) for _ in range(3)]
+        await live.aclose()
+
+        resumed_stream = change_feed.stream(received[0]["seq"])
+        resumed = [await _next_event(resumed_stream) for _ in range(2)]
+        await resumed_stream.aclose()
+
+    await change_feed.stop()
+    return received, resumed
+
+
+def test_change_feed_streams_and_resumes(committed_client):
+    """Writes reach a live subscriber in order; Last-Event-ID replays the rest."""
+
+    test_name = "test_change_feed_streams_and_resumes"
+    test_logger.info(f"Starting test: {test_name}")
+
+    received, resumed = asyncio.run(_live_and_resume(committed_client.app))
+    test_logger.info(f"{test_name}: received {[(e['seq'], e['op']) for e in received]}")
+
+    assert [event["op"] for event in received] == ["create", "update", "delete"]
+    assert received[1]["book"]["year"] == 2001 and received[1]["book"]["version"] == 2
+    assert received[2]["book"] is None
+    assert received[0]["seq"] < received[1]["seq"] < received[2]["seq"]
+    assert resumed == received[1:]
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_upsert_writes_change_log(committed_client):
+    """Inserted and updated rows of an upsert are appended to the change log."""
+
+    test_name = "test_upsert_writes_change_log"
+    test_logger.info(f"Starting test: {test_name}")
+
+    before = asyncio.run(last_sequence())
+    committed_client.post("/books/upsert", json=[{"title": "Log A", "author": "X", "year": 1}])
+    committed_client.post("/books/upsert", json=[{"title": "Log A", "author": "X", "year": 2},
+                                       {"title": "Log B", "author": "X", "year": 3}])
+
+    assert asyncio.run(last_sequence()) - before == 3
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import httpx
+from fastapi import FastAPI
+from starlette.responses import StreamingResponse
+from ....core.compression import CompressionMiddleware
+from ....core.test_log import test_logger
+
+
+def test_list_response_is_gzipped(client):
+    """API test: large JSON responses are compressed, tiny ones are not."""
+
+    test_name = "test_list_response_is_gzipped"
+    test_logger.info(f"Starting test: {test_name}")
+
+    client.post("/books/upsert", json=[
+        {"title": f"Compressed Book {i}", "author": "Compression Author", "year": 2000} for i in range(50)
+    ])
+
+    response = client.get("/books/?limit=50", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 50
+
+    small = client.get("/healthcheck", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    identity = client.get("/books/?limit=50", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_streaming_response_compressed_per_chunk():
+    """Streaming bodies are compressed chunk by chunk into one valid gzip stream."""
+
+    test_name = "test_streaming_response_compressed_per_chunk"
+    test_logger.info(f"Starting test: {test_name}")
+
+    rows = [{"id": i, "title": "Streamed book", "author": "Stream Author"} for i in range(200)]
+
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def lines():
+            for row in rows:
+                yield json.dumps(row) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=10)
+
+    async def fetch() -> tuple[httpx.Headers, bytes]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            response = await http.get("/stream", headers={"Accept-Encoding": "gzip"})
+            return response.headers, response.content
+
+    headers, content = asyncio.run(fetch())
+
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    decoded = [json.loads(line) for line in content.decode().splitlines()]
+    assert decoded == rows
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -0,0 +1,53 @@
+import pytest
+from ....core.test_log import test_logger
+
+
+@pytest.mark.asyncio
+async def test_delta_sync_returns_changes_and_tombstones(async_client):
+    """API test: /books/changes collapses changes per book and reports deletions."""
+
+    test_name = "test_delta_sync_returns_changes_and_tombstones"
+    test_logger.info(f"Starting test: {test_name}")
+
+    watermark = await async_client.get("/books/changes", params={"since": 0, "limit": 1000})
+    while watermark.json()["has_more"]:
+        watermark = await async_client.get("/books/changes", params={"since": watermark.json()["watermark"]})
+    since = watermark.json()["watermark"]
+
+    kept = (await async_client.post("/books/", json={"title": "Sync Kept", "author": "Sync"})).json()["id"]
+    await async_client.put(f"/books/{kept}", json={"year": 1990})
+    gone = (await async_client.post("/books/", json={"title": "Sync Gone", "author": "Sync"})).json()["id"]
+    await async_client.delete(f"/books/{gone}")
+
+    delta = (await async_client.get("/books/changes", params={"since": since})).json()
+    test_logger.info(f"{test_name}: delta {delta}")
+
+    assert [item["id"] for item in delta["items"]] == [kept]
+    assert delta["items"][0]["year"] == 1990 and delta["items"][0]["version"] == 2
+    assert delta["deleted"] == [gone]
+    assert delta["watermark"] == since + 4 and delta["has_more"] is False
+
+    empty = (await async_client.get("/books/changes", params={"since": delta["watermark"]})).json()
+    assert empty == {"items": [], "deleted": [], "watermark": delta["watermark"], "has_more": False}
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+@pytest.mark.asyncio
+async def test_delta_sync_pages_with_limit(async_client):
+    """API test: a small limit pages through the log with has_more."""
+
+    test_name = "test_delta_sync_pages_with_limit"
+    test_logger.info(f"Starting test: {test_name}")
+
+    since = (await async_client.get("/books/changes", params={"since": 0, "limit": 1000})).json()["watermark"]
+    for i in range(3):
+        await async_client.post("/books/", json={"title": f"Paged {i}", "author": "Sync"})
+
+    first = (await async_client.get("/books/changes", params={"since": since, "limit": 2})).json()
+    second = (await async_client.get("/books/changes", params={"since": first["watermark"], "limit": 2})).json()
+
+    assert first["has_more"] is True and len(first["items"]) == 2
+    assert second["has_more"] is False and [item["title"] for item in second["items"]] == ["Paged 2"]
+
+    test_logger.info(f"Test passed: {test_name}")
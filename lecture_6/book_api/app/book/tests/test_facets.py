@@ -0,0 +1,61 @@
+from ....core.test_log import test_logger
+
+
+def _facet_counts(data: dict, facet: str) -> dict:
+    """Convert a facet list from the API response into a {value: count} mapping."""
+    return {entry["value"]: entry["count"] for entry in data[facet]}
+
+
+def test_facets_follow_writes(client):
+    """API test: GET /books/facets - aggregates follow create, update and delete."""
+
+    test_name = "test_facets_follow_writes"
+    test_logger.info(f"Starting test: {test_name}")
+
+    books = [
+        {"title": "Facet One", "author": "Facet Author", "year": 1901},
+        {"title": "Facet Two", "author": "Facet Author", "year": 1901},
+        {"title": "Facet Three", "author": "Other Facet Author", "year": None},
+    ]
+    ids = [client.post("/books/", json=book).json()["id"] for book in books]
+
+    response = client.get("/books/facets?limit=100")
+    test_logger.info(f"{test_name}: GET /books/facets -> {response.status_code}")
+    assert response.status_code == 200
+
+    authors = _facet_counts(response.json(), "authors")
+    years = _facet_counts(response.json(), "years")
+    assert authors["Facet Author"] == 2
+    assert authors["Other Facet Author"] == 1
+    assert years[1901] == 2
+
+    client.put(f"/books/{ids[0]}", json={"year": 1902})
+    client.delete(f"/books/{ids[2]}")
+
+    data = client.get("/books/facets?limit=100").json()
+    authors = _facet_counts(data, "authors")
+    years = _facet_counts(data, "years")
+    assert years[1901] == 1
+    assert years[1902] == 1
+    assert "Other Facet Author" not in authors
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_facets_with_filters(client):
+    """API test: GET /books/facets?title=... - facets scoped by search filters."""
+
+    test_name = "test_facets_with_filters"
+    test_logger.info(f"Starting test: {test_name}")
+
+    client.post("/books/", json={"title": "Scoped Python", "author": "Scoped A", "year": 2010})
+    client.post("/books/", json={"title": "Scoped Rust", "author": "Scoped B", "year": 2011})
+
+    response = client.get("/books/facets?title=Scoped Python")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert _facet_counts(data, "authors") == {"Scoped A": 1}
+    assert _facet_counts(data, "years") == {2010: 1}
+
+    test_logger.info(f"Test passed: {test_name}")
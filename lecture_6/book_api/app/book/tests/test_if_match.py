@@ -0,0 +1,108 @@
+import pytest
+from sqlalchemy import event
+from ....core.test_log import test_logger
+from ....repository.database import get_engine
+
+
+async def _create_book(async_client) -> int:
+    """Create a book inside the test transaction and return its id."""
+    response = await async_client.post("/books/", json={"title": "API Test Book", "author": "API Test Author"})
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_update_with_if_match(async_client):
+    """API test: PUT with a stale If-Match returns 412, a fresh one succeeds."""
+
+    test_name = "test_update_with_if_match"
+    test_logger.info(f"Starting test: {test_name}")
+
+    book_id = await _create_book(async_client)
+    etag = (await async_client.get(f"/books/{book_id}")).headers["etag"]
+
+    first = await async_client.put(f"/books/{book_id}", json={"year": 2030}, headers={"If-Match": etag})
+    test_logger.info(f"{test_name}: PUT with fresh ETag -> {first.status_code}")
+    assert first.status_code == 200
+    assert first.headers["etag"] != etag
+
+    stale = await async_client.put(f"/books/{book_id}", json={"year": 2031}, headers={"If-Match": etag})
+    test_logger.info(f"{test_name}: PUT with stale ETag -> {stale.status_code}")
+    assert stale.status_code == 412
+
+    assert (await async_client.get(f"/books/{book_id}")).json()["year"] == 2030
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+@pytest.mark.asyncio
+async def test_delete_with_if_match(async_client):
+    """API test: DELETE honours If-Match; unknown ids still return 404."""
+
+    test_name = "test_delete_with_if_match"
+    test_logger.info(f"Starting test: {test_name}")
+
+    book_id = await _create_book(async_client)
+    etag = (await async_client.get(f"/books/{book_id}")).headers["etag"]
+    await async_client.put(f"/books/{book_id}", json={"title": "Changed Meanwhile"})
+
+    assert (await async_client.delete(f"/books/{book_id}", headers={"If-Match": etag})).status_code == 412
+
+    fresh = (await async_client.get(f"/books/{book_id}")).headers["etag"]
+    assert (await async_client.delete(f"/books/{book_id}", headers={"If-Match": fresh})).status_code == 200
+    assert (await async_client.delete(f"/books/{book_id}", headers={"If-Match": fresh})).status_code == 404
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+@pytest.mark.asyncio
+async def test_empty_update_writes_nothing(async_client):
+    """API test: PUT without fields keeps the version and logs no change, but still checks If-Match."""
+
+    test_name = "test_empty_update_writes_nothing"
+    test_logger.info(f"Starting test: {test_name}")
+
+    book_id = await _create_book(async_client)
+    etag = (await async_client.get(f"/books/{book_id}")).headers["etag"]
+    watermark = (await async_client.get("/books/changes", params={"since": 0})).json()["watermark"]
+
+    response = await async_client.put(f"/books/{book_id}", json={}, headers={"If-Match": etag})
+    test_logger.info(f"{test_name}: empty PUT -> {response.status_code} {response.headers['etag']}")
+    assert response.status_code == 200
+    assert response.headers["etag"] == etag
+    assert (await async_client.get("/books/changes", params={"since": watermark})).json()["watermark"] == watermark
+
+    assert (await async_client.put(f"/books/{book_id}", json={}, headers={"If-Match": '"999"'})).status_code == 412
+    assert (await async_client.put("/books/999999", json={})).status_code == 404
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+@pytest.mark.asyncio
+async def test_rename_sets_natural_key_in_one_statement(async_client):
+    """API test: a PUT with title and author stores the new natural key with a single UPDATE."""
+
+    test_name = "test_rename_sets_natural_key_in_one_statement"
+    test_logger.info(f"Starting test: {test_name}")
+
+    book_id = await _create_book(async_client)
+    updates = []
+
+    def count_updates(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE book__book"):
+            updates.append(statement)
+
+    sync_engine = get_engine().sync_engine
+    event.listen(sync_engine, "before_cursor_execute", count_updates)
+    try:
+        response = await async_client.put(f"/books/{book_id}", json={"title": "Renamed", "author": "Someone"})
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count_updates)
+
+    test_logger.info(f"{test_name}: {len(updates)} UPDATE statement(s)")
+    assert response.status_code == 200
+    assert len(updates) == 1
+
+    duplicate = await async_client.post("/books/", json={"title": " renamed", "author": "SOMEONE"})
+    assert duplicate.status_code == 409
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+from pathlib import Path
+import pytest
+from sqlalchemy import create_engine, text
+from ..models import NATURAL_KEY_INDEX
+from ....core.test_log import test_logger
+from ....core.utils import logger
+from ....repository import init_db
+
+PROJECT_ROOT = Path(__file__).resolve().parents[5]
+PACKAGE = __package__.rsplit(".app.", 1)[0]
+
+
+@pytest.mark.slow
+def test_concurrent_init_seeds_once(tmp_path):
+    """Several workers initializing a fresh database seed it exactly once."""
+
+    test_name = "test_concurrent_init_seeds_once"
+    test_logger.info(f"Starting test: {test_name}")
+
+    db_file = tmp_path / "workers.db"
+    env = dict(
+        os.environ,
+        BOOK_API_DATABASE_URL=f"sqlite+aiosqlite:///{db_file}",
+        BOOK_API_SQL_ECHO="0",
+    )
+    code = (
+        "import asyncio\n"
+        f"from {PACKAGE}.repository.init_db import init_database\n"
+        "asyncio.run(init_database())\n"
+    )
+
+    workers = [
+        subprocess.Popen([sys.executable, "-c", code], cwd=PROJECT_ROOT, env=env,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        for _ in range(4)
+    ]
+    for worker in workers:
+        _, stderr = worker.communicate(timeout=60)
+        assert worker.returncode == 0, stderr.decode()
+
+    with sqlite3.connect(db_file) as conn:
+        count = conn.execute("SELECT COUNT(*) FROM book__book").fetchone()[0]
+
+    test_logger.info(f"{test_name}: {count} books after 4 concurrent inits")
+    assert count == 10
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+@pytest.mark.skipif(init_db.fcntl is None, reason="needs fcntl")
+def test_init_lock_waits_off_the_event_loop(tmp_path, monkeypatch):
+    """While another process holds the init lock, the event loop keeps running."""
+
+    test_name = "test_init_lock_waits_off_the_event_loop"
+    test_logger.info(f"Starting test: {test_name}")
+
+    fcntl = init_db.fcntl
+    lock_file = tmp_path / "books.db.init.lock"
+    monkeypatch.setattr(init_db, "LOCK_FILE", lock_file)
+
+    async def run() -> int:
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        async with init_db.init_lock():
+            ticker.cancel()
+        return ticks
+
+    with open(lock_file, "w") as holder:
+        fcntl.flock(holder, fcntl.LOCK_EX)
+        threading.Timer(0.2, fcntl.flock, (holder, fcntl.LOCK_UN)).start()
+        ticks = asyncio.run(run())
+    test_logger.info(f"{test_name}: {ticks} loop ticks while waiting for the lock")
+    assert ticks >= 5
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_natural_key_migration_logs_removed_duplicates(tmp_path, caplog):
+    """Duplicates removed while adding the natural key index are logged and tombstoned."""
+
+    test_name = "test_natural_key_migration_logs_removed_duplicates"
+    test_logger.info(f"Starting test: {test_name}")
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        init_db.ensure_schema(conn)
+        conn.execute(text(f"DROP INDEX {NATURAL_KEY_INDEX.name}"))
+        conn.execute(text(
+            "INSERT INTO book__book (title, author, year, natural_key) VALUES "
+            "('Dune', 'Herbert', 1965, ''), (' DUNE', 'herbert ', 1966, ''), ('Emma', 'Austen', 1815, '')"
+        ))
+
+    with caplog.at_level(logging.WARNING, logger=logger.name), engine.begin() as conn:
+        init_db.ensure_schema(conn)
+        books = conn.execute(text("SELECT id, title FROM book__book ORDER BY id")).all()
+        changes = conn.execute(text("SELECT book_id, op FROM book__change ORDER BY id")).all()
+    engine.dispose()
+
+    test_logger.info(f"{test_name}: books {books}, changes {changes}")
+    assert [tuple(book) for book in books] == [(1, "Dune"), (3, "Emma")]
+    assert [tuple(change) for change in changes] == [(1, "create"), (2, "create"), (3, "create"), (2, "delete")]
+    assert "2 (duplicate of 1)" in caplog.text
+
+    test_logger.info(f"Test passed: {test_name}")
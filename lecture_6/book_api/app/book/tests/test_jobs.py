@@ -0,0 +1,234 @@
+import asyncio
+import json
+import httpx
+import pytest
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import OperationalError
+from .. import jobs
+from ..jobs import JOB_HANDLERS, JobCancelled, JobContext, job_runner
+from ..models import Job
+from ....core.metrics import metrics
+from ....core.test_log import test_logger
+from ....repository.database import async_session
+
+
+async def _wait_for(http: httpx.AsyncClient, job_id: int, statuses=("succeeded", "failed", "cancelled")) -> dict:
+    """Poll a job until it reaches one of `statuses`."""
+    for _ in range(200):
+        job = (await http.get(f"/books/jobs/{job_id}")).json()
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"job {job_id} stuck in {job['status']}")
+
+
+async def _import_and_export(app) -> tuple[dict, dict, list[dict]]:
+    """Run an import job, then an export job, and read the exported file."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        books = [{"title": f"Job Book {i}", "author": "Jobs", "year": 2000 + i % 10} for i in range(1200)]
+        submitted = await http.post("/books/jobs", json={"kind": "import", "params": {"books": books}})
+        assert submitted.status_code == 202
+        imported = await _wait_for(http, submitted.json()["id"])
+
+        submitted = await http.post("/books/jobs", json={"kind": "export"})
+        exported = await _wait_for(http, submitted.json()["id"])
+        download = await http.get(f"/books/jobs/{exported['id']}/result")
+
+    await job_runner.stop()
+    return imported, exported, [json.loads(line) for line in download.text.splitlines()]
+
+
+def test_import_and_export_jobs(committed_client, tmp_path, monkeypatch):
+    """Import and export jobs run in the background and report progress."""
+
+    test_name = "test_import_and_export_jobs"
+    test_logger.info(f"Starting test: {test_name}")
+    monkeypatch.setattr("lecture_6.book_api.core.config.EXPORT_DIR", tmp_path)
+
+    imported, exported, rows = asyncio.run(_import_and_export(committed_client.app))
+    test_logger.info(f"{test_name}: import {imported['result']}, export {exported['result']}")
+
+    assert imported["status"] == "succeeded"
+    assert imported["result"] == {"inserted": 1200, "updated": 0, "unchanged": 0, "duplicates": 0}
+    assert imported["done"] == imported["total"] == 1200
+    assert exported["status"] == "succeeded" and exported["result"]["count"] == 1200
+    assert len(rows) == 1200 and rows[0]["title"] == "Job Book 0"
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+async def _slow_job(ctx, params) -> dict:
+    """Stand-in handler that reports progress until it is cancelled."""
+    for step in range(100):
+        await ctx.progress(step, 100)
+        await asyncio.sleep(0.05)
+    return {}
+
+
+async def _cancel_jobs(app) -> tuple[dict, dict, int, int]:
+    """Cancel a running and a queued job, then cancel a finished one again."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        ids = [(await http.post("/books/jobs", json={"kind": "reindex"})).json()["id"]
+               for _ in range(job_runner.workers + 1)]
+        await _wait_for(http, ids[0], statuses=("running",))
+
+        queued = (await http.delete(f"/books/jobs/{ids[-1]}")).json()
+        running = (await http.delete(f"/books/jobs/{ids[0]}")).json()
+        again = await http.delete(f"/books/jobs/{ids[0]}")
+        for job_id in ids[1:-1]:
+            await http.delete(f"/books/jobs/{job_id}")
+        missing = await http.get("/books/jobs/999999")
+
+    await job_runner.stop()
+    return queued, running, again.status_code, missing.status_code
+
+
+def test_cancel_job(committed_client, monkeypatch):
+    """Queued and running jobs can be cancelled; finished ones answer 409, unknown ones 404."""
+
+    test_name = "test_cancel_job"
+    test_logger.info(f"Starting test: {test_name}")
+    monkeypatch.setitem(JOB_HANDLERS, "reindex", _slow_job)
+
+    queued, running, again, missing = asyncio.run(_cancel_jobs(committed_client.app))
+
+    assert queued["status"] == "cancelled" and queued["started_at"] is None
+    assert running["status"] == "cancelled" and running["started_at"] is not None
+    assert (again, missing) == (409, 404)
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+async def _cancel_in_database(app) -> tuple[dict, bool]:
+    """Cancel a running job the way another worker process does: only in the job table."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        job_id = (await http.post("/books/jobs", json={"kind": "reindex"})).json()["id"]
+        await _wait_for(http, job_id, statuses=("running",))
+
+        async with async_session() as session:
+            await session.execute(update(Job).where(Job.id == job_id).values(status="cancelled"))
+            await session.commit()
+
+        for _ in range(100):
+            if job_id not in job_runner._running:
+                break
+            await asyncio.sleep(0.02)
+        stopped = job_id not in job_runner._running
+        job = (await http.get(f"/books/jobs/{job_id}")).json()
+
+    with pytest.raises(JobCancelled):
+        await JobContext(job_id).progress(100, 100)
+
+    await job_runner.stop()
+    return job, stopped
+
+
+def test_job_cancelled_elsewhere_stops_at_next_progress(committed_client, monkeypatch):
+    """A job cancelled by another process stops at its next progress report and is not failed."""
+
+    test_name = "test_job_cancelled_elsewhere_stops_at_next_progress"
+    test_logger.info(f"Starting test: {test_name}")
+    monkeypatch.setitem(JOB_HANDLERS, "reindex", _slow_job)
+    failed_before = metrics.get("jobs.failed")
+
+    job, stopped = asyncio.run(_cancel_in_database(committed_client.app))
+
+    assert stopped
+    assert job["status"] == "cancelled"
+    assert metrics.get("jobs.failed") == failed_before
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+async def _quick_job(ctx, params) -> dict:
+    """Stand-in handler that finishes at once."""
+    return {"ok": True}
+
+
+async def _recover_stale_jobs(app) -> tuple[dict, dict]:
+    """Start the runner with one "running" job of a dead process and one of a live one."""
+    async with async_session() as session:
+        stale, live = [
+            (await session.execute(
+                insert(Job).values(kind="reindex", status="running", params={}, done=0, heartbeat_at=heartbeat)
+                .returning(Job.id)
+            )).scalar_one()
+            for heartbeat in (None, func.current_timestamp())
+        ]
+        await session.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        job_runner.start()
+        recovered = await _wait_for(http, stale)
+        untouched = (await http.get(f"/books/jobs/{live}")).json()
+
+    await job_runner.stop()
+    return recovered, untouched
+
+
+def test_stale_running_jobs_are_recovered(committed_client, monkeypatch):
+    """A "running" job without a recent heartbeat is queued again; a live one is left alone."""
+
+    test_name = "test_stale_running_jobs_are_recovered"
+    test_logger.info(f"Starting test: {test_name}")
+    monkeypatch.setitem(JOB_HANDLERS, "reindex", _quick_job)
+
+    recovered, untouched = asyncio.run(_recover_stale_jobs(committed_client.app))
+
+    assert recovered["status"] == "succeeded"
+    assert untouched["status"] == "running"
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+async def _run_with_failing_claim(app) -> dict:
+    """Submit a job while the first claim fails with a database error."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        job_id = (await http.post("/books/jobs", json={"kind": "reindex"})).json()["id"]
+        job = await _wait_for(http, job_id)
+
+    await job_runner.stop()
+    return job
+
+
+def test_worker_survives_database_errors(committed_client, monkeypatch):
+    """A database error outside the handler is logged and the job is retried by the same worker."""
+
+    test_name = "test_worker_survives_database_errors"
+    test_logger.info(f"Starting test: {test_name}")
+    monkeypatch.setitem(JOB_HANDLERS, "reindex", _quick_job)
+    monkeypatch.setattr(jobs, "WORKER_BACKOFF", 0.01)
+    claim = job_runner._claim
+    failures = []
+
+    async def failing_claim(job_id):
+        if not failures:
+            failures.append(job_id)
+            raise OperationalError("UPDATE book__job", {}, Exception("disk I/O error"))
+        return await claim(job_id)
+
+    monkeypatch.setattr(job_runner, "_claim", failing_claim)
+
+    job = asyncio.run(_run_with_failing_claim(committed_client.app))
+
+    assert failures and job["status"] == "succeeded"
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_invalid_import_is_rejected(client):
+    """API test: import parameters are validated on submission."""
+
+    test_name = "test_invalid_import_is_rejected"
+    test_logger.info(f"Starting test: {test_name}")
+
+    response = client.post("/books/jobs", json={"kind": "import", "params": {"books": [{"title": ""}]}})
+    assert response.status_code == 422
+    assert client.post("/books/jobs", json={"kind": "unknown"}).status_code == 422
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -0,0 +1,112 @@
+import asyncio
+import httpx
+from ....core.loader import BatchLoader
+from ....core.metrics import metrics
+from ....core.query_guard import QueryScope, current_scope
+from ....core.test_log import test_logger
+
+
+def test_loader_batches_concurrent_lookups():
+    """Concurrent loads within the window are resolved by one batch call."""
+
+    test_name = "test_loader_batches_concurrent_lookups"
+    test_logger.info(f"Starting test: {test_name}")
+
+    batches = []
+
+    async def batch_fn(keys):
+        batches.append(sorted(keys))
+        return {key: f"book-{key}" for key in keys if key % 10 != 0}
+
+    async def run():
+        loader = BatchLoader("test_books", batch_fn, window=0.01, max_batch_size=100)
+        return await asyncio.gather(*(loader.load(key) for key in [1, 2, 3, 2, 10]))
+
+    results = asyncio.run(run())
+
+    assert results == ["book-1", "book-2", "book-3", "book-2", None]
+    assert batches == [[1, 2, 3, 10]]
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_loader_respects_max_batch_size():
+    """More distinct keys than `max_batch_size` are split into several batches."""
+
+    test_name = "test_loader_respects_max_batch_size"
+    test_logger.info(f"Starting test: {test_name}")
+
+    sizes = []
+
+    async def batch_fn(keys):
+        sizes.append(len(keys))
+        return {key: key for key in keys}
+
+    async def run():
+        loader = BatchLoader("test_sizes", batch_fn, window=0.01, max_batch_size=4)
+        return await asyncio.gather(*(loader.load(key) for key in range(10)))
+
+    assert asyncio.run(run()) == list(range(10))
+    assert sizes == [4, 4, 2]
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_loader_batch_is_detached_from_the_first_caller():
+    """The batch does not run in the scope of the request that started it, and outlives its cancellation."""
+
+    test_name = "test_loader_batch_is_detached_from_the_first_caller"
+    test_logger.info(f"Starting test: {test_name}")
+
+    scopes = []
+
+    async def batch_fn(keys):
+        scopes.append(current_scope.get())
+        await asyncio.sleep(0.02)
+        return {key: key for key in keys}
+
+    loader = BatchLoader("test_detached", batch_fn, window=0.01)
+
+    async def request(key):
+        current_scope.set(QueryScope())
+        return await loader.load(key)
+
+    async def run():
+        first = asyncio.create_task(request(1))
+        second = asyncio.create_task(request(2))
+        await asyncio.sleep(0.015)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == 2
+    assert scopes == [None]
+    assert not loader._tasks
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_concurrent_get_requests_share_queries(committed_client):
+    """API test: concurrent GET /books/{id} for different ids use few batch queries."""
+
+    test_name = "test_concurrent_get_requests_share_queries"
+    test_logger.info(f"Starting test: {test_name}")
+
+    ids = [
+        committed_client.post("/books/", json={"title": f"Loader Book {i}", "author": "Loader Author"}).json()["id"]
+        for i in range(20)
+    ]
+    batches_before = metrics.get("loader.books.batches")
+
+    async def fetch_all():
+        transport = httpx.ASGITransport(app=committed_client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(http.get(f"/books/{book_id}") for book_id in ids))
+
+    responses = asyncio.run(fetch_all())
+    batches = metrics.get("loader.books.batches") - batches_before
+    test_logger.info(f"{test_name}: 20 requests resolved by {batches} batch queries")
+
+    assert [response.json()["id"] for response in responses] == ids
+    assert batches < len(ids)
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -0,0 +1,58 @@
+import asyncio
+import time
+from ....core.loop_monitor import LoopMonitor
+from ....core.metrics import metrics
+from ....core.test_log import test_logger
+
+
+def block_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def test_loop_monitor_reports_lag_and_blocking_stack():
+    """A synchronous sleep on the loop shows up as lag and as a blocking event with its stack."""
+
+    test_name = "test_loop_monitor_reports_lag_and_blocking_stack"
+    test_logger.info(f"Starting test: {test_name}")
+
+    async def scenario() -> dict:
+        monitor = LoopMonitor(interval=0.01, window=100, block_threshold=0.05)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.1)
+            block_the_loop(0.3)
+            await asyncio.sleep(0.1)
+            return monitor.stats()
+        finally:
+            await monitor.stop()
+
+    blocked_before = metrics.get("loop.blocked")
+    stats = asyncio.run(scenario())
+    test_logger.info(f"{test_name}: lag {stats['lag_ms']}, events {len(stats['events'])}")
+
+    assert stats["samples"] > 5
+    assert stats["lag_ms"]["max"] >= 250
+    assert stats["lag_ms"]["p50"] < 50
+    assert metrics.get("loop.blocked") == blocked_before + 1
+
+    event = stats["events"][-1]
+    assert "block_the_loop" in event["stack"]
+    assert event["blocked_ms"] >= 50 and event["lag_ms"] >= 250
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_loop_endpoints_require_admin(client, monkeypatch):
+    """The loop statistics are served under /admin."""
+
+    test_name = "test_loop_endpoints_require_admin"
+    test_logger.info(f"Starting test: {test_name}")
+    monkeypatch.setattr("lecture_6.book_api.core.config.ADMIN_TOKEN", "secret")
+
+    assert client.get("/admin/loop").status_code == 403
+    response = client.get("/admin/loop", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert set(response.json()["lag_ms"]) == {"p50", "p90", "p99", "max"}
+    assert "loop.lag.p99_ms" in client.get("/metrics").json()
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -0,0 +1,38 @@
+import tracemalloc
+import pytest
+from ....core.test_log import test_logger
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+@pytest.mark.slow
+def test_memory_snapshots_and_diff(client, monkeypatch):
+    """Snapshots taken around API traffic attribute allocations to our modules."""
+
+    test_name = "test_memory_snapshots_and_diff"
+    test_logger.info(f"Starting test: {test_name}")
+    monkeypatch.setattr("lecture_6.book_api.core.config.ADMIN_TOKEN", "secret")
+
+    assert client.post("/admin/memory/start").status_code == 403
+    try:
+        assert client.post("/admin/memory/start", params={"frames": 10}, headers=ADMIN).json()["tracing"] is True
+        assert client.post("/admin/memory/snapshots/before", headers=ADMIN).status_code == 200
+
+        kept = [client.post("/books/", json={"title": f"Memory {i}", "author": "Memory"}).json() for i in range(20)]
+        assert client.post("/admin/memory/snapshots/after", headers=ADMIN).status_code == 200
+
+        top = client.get("/admin/memory/snapshots/after/top", headers=ADMIN).json()
+        diff = client.get("/admin/memory/diff", params={"base": "before", "target": "after", "group": "line"},
+                          headers=ADMIN).json()
+        status = client.get("/admin/memory", headers=ADMIN).json()
+    finally:
+        client.post("/admin/memory/stop", headers=ADMIN)
+
+    test_logger.info(f"{test_name}: top {top[:3]}, diff {diff[:3]}")
+    assert status["snapshots"] == ["before", "after"]
+    assert all(row["size_bytes"] > 0 for row in top)
+    assert any(row["location"].startswith("app.book.") for row in diff)
+    assert client.get("/admin/memory/diff", params={"base": "x", "target": "after"}, headers=ADMIN).status_code == 404
+    assert not tracemalloc.is_tracing() and len(kept) == 20
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -0,0 +1,51 @@
+import cProfile
+from ....core.profiling import ProfileStore, profile_store
+from ....core.test_log import test_logger
+
+
+def test_profile_on_request_and_fetch(client, tmp_path, monkeypatch):
+    """A request with the admin token in X-Profile is profiled and retrievable."""
+
+    test_name = "test_profile_on_request_and_fetch"
+    test_logger.info(f"Starting test: {test_name}")
+
+    monkeypatch.setattr("lecture_6.book_api.core.config.ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(profile_store, "directory", tmp_path)
+
+    assert "X-Profile-Id" not in client.get("/books/").headers
+    assert "X-Profile-Id" not in client.get("/books/", headers={"X-Profile": "wrong"}).headers
+
+    profiled = client.get("/books/", headers={"X-Profile": "secret"})
+    profile_id = profiled.headers["X-Profile-Id"]
+    test_logger.info(f"{test_name}: profile {profile_id}")
+
+    assert client.get("/admin/profiles").status_code == 403
+    listed = client.get("/admin/profiles", headers={"X-Admin-Token": "secret"}).json()
+    assert [item["id"] for item in listed] == [profile_id]
+    assert listed[0]["path"] == "/books/"
+
+    report = client.get(f"/admin/profiles/{profile_id}", headers={"X-Admin-Token": "secret"})
+    assert report.status_code == 200 and "function calls" in report.text
+    raw = client.get(f"/admin/profiles/{profile_id}", params={"format": "pstats"}, headers={"X-Admin-Token": "secret"})
+    assert raw.status_code == 200 and raw.content
+    assert client.get("/admin/profiles/1-1", headers={"X-Admin-Token": "secret"}).status_code == 404
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_profile_store_is_bounded(tmp_path):
+    """Only the newest `keep` profiles stay on disk."""
+
+    test_name = "test_profile_store_is_bounded"
+    test_logger.info(f"Starting test: {test_name}")
+
+    store = ProfileStore(tmp_path, keep=2)
+    ids = []
+    for _ in range(3):
+        ids.append(store.new_id())
+        store.save(ids[-1], cProfile.Profile(), {"path": "/"})
+
+    assert store.ids() == ids[1:]
+    assert len(list(tmp_path.iterdir())) == 4
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from sqlalchemy import text
+from .. import routes, services
+from ....core.metrics import metrics
+from ....core.query_guard import statement_timeout
+from ....core.test_log import test_logger
+from ....main import app
+from ....repository.database import dispose_engine, get_engine
+
+ENDLESS_QUERY = text("WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT x FROM n WHERE x < 0")
+
+
+def test_search_past_its_deadline_returns_504(client, monkeypatch):
+    """A search statement that outlives the route timeout is interrupted and answered with 504."""
+
+    test_name = "test_search_past_its_deadline_returns_504"
+    test_logger.info(f"Starting test: {test_name}")
+
+    monkeypatch.setattr(services, "_search_statement", lambda *filters: ENDLESS_QUERY)
+    monkeypatch.setitem(app.dependency_overrides, routes.SEARCH_TIMEOUT, statement_timeout(0.2))
+    timeouts_before = metrics.get("query.timeouts")
+
+    started = time.monotonic()
+    response = client.get("/books/search", params={"title": "a"})
+    elapsed = time.monotonic() - started
+
+    test_logger.info(f"{test_name}: {response.status_code} after {elapsed:.2f}s")
+    assert response.status_code == 504
+    assert elapsed < 3
+    assert metrics.get("query.timeouts") == timeouts_before + 1
+    assert client.get("/books/").status_code == 200
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+async def _search_and_disconnect(after: float) -> list[dict]:
+    """Call `/books/search` as a raw ASGI client that hangs up after `after` seconds."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/books/search", "raw_path": b"/books/search", "query_string": b"title=a",
+        "root_path": "", "headers": [(b"host", b"test")], "client": ("127.0.0.1", 50000), "server": ("test", 80),
+    }
+    received = []
+
+    async def receive() -> dict:
+        if not received:
+            received.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(after)
+        return {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    await app(scope, receive, send)
+    checked_out = get_engine().pool.checkedout()
+    await dispose_engine()
+    return [*sent, {"checked_out": checked_out}]
+
+
+def test_client_disconnect_cancels_running_query(committed_client, monkeypatch):
+    """A client that hangs up interrupts its endless query and the session goes back to the pool."""
+
+    test_name = "test_client_disconnect_cancels_running_query"
+    test_logger.info(f"Starting test: {test_name}")
+
+    monkeypatch.setattr(services, "_search_statement", lambda *filters: ENDLESS_QUERY)
+    monkeypatch.setitem(app.dependency_overrides, routes.SEARCH_TIMEOUT, statement_timeout(0))
+    disconnects_before = metrics.get("query.disconnects")
+
+    started = time.monotonic()
+    *sent, pool = asyncio.run(_search_and_disconnect(0.3))
+    elapsed = time.monotonic() - started
+
+    test_logger.info(f"{test_name}: sent {sent}, {pool} after {elapsed:.2f}s")
+    assert sent == []
+    assert pool["checked_out"] == 0
+    assert elapsed < 3
+    assert metrics.get("query.disconnects") == disconnects_before + 1
+
+    test_logger.info(f"Test passed: {test_name}")
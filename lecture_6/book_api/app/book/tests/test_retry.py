@@ -0,0 +1,110 @@
+import asyncio
+import sqlite3
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import OperationalError
+from ....core.metrics import metrics
+from ....core.retry import RetryPolicy, database_retry, is_transient
+from ....core.test_log import test_logger
+from ....repository.database import dispose_engine
+
+
+def _locked() -> OperationalError:
+    """The error SQLAlchemy raises for SQLITE_BUSY."""
+    return OperationalError("INSERT ...", {}, sqlite3.OperationalError("database is locked"))
+
+
+def test_transient_errors_are_retried():
+    """Lock errors are retried until the call succeeds; other errors are not."""
+
+    test_name = "test_transient_errors_are_retried"
+    test_logger.info(f"Starting test: {test_name}")
+
+    policy = RetryPolicy("test_retry", attempts=5, base_delay=0.001)
+    calls = []
+
+    async def flaky() -> str:
+        calls.append(1)
+        if len(calls) < 3:
+            raise _locked()
+        return "ok"
+
+    async def broken() -> None:
+        raise OperationalError("SELECT ...", {}, sqlite3.OperationalError("no such table: book__book"))
+
+    assert asyncio.run(policy.run(flaky)) == "ok"
+    assert len(calls) == 3
+    assert metrics.get("retry.test_retry.retries") == 2
+    assert metrics.get("retry.test_retry.recovered") == 1
+
+    assert not is_transient(OperationalError("SELECT ...", {}, sqlite3.OperationalError("no such table: x")))
+    with pytest.raises(OperationalError):
+        asyncio.run(policy.run(broken))
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_exhausted_retries_return_503():
+    """After the last attempt the caller gets 503 with Retry-After, not 500."""
+
+    test_name = "test_exhausted_retries_return_503"
+    test_logger.info(f"Starting test: {test_name}")
+
+    policy = RetryPolicy("test_giveup", attempts=3, base_delay=0.001)
+
+    async def always_locked() -> None:
+        raise _locked()
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(policy.run(always_locked))
+
+    assert error.value.status_code == 503 and error.value.headers["Retry-After"] == "1"
+    assert metrics.get("retry.test_giveup.giveups") == 1
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+async def _write_burst(app, writers: int) -> list[int]:
+    """Create and then update `writers` books concurrently."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        created = await asyncio.gather(*(
+            http.post("/books/", json={"title": f"Burst {i}", "author": "Burst"}) for i in range(writers)
+        ))
+        updated = await asyncio.gather(*(
+            http.put(f"/books/{response.json()['id']}", json={"year": 2000})
+            for response in created if response.status_code == 201
+        ))
+        upserted = await asyncio.gather(*(
+            http.post("/books/upsert", json=[{"title": f"Burst {i}", "author": "Burst", "year": i}])
+            for i in range(writers)
+        ))
+    await dispose_engine()
+    return [response.status_code for response in (*created, *updated, *upserted)]
+
+
+@pytest.mark.slow
+def test_write_burst_has_no_server_errors(committed_client, monkeypatch):
+    """Stress test: 90 concurrent writes without SQLite's busy wait all succeed.
+
+    With `busy_timeout=0` every collision surfaces as "database is locked"
+    immediately, so only the retry policy keeps the writes from failing.
+    """
+
+    test_name = "test_write_burst_has_no_server_errors"
+    test_logger.info(f"Starting test: {test_name}")
+
+    monkeypatch.setattr("lecture_6.book_api.core.config.SQLITE_BUSY_TIMEOUT_MS", 0)
+    monkeypatch.setattr(database_retry, "attempts", 50)
+    asyncio.run(dispose_engine())
+    retries_before = metrics.get("retry.database.retries")
+
+    statuses = asyncio.run(_write_burst(committed_client.app, 30))
+    retries = metrics.get("retry.database.retries") - retries_before
+    test_logger.info(f"{test_name}: {len(statuses)} writes, {retries} retries")
+
+    assert statuses == [201] * 30 + [200] * 60
+    assert retries > 0
+
+    test_logger.info(f"Test passed: {test_name}")
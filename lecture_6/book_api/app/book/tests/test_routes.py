@@ -1,29 +1,6 @@
-import pytest
 from ....core.test_log import test_logger
 
 
-@pytest.fixture
-def created_book_id(client) -> int:
-    """Automatically clears the Book table after each test."""
-
-    book_data = {
-        "title": "API Test Book",
-        "author": "API Test Author",
-        "year": 2024,
-        "description": "Created via fixture"
-    }
-
-    response = client.post("/books/", json=book_data)
-    assert response.status_code in [200, 201]
-
-    book_id = response.json()["id"]
-    test_logger.info(f"Fixture: Created book with ID: {book_id}")
-    test_logger.info(f"Fixture: Response JSON: {response.json()}")
-    test_logger.info(f"Fixture: Response status: {response.status_code}")
-
-    return book_id
-
-
 def test_list_books_api(client):
     """API test: GET /books/ - getting a list of books."""
 
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import tracemalloc
+import pytest
+from ..services import iter_search_chunks, search_books_in_db
+from ....core.test_log import test_logger
+from ....repository.database import async_session, dispose_engine
+
+
+def _seed(client, author: str, count: int) -> None:
+    books = [{"title": f"{author} volume {i}", "author": author, "year": 1900 + i % 100} for i in range(count)]
+    for start in range(0, count, 500):
+        assert client.post("/books/upsert", json=books[start:start + 500]).status_code == 200
+
+
+def test_search_limits_are_validated(client):
+    """`page` and `limit` of /books/search are bounded like the list endpoint."""
+
+    test_name = "test_search_limits_are_validated"
+    test_logger.info(f"Starting test: {test_name}")
+
+    assert client.get("/books/search", params={"title": "a", "limit": 10_000_000}).status_code == 422
+    assert client.get("/books/search", params={"title": "a", "limit": 0}).status_code == 422
+    assert client.get("/books/search", params={"title": "a", "page": 0}).status_code == 422
+    assert client.get("/books/search", params={"title": "a", "limit": 100}).status_code == 200
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_search_stream_returns_every_match(client):
+    """/books/search/stream returns all matching books as NDJSON in id order."""
+
+    test_name = "test_search_stream_returns_every_match"
+    test_logger.info(f"Starting test: {test_name}")
+
+    _seed(client, "Streamed", 620)
+    _seed(client, "Other", 30)
+
+    response = client.get("/books/search/stream", params={"author": "streamed"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    books = [json.loads(line) for line in response.text.splitlines()]
+    test_logger.info(f"{test_name}: {len(books)} books streamed")
+    assert len(books) == 620
+    assert all(book["author"] == "Streamed" for book in books)
+    assert [book["id"] for book in books] == sorted(book["id"] for book in books)
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+async def _peak_memory(author: str, stream: bool) -> tuple[int, int]:
+    """Traced peak while reading every book of `author`, streamed in chunks or as one page."""
+    async def read() -> int:
+        if stream:
+            count = 0
+            async for rows in iter_search_chunks(author=author, chunk_size=100):
+                count += len(rows)
+            return count
+        async with async_session() as session:
+            return len(await search_books_in_db(session, 1, 1_000_000, author=author))
+
+    await read()  # warm up engine, statement cache and connection pool
+    tracemalloc.start()
+    try:
+        count = await read()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    await dispose_engine()
+    return count, peak
+
+
+@pytest.mark.slow
+def test_search_stream_memory_stays_flat(committed_client):
+    """Peak memory of the chunked path does not grow with the number of matches."""
+
+    test_name = "test_search_stream_memory_stays_flat"
+    test_logger.info(f"Starting test: {test_name}")
+
+    _seed(committed_client, "Few", 300)
+    _seed(committed_client, "Many", 3000)
+
+    few, few_peak = asyncio.run(_peak_memory("Few", stream=True))
+    many, many_peak = asyncio.run(_peak_memory("Many", stream=True))
+    _, all_at_once_peak = asyncio.run(_peak_memory("Many", stream=False))
+
+    test_logger.info(f"{test_name}: streamed {few} -> {few_peak} B, {many} -> {many_peak} B, "
+                     f"materialized {many} -> {all_at_once_peak} B")
+    assert (few, many) == (300, 3000)
+    assert many_peak < few_peak * 1.5
+    assert many_peak * 4 < all_at_once_peak
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from ..models import natural_key
+from ..schemas import BookItemCreate, BookItemUpdate
+from .. import sharded_services
+from ....core import config
+from ....core.test_log import test_logger
+from ....repository.sharding import ShardRouter
+
+
+async def _exercise_shards(directory) -> None:
+    """Create, read, page, search, update and delete books on three shards."""
+    router = ShardRouter(3, directory)
+    await router.init()
+
+    try:
+        created = [
+            await sharded_services.create_book(
+                router, BookItemCreate(title=f"Shard Book {i}", author=f"Author {i % 2}", year=2000 + i)
+            )
+            for i in range(7)
+        ]
+        ids = sorted(book.id for book in created)
+
+        assert len(set(ids)) == 7
+        for book in created:
+            assert router.shard_for(book.id) == router.shard_for_key(natural_key(book.title, book.author))
+        assert len({router.shard_for(book_id) for book_id in ids}) > 1
+
+        page = await sharded_services.get_books(router, page=2, limit=3)
+        assert [book.id for book in page] == ids[3:6]
+
+        found = await sharded_services.search_books_in_db(router, 1, 10, author="Author 1")
+        assert [book.id for book in found] == sorted(book.id for book in created[1::2])
+
+        moved = created[5].id
+        updated = await sharded_services.update_book_in_db(router, moved, BookItemUpdate(title="Moved"))
+        assert updated.title == "Moved"
+        assert (await sharded_services.get_books_by_ids(router, [moved]))[moved].title == "Moved"
+
+        facets = await sharded_services.get_facets(router, limit=10)
+        assert facets["authors"] == [("Author 0", 4), ("Author 1", 3)]
+
+        await sharded_services.remove_book(router, moved)
+        assert await sharded_services.get_books_by_ids(router, [moved]) == {}
+
+        with pytest.raises(HTTPException) as error:
+            await sharded_services.get_books(router, page=config.SHARD_MAX_OFFSET // 10 + 1, limit=10)
+        assert error.value.status_code == 400
+
+    finally:
+        await router.dispose()
+
+
+async def _duplicates_across_shards(directory) -> None:
+    """Creates and renames are checked against the natural keys of every shard."""
+    router = ShardRouter(3, directory)
+    await router.init()
+
+    try:
+        first = await sharded_services.create_book(router, BookItemCreate(title="Unique", author="Sharded"))
+        with pytest.raises(HTTPException) as error:
+            await sharded_services.create_book(router, BookItemCreate(title=" UNIQUE", author="sharded"))
+        assert error.value.status_code == 409
+
+        other = await sharded_services.create_book(router, BookItemCreate(title="Other", author="Sharded"))
+        with pytest.raises(HTTPException) as error:
+            await sharded_services.update_book_in_db(router, other.id, BookItemUpdate(title="unique"))
+        assert error.value.status_code == 409
+
+        for i in range(10):
+            renamed = await sharded_services.update_book_in_db(router, first.id, BookItemUpdate(title=f"Renamed {i}"))
+            with pytest.raises(HTTPException) as error:
+                await sharded_services.create_book(router, BookItemCreate(title=renamed.title, author="Sharded"))
+            assert error.value.status_code == 409
+
+    finally:
+        await router.dispose()
+
+
+def test_sharded_crud_and_fan_out(tmp_path):
+    """Point operations hit one shard; list/search are merged in id order."""
+
+    test_name = "test_sharded_crud_and_fan_out"
+    test_logger.info(f"Starting test: {test_name}")
+
+    asyncio.run(_exercise_shards(tmp_path))
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_sharded_natural_key_is_unique_across_shards(tmp_path):
+    """Duplicates conflict with 409 whichever shard holds the existing book."""
+
+    test_name = "test_sharded_natural_key_is_unique_across_shards"
+    test_logger.info(f"Starting test: {test_name}")
+
+    asyncio.run(_duplicates_across_shards(tmp_path))
+
+    test_logger.info(f"Test passed: {test_name}")
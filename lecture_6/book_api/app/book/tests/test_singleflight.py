@@ -0,0 +1,99 @@
+import asyncio
+from ....core.metrics import metrics
+from ....core.query_guard import QueryScope, current_scope
+from ....core.singleflight import SingleFlight
+from ....core.test_log import test_logger
+
+
+async def _concurrent_identical_calls(flight: SingleFlight, calls: int) -> tuple[list, int]:
+    """Issue `calls` identical requests at once; return results and real executions."""
+    executions = 0
+
+    async def query() -> dict:
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.05)
+        return {"id": 1}
+
+    results = await asyncio.gather(*(flight.do(("get", 1), query) for _ in range(calls)))
+    return results, executions
+
+
+def test_singleflight_collapses_identical_reads():
+    """Concurrent identical calls run once and all callers get the result."""
+
+    test_name = "test_singleflight_collapses_identical_reads"
+    test_logger.info(f"Starting test: {test_name}")
+
+    flight = SingleFlight("test_reads")
+    collapsed_before = metrics.get("singleflight.test_reads.collapsed")
+
+    results, executions = asyncio.run(_concurrent_identical_calls(flight, 20))
+
+    assert executions == 1
+    assert results == [{"id": 1}] * 20
+    assert metrics.get("singleflight.test_reads.collapsed") - collapsed_before == 19
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_singleflight_shares_errors():
+    """An exception of the shared call reaches every waiting caller."""
+
+    test_name = "test_singleflight_shares_errors"
+    test_logger.info(f"Starting test: {test_name}")
+
+    flight = SingleFlight("test_errors")
+
+    async def failing() -> None:
+        await asyncio.sleep(0.01)
+        raise LookupError("not found")
+
+    async def run() -> list:
+        return await asyncio.gather(*(flight.do("key", failing) for _ in range(5)), return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert all(isinstance(error, LookupError) for error in errors)
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_singleflight_retries_after_leader_interrupt():
+    """A leader failing on its own deadline or disconnect does not fail the waiting callers."""
+
+    test_name = "test_singleflight_retries_after_leader_interrupt"
+    test_logger.info(f"Starting test: {test_name}")
+
+    flight = SingleFlight("test_interrupt")
+    executions = 0
+
+    async def query() -> str:
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        if executions == 1:
+            current_scope.get().interrupted = True
+            raise TimeoutError("statement deadline of the leader")
+        return "found"
+
+    async def request():
+        current_scope.set(QueryScope())
+        return await flight.do("key", query)
+
+    async def run() -> list:
+        return await asyncio.gather(*(request() for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert isinstance(results[0], TimeoutError)
+    assert results[1:] == ["found"] * 4
+    assert executions == 2
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_metrics_endpoint(client):
+    """API test: GET /metrics exposes single-flight counters."""
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert isinstance(response.json(), dict)
@@ -0,0 +1,32 @@
+import os
+import socket
+import pytest
+from ....benchmarks.startup import time_to_healthy
+from ....core.test_log import test_logger
+
+STARTUP_BUDGET_SECONDS = float(os.getenv("BOOK_API_STARTUP_BUDGET", "5.0"))
+
+
+def _free_port() -> int:
+    """A TCP port nobody listens on, so parallel test processes do not collide."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.mark.slow
+def test_time_to_first_healthy_response(tmp_path):
+    """Cold start: /healthcheck must answer within the startup budget."""
+
+    test_name = "test_time_to_first_healthy_response"
+    test_logger.info(f"Starting test: {test_name}")
+
+    elapsed, output = time_to_healthy(port=_free_port(), database_url=f"sqlite+aiosqlite:///{tmp_path / 'cold.db'}")
+    test_logger.info(f"{test_name}: healthy after {elapsed * 1000:.0f} ms")
+
+    assert "Startup phase init_database" in output
+    assert elapsed < STARTUP_BUDGET_SECONDS, (
+        f"Cold start took {elapsed:.2f} s, budget is {STARTUP_BUDGET_SECONDS:.2f} s"
+    )
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -0,0 +1,35 @@
+import pytest
+from ..services import get_books, get_book_in_db, search_books_in_db, create_book
+from ..schemas import BookItemCreate
+from ....core.metrics import metrics
+from ....core.test_log import test_logger
+
+
+async def _hot_reads(db, book_id: int, i: int) -> None:
+    """One round of the cached read queries with varying parameters."""
+    await get_books(db, page=i % 3 + 1, limit=5 + i % 4)
+    await get_book_in_db(db, book_id)
+    await search_books_in_db(db, page=1, limit=10, title=f"Cache {i % 7}")
+    await search_books_in_db(db, page=i % 2 + 1, limit=10, title="Cache", author="Cache", year=2000 + i % 3)
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_hit_statement_cache(async_db):
+    """After warm-up, changing parameter values never compiles a new statement."""
+
+    test_name = "test_hot_queries_hit_statement_cache"
+    test_logger.info(f"Starting test: {test_name}")
+
+    book_id = (await create_book(async_db, BookItemCreate(title="Cache 1", author="Cache", year=2001))).id
+    await _hot_reads(async_db, book_id, 0)
+
+    hits, misses = metrics.get("sql.cache.hits"), metrics.get("sql.cache.misses")
+    for i in range(1, 50):
+        await _hot_reads(async_db, book_id, i)
+    hits, misses = metrics.get("sql.cache.hits") - hits, metrics.get("sql.cache.misses") - misses
+
+    test_logger.info(f"{test_name}: {hits} cache hits, {misses} misses")
+    assert hits >= 49 * 4
+    assert misses == 0
+
+    test_logger.info(f"Test passed: {test_name}")
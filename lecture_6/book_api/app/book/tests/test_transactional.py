@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import func, select
+from ..models import Book
+from ..services import create_book
+from ..schemas import BookItemCreate
+from ....core.test_log import test_logger
+
+ISOLATION_TITLE = "Rolled Back Book"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("attempt", [1, 2])
+async def test_writes_are_rolled_back(async_client, async_db, attempt):
+    """Each run starts without the book the previous run created and committed."""
+
+    test_name = f"test_writes_are_rolled_back[{attempt}]"
+    test_logger.info(f"Starting test: {test_name}")
+
+    count = select(func.count()).select_from(Book).where(Book.title == ISOLATION_TITLE)
+    assert (await async_db.execute(count)).scalar_one() == 0
+
+    response = await async_client.post("/books/", json={"title": ISOLATION_TITLE, "author": "Harness"})
+    assert response.status_code == 201
+    assert (await async_client.get(f"/books/{response.json()['id']}")).status_code == 200
+    assert (await async_db.execute(count)).scalar_one() == 1
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+@pytest.mark.asyncio
+async def test_service_errors_roll_back_to_savepoint(async_db):
+    """A service's rollback after an error only undoes its own savepoint."""
+
+    test_name = "test_service_errors_roll_back_to_savepoint"
+    test_logger.info(f"Starting test: {test_name}")
+
+    book_id = (await create_book(async_db, BookItemCreate(title="Savepoint Book", author="Harness"))).id
+    with pytest.raises(Exception) as error:
+        await create_book(async_db, BookItemCreate(title="savepoint book ", author="HARNESS"))
+
+    assert error.value.status_code == 409
+    assert await async_db.get(Book, book_id) is not None
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+@pytest.mark.asyncio
+async def test_other_constraint_errors_are_not_conflicts(async_db):
+    """Only the natural key index maps to 409; e.g. the year CHECK is a database error."""
+
+    test_name = "test_other_constraint_errors_are_not_conflicts"
+    test_logger.info(f"Starting test: {test_name}")
+
+    negative_year = BookItemCreate.model_construct(title="Check Book", author="Harness", year=-1)
+    with pytest.raises(Exception) as error:
+        await create_book(async_db, negative_year)
+
+    test_logger.info(f"{test_name}: year -1 -> {error.value.status_code}")
+    assert error.value.status_code == 500
+    assert "CHECK constraint failed" in error.value.detail
+
+    test_logger.info(f"Test passed: {test_name}")
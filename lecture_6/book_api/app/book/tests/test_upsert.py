@@ -0,0 +1,117 @@
+import pytest
+from sqlalchemy import event
+from ..schemas import BookItemCreate
+from ..services import SQLITE_MAX_PARAMETERS, UPSERT_BATCH_SIZE, upsert_books
+from ....core.test_log import test_logger
+from ....repository.database import get_engine
+
+
+def test_upsert_books_is_idempotent(client):
+    """API test: POST /books/upsert - insert, update and unchanged counts."""
+
+    test_name = "test_upsert_books_is_idempotent"
+    test_logger.info(f"Starting test: {test_name}")
+
+    feed = [
+        {"title": "Feed Book A", "author": "Feed Author", "year": 2001},
+        {"title": "Feed Book B", "author": "Feed Author", "year": 2002},
+    ]
+
+    response = client.post("/books/upsert", json=feed)
+    test_logger.info(f"{test_name}: first POST /books/upsert -> {response.json()}")
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 2, "updated": 0, "unchanged": 0, "duplicates": 0}
+
+    feed[1]["year"] = 2003
+    feed.append({"title": "  feed book a ", "author": "FEED AUTHOR", "year": 2001})
+
+    response = client.post("/books/upsert", json=feed)
+    test_logger.info(f"{test_name}: second POST /books/upsert -> {response.json()}")
+    assert response.json() == {"inserted": 0, "updated": 1, "unchanged": 1, "duplicates": 1}
+
+    found = client.get("/books/search?title=Feed Book").json()
+    assert sorted((book["title"], book["year"]) for book in found) == [
+        ("Feed Book A", 2001), ("Feed Book B", 2003)
+    ]
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_create_duplicate_book_conflicts(client):
+    """API test: POST /books/ with an existing natural key returns 409."""
+
+    test_name = "test_create_duplicate_book_conflicts"
+    test_logger.info(f"Starting test: {test_name}")
+
+    book = {"title": "Only Once", "author": "Single Author", "year": 1990}
+    assert client.post("/books/", json=book).status_code == 201
+
+    response = client.post("/books/", json={**book, "title": "ONLY ONCE "})
+    test_logger.info(f"{test_name}: duplicate POST /books/ -> {response.status_code}")
+    assert response.status_code == 409
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+def test_natural_key_folds_non_ascii_case(client):
+    """API test: the natural key is case-insensitive beyond ASCII, for upsert, create and update."""
+
+    test_name = "test_natural_key_folds_non_ascii_case"
+    test_logger.info(f"Starting test: {test_name}")
+
+    feed = [
+        {"title": "Война и мир", "author": "Толстой", "year": 1867},
+        {"title": " ВОЙНА И МИР", "author": "ТОЛСТОЙ ", "year": 1869},
+    ]
+    response = client.post("/books/upsert", json=feed)
+    test_logger.info(f"{test_name}: POST /books/upsert -> {response.json()}")
+    assert response.json() == {"inserted": 1, "updated": 0, "unchanged": 0, "duplicates": 1}
+
+    response = client.post("/books/", json={"title": "война и мир", "author": "толстой", "year": 1869})
+    assert response.status_code == 409
+
+    other = client.post("/books/", json={"title": "Straße", "author": "Autor", "year": 2000}).json()
+    response = client.post("/books/", json={"title": "STRASSE", "author": "autor", "year": 2000})
+    assert response.status_code == 409
+
+    response = client.put(f"/books/{other['id']}", json={"title": "ВОЙНА И МИР", "author": "Толстой"})
+    test_logger.info(f"{test_name}: renaming onto an existing key -> {response.status_code}")
+    assert response.status_code == 409
+
+    response = client.put(f"/books/{other['id']}", json={"title": "Anna Karenina", "author": "Толстой"})
+    assert response.status_code == 200
+    response = client.post("/books/", json={"title": "ANNA KARENINA", "author": "толстой", "year": 1878})
+    assert response.status_code == 409
+    assert client.post("/books/", json={"title": "Straße", "author": "Autor", "year": 2000}).status_code == 201
+
+    test_logger.info(f"Test passed: {test_name}")
+
+
+@pytest.mark.asyncio
+async def test_upsert_batches_stay_within_the_parameter_limit(async_db):
+    """Service test: every upsert statement binds at most SQLITE_MAX_PARAMETERS values."""
+
+    test_name = "test_upsert_batches_stay_within_the_parameter_limit"
+    test_logger.info(f"Starting test: {test_name}")
+
+    bound = []
+
+    def count_parameters(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO book__book"):
+            bound.append(len(parameters))
+
+    items = [BookItemCreate(title=f"Bulk {number}", author="Bulk Author", year=2000)
+             for number in range(UPSERT_BATCH_SIZE + 1)]
+    sync_engine = get_engine().sync_engine
+    event.listen(sync_engine, "before_cursor_execute", count_parameters)
+    try:
+        result = await upsert_books(async_db, items)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count_parameters)
+
+    test_logger.info(f"{test_name}: parameters per statement {bound}")
+    assert result["inserted"] == len(items)
+    assert len(bound) == 2
+    assert max(bound) <= SQLITE_MAX_PARAMETERS
+
+    test_logger.info(f"Test passed: {test_name}")
@@ -1,15 +1,75 @@
+import json
 from typing import Optional, List
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..book.models import Book
-from ..book.schemas import BookItemCreate, BookItemUpdate, MessageResponse, BookItemRead
-from ...app.book.services import get_books, create_book, search_books_in_db, update_book_in_db, \
-    remove_book, get_book_in_db
+from starlette.types import Scope
+from ..book.schemas import BookItemCreate, BookItemUpdate, MessageResponse, BookItemRead, \
+    FacetsResponse, FacetCount, BookUpsertResult, BooksBatchResponse, BookChangesResponse, JobSubmit, JobRead, \
+    BatchOperation, BatchResponse
+from ...app.book.services import get_books, get_book_in_db, create_book, search_books_in_db, update_book_in_db, \
+    remove_book, get_facets_in_db, upsert_books, get_books_by_ids, get_changes_since, iter_search_chunks
+from ...app.book import sharded_services
+from ...app.book.batch import execute_batch
+from ...app.book.changes import change_feed
+from ...app.book.jobs import job_runner
+from ...core.encoding import COLUMNS, JSON, MSGPACK, pack, to_columns
+from ...core.loader import BatchLoader
+from ...core.singleflight import SingleFlight
+from ...repository.database import async_session, shared_session
+from ...repository.sharding import get_shard_router
 
+book_reads = SingleFlight("books")
+"""Coalesces identical concurrent read requests (get by id, search)."""
 
-async def list_items_view(db: AsyncSession, page: int, limit: int):
+
+async def _load_books(book_ids: List[int]) -> dict[int, Book]:
+    """Batch function of `book_loader`: one `IN` query on its own session."""
+    shards = get_shard_router()
+    if shards is not None:
+        return await sharded_services.get_books_by_ids(shards, book_ids)
+
+    async with async_session() as session:
+        return await get_books_by_ids(session, book_ids)
+
+
+book_loader = BatchLoader("books", _load_books)
+"""Micro-batches concurrent point lookups by id into one query."""
+
+BOOK_FIELDS = tuple(BookItemRead.model_fields)
+BOOK_FORMATS = (JSON, MSGPACK, COLUMNS)
+"""Media types of book lists, in `Accept` negotiation order (JSON by default)."""
+BATCH_FORMATS = (JSON, MSGPACK)
+
+
+def book_rows(books) -> list:
+    """Books (ORM rows or `BookItemRead`) as MessagePack-ready dicts."""
+    return [{field: getattr(book, field) for field in BOOK_FIELDS} for book in books]
+
+
+def encode_books(books, media_type: str):
+    """Book list in the body layout of `media_type` (rows or columns)."""
+    return to_columns(books, BOOK_FIELDS) if media_type == COLUMNS else book_rows(books)
+
+
+def binary_response(content, media_type: str) -> Response:
+    """MessagePack response; `Vary: Accept` as the same URL also serves JSON."""
+    return Response(pack(content), media_type=media_type, headers={"Vary": "Accept"})
+
+
+async def list_items_view(db: AsyncSession, page: int, limit: int, media_type: str = JSON):
     """Responsible for handling request/response, delegating DB logic to service layer."""
+    shards = get_shard_router()
+    if shards is not None:
+        books = await sharded_services.get_books(shards, page, limit)
+    else:
+        books = await get_books(db, page, limit)
 
-    return await get_books(db, page, limit)
+    if media_type == JSON:
+        return books
+    return binary_response(encode_books(books, media_type), media_type)
 
 
 async def add_item_view(db: AsyncSession, item: BookItemCreate) -> Book:
@@ -17,23 +77,58 @@ async def add_item_view(db: AsyncSession, item: BookItemCreate) -> Book:
 
     Delegates to the service layer and returns the created Book instance.
     """
+    shards = get_shard_router()
+    if shards is not None:
+        return await sharded_services.create_book(shards, item)
 
     return await create_book(db, item)
 
 
-async def remove_item_view(db: AsyncSession, item_id: int) -> MessageResponse:
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Convert an `If-Match` header into the expected row version.
+
+    Accepts the ETag format sent by the API (`"3"`, also weak `W/"3"`).
+    `*` or a missing header means "any version".
+
+    Raises:
+        HTTPException: If the header is not a version ETag (400).
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+
+    tag = if_match.strip().removeprefix("W/").strip('"')
+    if not tag.isdigit():
+        raise HTTPException(status_code=400, detail="If-Match must be an ETag returned by this API")
+
+    return int(tag)
+
+
+def etag(book: BookItemRead) -> str:
+    """ETag value for a book: its row version in quotes."""
+    return f'"{book.version}"'
+
+
+async def remove_item_view(db: AsyncSession, item_id: int, if_match: Optional[str] = None) -> MessageResponse:
     """Delete a book by its ID and return a confirmation message.
 
-    Delegates all database work to the `remove_book` function.
+    Delegates all database work to the `remove_book` function; with
+    `If-Match` the delete only happens if the version still matches.
     """
-    result = await remove_book(db, item_id)
+    expected_version = parse_if_match(if_match)
+
+    shards = get_shard_router()
+    if shards is not None:
+        result = await sharded_services.remove_book(shards, item_id, expected_version)
+    else:
+        result = await remove_book(db, item_id, expected_version)
     return MessageResponse(message=result["message"])
 
 
 async def update_book_view(
     db: AsyncSession,
     book_id: int,
-    item: BookItemUpdate
+    item: BookItemUpdate,
+    if_match: Optional[str] = None
 ) -> BookItemRead:
     """Update a book by its ID and return the updated record.
 
@@ -41,14 +136,22 @@ async def update_book_view(
         db (AsyncSession): Active SQLAlchemy async session.
         book_id (int): ID of the book to update.
         item (BookItemUpdate): Pydantic model with fields to update.
+        if_match (str | None): `If-Match` header; update only this version.
 
     Raises:
-        HTTPException: If the book with the given ID does not exist (404).
+        HTTPException: If the book with the given ID does not exist (404)
+                       or was changed since the ETag was issued (412).
 
     Returns:
         BookItemRead: Updated book record as a Pydantic model.
     """
-    book = await update_book_in_db(db, book_id, item)
+    expected_version = parse_if_match(if_match)
+
+    shards = get_shard_router()
+    if shards is not None:
+        book = await sharded_services.update_book_in_db(shards, book_id, item, expected_version)
+    else:
+        book = await update_book_in_db(db, book_id, item, expected_version)
     return BookItemRead.model_validate(book)
 
 
@@ -58,14 +161,225 @@ async def search_books_view(
     limit: int = 10,
     title: Optional[str] = None,
     author: Optional[str] = None,
-    year: Optional[int] = None
+    year: Optional[int] = None,
+    media_type: str = JSON
 ) -> List[BookItemRead]:
-    """Search for books using optional filters and pagination."""
-    books = await search_books_in_db(db, page, limit, title, author, year)
-    return [BookItemRead.model_validate(book) for book in books]
+    """Search for books using optional filters and pagination.
 
+    Identical searches running at the same time share one database query,
+    whatever format each of them is answered in. Inside the transaction of
+    a `POST /batch` the search runs alone on the batch's session, so it
+    sees the batch's writes and nobody else does.
+    """
+    async def run() -> List[BookItemRead]:
+        shards = get_shard_router()
+        if shards is not None:
+            books = await sharded_services.search_books_in_db(shards, page, limit, title, author, year)
+        else:
+            books = await search_books_in_db(db, page, limit, title, author, year)
+        return [BookItemRead.model_validate(book) for book in books]
 
-async def get_book_view(db: AsyncSession, book_id: int) -> BookItemRead:
-    """Return a single book by its ID."""
-    book = await get_book_in_db(db, book_id)
-    return BookItemRead.model_validate(book)
+    if shared_session.get() is not None:
+        books = await run()
+    else:
+        books = await book_reads.do(("search", page, limit, title, author, year), run)
+    if media_type == JSON:
+        return books
+    return binary_response(encode_books(books, media_type), media_type)
+
+
+async def stream_search_view(
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    year: Optional[int] = None,
+    media_type: str = JSON
+) -> StreamingResponse:
+    """Stream every book matching the filters as NDJSON, one chunk at a time.
+
+    With MessagePack the stream is a sequence of packed books; in columnar
+    layout every chunk is one packed map of columns.
+
+    Chunks continue by id in the single database file, so the stream
+    is only available in single-file mode.
+    """
+    if get_shard_router() is not None:
+        raise HTTPException(status_code=501, detail="Search streaming is not supported with sharded storage")
+
+    async def lines():
+        async for rows in iter_search_chunks(title, author, year):
+            yield "".join(json.dumps(row) + "\n" for row in rows)
+
+    async def packed():
+        async for rows in iter_search_chunks(title, author, year):
+            if media_type == COLUMNS:
+                yield pack(to_columns(rows, BOOK_FIELDS))
+            else:
+                yield b"".join(pack(row) for row in rows)
+
+    if media_type == JSON:
+        return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"Vary": "Accept"})
+    return StreamingResponse(packed(), media_type=media_type, headers={"Vary": "Accept"})
+
+
+async def get_book_view(book_id: int) -> BookItemRead:
+    """Return a single book by its ID.
+
+    Concurrent requests for the same ID share one lookup, and lookups for
+    different IDs arriving within a couple of milliseconds are resolved by
+    `book_loader` with a single `WHERE id IN (...)` query. Inside the
+    transaction of a `POST /batch` the book is read with `get_book_in_db`
+    on the batch's session instead, so the batch's own writes are visible.
+
+    Raises:
+        HTTPException: If the book with the given ID does not exist (404).
+    """
+    session = shared_session.get()
+    if session is not None and get_shard_router() is None:
+        return BookItemRead.model_validate(await get_book_in_db(session, book_id))
+
+    async def run() -> BookItemRead:
+        book = await book_loader.load(book_id)
+        if book is None:
+            raise HTTPException(status_code=404, detail="Book not found")
+        return BookItemRead.model_validate(book)
+
+    return await book_reads.do(("get", book_id), run)
+
+
+async def get_facets_view(
+    db: AsyncSession,
+    limit: int = 20,
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    year: Optional[int] = None
+) -> FacetsResponse:
+    """Return author and year facet counts, optionally scoped by search filters."""
+    shards = get_shard_router()
+    if shards is not None:
+        facets = await sharded_services.get_facets(shards, limit, title, author, year)
+    else:
+        facets = await get_facets_in_db(db, limit, title, author, year)
+    return FacetsResponse(
+        authors=[FacetCount(value=value, count=count) for value, count in facets["authors"]],
+        years=[FacetCount(value=value, count=count) for value, count in facets["years"]],
+    )
+
+
+async def upsert_books_view(db: AsyncSession, items: List[BookItemCreate]) -> BookUpsertResult:
+    """Bulk insert-or-update books keyed on normalised (title, author).
+
+    The natural key is enforced per file, so upsert is only available
+    in single-file mode.
+    """
+    if get_shard_router() is not None:
+        raise HTTPException(status_code=501, detail="Upsert is not supported with sharded storage")
+
+    return BookUpsertResult(**await upsert_books(db, items))
+
+
+async def get_books_batch_view(db: AsyncSession, book_ids: List[int], media_type: str = JSON) -> BooksBatchResponse:
+    """Return books for all requested ids in request order, listing missing ids."""
+    shards = get_shard_router()
+    if shards is not None:
+        found = await sharded_services.get_books_by_ids(shards, book_ids)
+    else:
+        found = await get_books_by_ids(db, book_ids)
+
+    items = [found[book_id] for book_id in book_ids if book_id in found]
+    missing = [book_id for book_id in dict.fromkeys(book_ids) if book_id not in found]
+    if media_type != JSON:
+        return binary_response({"items": encode_books(items, media_type), "missing": missing}, media_type)
+
+    return BooksBatchResponse(items=[BookItemRead.model_validate(book) for book in items], missing=missing)
+
+
+async def get_changes_view(db: AsyncSession, since: int, limit: int) -> BookChangesResponse:
+    """Delta sync: books changed and deleted after the `since` watermark.
+
+    The change log is written per file, so delta sync is only available
+    in single-file mode.
+    """
+    if get_shard_router() is not None:
+        raise HTTPException(status_code=501, detail="Delta sync is not supported with sharded storage")
+
+    return BookChangesResponse(**await get_changes_since(db, since, limit))
+
+
+async def stream_changes_view(last_event_id: Optional[int]) -> StreamingResponse:
+    """Stream the change log as Server-Sent Events.
+
+    The change log is written per file, so the feed is only available
+    in single-file mode.
+    """
+    if get_shard_router() is not None:
+        raise HTTPException(status_code=501, detail="Change feed is not supported with sharded storage")
+
+    return StreamingResponse(
+        change_feed.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def submit_job_view(request: JobSubmit) -> JobRead:
+    """Validate job parameters and queue the job.
+
+    Jobs work on the single database file, so they are not available
+    in sharded mode.
+    """
+    if get_shard_router() is not None:
+        raise HTTPException(status_code=501, detail="Jobs are not supported with sharded storage")
+
+    if request.kind == "import":
+        try:
+            TypeAdapter(List[BookItemCreate]).validate_python(request.params.get("books"))
+        except ValidationError as error:
+            raise HTTPException(status_code=422, detail=f"Invalid books for import: {error.errors()[:3]}")
+
+    return JobRead.model_validate(await job_runner.submit(request.kind, request.params))
+
+
+async def get_job_view(job_id: int) -> JobRead:
+    """Return the state of a job or raise 404."""
+    job = await job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobRead.model_validate(job)
+
+
+async def list_jobs_view(limit: int) -> List[JobRead]:
+    """Return the most recent jobs."""
+    return [JobRead.model_validate(job) for job in await job_runner.recent(limit)]
+
+
+async def cancel_job_view(job_id: int) -> JobRead:
+    """Cancel a job; 404 if it does not exist, 409 if it has already finished."""
+    job = await job_runner.cancel(job_id)
+    if job is None:
+        await get_job_view(job_id)
+        raise HTTPException(status_code=409, detail="Job has already finished")
+    return JobRead.model_validate(job)
+
+
+async def get_job_result_view(job_id: int) -> FileResponse:
+    """Download the file written by a succeeded export job."""
+    job = await get_job_view(job_id)
+    if job.kind != "export" or job.status != "succeeded":
+        raise HTTPException(status_code=409, detail="Job has no downloadable result")
+    return FileResponse(job.result["path"], media_type="application/x-ndjson",
+                        filename=f"books-{job.id}.ndjson")
+
+
+async def run_batch_view(scope: Scope, operations: List[BatchOperation], media_type: str = JSON) -> BatchResponse:
+    """Execute a batch of book route calls.
+
+    The writes of a batch share one transaction on the single database
+    file, so batches with writes are not available in sharded mode.
+    """
+    if get_shard_router() is not None and any(operation.method != "GET" for operation in operations):
+        raise HTTPException(status_code=501, detail="Batched writes are not supported with sharded storage")
+
+    batch = BatchResponse.model_validate(await execute_batch(scope, operations))
+    if media_type == JSON:
+        return batch
+    return binary_response(batch.model_dump(), media_type)
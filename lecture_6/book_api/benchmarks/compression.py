@@ -0,0 +1,50 @@
+"""CPU/bandwidth trade-off of response compression for book lists.
+
+Encodes a JSON list of N books (the shape returned by list/search) and
+compresses it with every encoder available to `CompressionMiddleware`,
+printing compression time, throughput and size for each.
+
+Usage (from lecture_6/):
+    python -m book_api.benchmarks.compression --books 100 1000 10000
+"""
+import argparse
+import json
+import time
+from ..core.compression import available_encoders
+
+
+def book_list(count: int) -> bytes:
+    """JSON body of `count` books, similar to `GET /books/?limit=count`."""
+    books = [
+        {"id": i, "title": f"Book title number {i}", "author": f"Author {i % 97}", "year": 1950 + i % 70}
+        for i in range(1, count + 1)
+    ]
+    return json.dumps(books).encode()
+
+
+def measure(encoder_factory, body: bytes, repeat: int) -> tuple[float, int]:
+    """Return mean seconds per compression and the compressed size."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encoder = encoder_factory()
+        compressed = encoder.compress(body) + encoder.finish()
+    return (time.perf_counter() - started) / repeat, len(compressed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'books':>7} {'encoding':>8} {'raw KB':>9} {'out KB':>9} {'ratio':>7} {'ms':>8} {'MB/s':>8}")
+    for count in args.books:
+        body = book_list(count)
+        for name, factory in available_encoders().items():
+            seconds, size = measure(factory, body, args.repeat)
+            print(f"{count:>7} {name:>8} {len(body) / 1024:>9.1f} {size / 1024:>9.1f} "
+                  f"{len(body) / size:>6.1f}x {seconds * 1000:>8.3f} {len(body) / seconds / 2**20:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
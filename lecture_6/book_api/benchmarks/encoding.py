@@ -0,0 +1,80 @@
+"""Encode time and payload size of the response formats for book lists.
+
+Serializes N books (the shape returned by list/search) the way each
+negotiated format does it:
+
+- json     the current path: `response_model` validation, `jsonable_encoder`
+           and `JSONResponse` rendering
+- msgpack  `Accept: application/msgpack`, one map per book
+- columns  `Accept: application/vnd.book-api.columns+msgpack`, one array per field
+
+and prints encode time, raw and gzip-compressed size, and decode time.
+MessagePack uses the `msgpack` package when installed, the pure-Python
+encoder of `core.encoding` otherwise (shown in the header line).
+
+Usage (from lecture_6/):
+    python -m book_api.benchmarks.encoding --books 100 1000 10000
+"""
+import argparse
+import gzip
+import json
+import time
+from types import SimpleNamespace
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from ..app.book.schemas import BookItemRead
+from ..app.book.views import encode_books
+from ..core.encoding import COLUMNS, MSGPACK, msgpack, pack, unpack
+
+BOOK_LIST = TypeAdapter(List[BookItemRead])
+
+
+def book_rows(count: int) -> list:
+    """`count` ORM-like books, similar to `GET /books/?limit=count`."""
+    return [
+        SimpleNamespace(id=i, title=f"Book title number {i}", author=f"Author {i % 97}", year=1950 + i % 70, version=1)
+        for i in range(1, count + 1)
+    ]
+
+
+def encode_json(books: list) -> bytes:
+    return JSONResponse(jsonable_encoder(BOOK_LIST.dump_python(BOOK_LIST.validate_python(books, from_attributes=True),
+                                                               mode="json"))).body
+
+
+FORMATS = {
+    "json": (encode_json, json.loads),
+    "msgpack": (lambda books: pack(encode_books(books, MSGPACK)), unpack),
+    "columns": (lambda books: pack(encode_books(books, COLUMNS)), unpack),
+}
+
+
+def measure(function, argument, repeat: int) -> tuple[float, object]:
+    """Return mean seconds per call and the last result."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function(argument)
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"MessagePack encoder: {'msgpack ' + '.'.join(map(str, msgpack.version)) if msgpack else 'pure Python'}")
+    print(f"{'books':>7} {'format':>8} {'KB':>9} {'gzip KB':>9} {'encode ms':>10} {'decode ms':>10}")
+    for count in args.books:
+        books = book_rows(count)
+        for name, (encode, decode) in FORMATS.items():
+            encode_seconds, body = measure(encode, books, args.repeat)
+            decode_seconds, _ = measure(decode, body, args.repeat)
+            print(f"{count:>7} {name:>8} {len(body) / 1024:>9.1f} {len(gzip.compress(body)) / 1024:>9.1f} "
+                  f"{encode_seconds * 1000:>10.3f} {decode_seconds * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
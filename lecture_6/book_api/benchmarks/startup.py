@@ -0,0 +1,111 @@
+"""Cold-start profile of the Book API.
+
+1. Per-module import time of `book_api.main` (parsed from `python -X importtime`).
+2. Time from process launch to the first healthy `/healthcheck` response,
+   with lifespan phases logged by the server (`BOOK_API_PROFILE_STARTUP=1`).
+
+Usage (from lecture_6/):
+    python -m book_api.benchmarks.startup --top 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+import httpx
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+PACKAGE = Path(__file__).resolve().parents[1].name
+
+
+def import_times(module: str = f"{PACKAGE}.main") -> list[tuple[str, int, int]]:
+    """Import `module` in a fresh interpreter and return per-module import times.
+
+    Returns:
+        list[tuple[str, int, int]]: (module, self_us, cumulative_us), slowest first.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PACKAGE_ROOT,
+        env=dict(os.environ, BOOK_API_SQL_ECHO="0"),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def time_to_healthy(port: int, database_url: str, timeout: float = 60.0) -> tuple[float, str]:
+    """Start uvicorn and measure seconds until `/healthcheck` answers 200.
+
+    Returns:
+        tuple[float, str]: Elapsed seconds and the server output (startup phases).
+    """
+    env = dict(
+        os.environ,
+        BOOK_API_DATABASE_URL=database_url,
+        BOOK_API_PROFILE_STARTUP="1",
+        BOOK_API_SQL_ECHO="0",
+    )
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{PACKAGE}.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=PACKAGE_ROOT,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/healthcheck", timeout=1.0).status_code == 200:
+                    return time.perf_counter() - started, _stop(server)
+            except httpx.TransportError:
+                time.sleep(0.02)
+        raise RuntimeError(f"Server did not become healthy within {timeout} s:\n{_stop(server)}")
+    except BaseException:
+        _stop(server)
+        raise
+
+
+def _stop(server: subprocess.Popen) -> str:
+    """Terminate the server and return everything it printed."""
+    server.terminate()
+    try:
+        output, _ = server.communicate(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        output, _ = server.communicate()
+    return output or ""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--database", default=f"sqlite+aiosqlite:///{PACKAGE_ROOT / 'bench_startup.db'}")
+    args = parser.parse_args()
+
+    print(f"{'module':<50} {'self ms':>9} {'cumul ms':>9}")
+    for name, self_us, cumulative_us in import_times()[:args.top]:
+        print(f"{name:<50} {self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}")
+
+    elapsed, output = time_to_healthy(args.port, args.database)
+    print()
+    print("\n".join(line for line in output.splitlines() if "Startup" in line))
+    print(f"Time to first healthy response: {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
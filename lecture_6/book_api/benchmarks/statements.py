@@ -0,0 +1,109 @@
+"""Per-call Python overhead of the hot read queries, inline vs cached statements.
+
+For `get_books`, `get_book_in_db` and `search_books_in_db` compares the
+statements as they used to be built on every call (`select(Book)...`) with
+the pre-built statements of `services.py`:
+
+- prepare: building the statement and deriving its cache key, the work the
+  compiled cache cannot save;
+- execute: the whole `session.execute()` round trip on a small SQLite file.
+
+It also prints the compiled cache hit rate of the cached variant.
+
+Usage (from lecture_6/):
+    python -m book_api.benchmarks.statements --calls 5000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+def _inline_statements():
+    """The statements as built per call before they were cached."""
+    from sqlalchemy import and_, select
+    from ..app.book.models import Book
+    from ..app.book.services import _build_filters
+
+    return {
+        "get_books": lambda i: (select(Book).offset(i % 5).limit(10), None),
+        "get_book_in_db": lambda i: (select(Book).where(Book.id == i % 10 + 1), None),
+        "search_books_in_db": lambda i: (
+            select(Book).where(and_(*_build_filters("code", None, None))).offset(i % 5).limit(10), None
+        ),
+    }
+
+
+def _cached_statements():
+    """The statements of `services.py` with their parameters."""
+    from ..app.book.services import BOOKS_PAGE, BOOK_BY_ID, _search_statement
+
+    return {
+        "get_books": lambda i: (BOOKS_PAGE, {"offset": i % 5, "limit": 10}),
+        "get_book_in_db": lambda i: (BOOK_BY_ID, {"book_id": i % 10 + 1}),
+        "search_books_in_db": lambda i: (
+            _search_statement(True, False, False), {"title": "%code%", "offset": i % 5, "limit": 10}
+        ),
+    }
+
+
+def _prepare_time(build, calls: int) -> float:
+    """Mean microseconds to build a statement and derive its cache key."""
+    started = time.perf_counter()
+    for i in range(calls):
+        statement, _ = build(i)
+        statement._generate_cache_key()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+async def _execute_time(build, calls: int) -> float:
+    """Mean microseconds of `session.execute()` for the statement."""
+    from ..repository.database import async_session
+
+    async with async_session() as session:
+        started = time.perf_counter()
+        for i in range(calls):
+            statement, params = build(i)
+            (await session.execute(statement, params)).scalars().all()
+        return (time.perf_counter() - started) / calls * 1e6
+
+
+async def run(calls: int) -> list[tuple[str, str, float, float]]:
+    """Measure every query in both variants."""
+    from ..core.metrics import metrics
+    from ..repository.database import dispose_engine
+    from ..repository.init_db import init_database
+
+    await init_database()
+    rows = []
+    for variant, statements in (("inline", _inline_statements()), ("cached", _cached_statements())):
+        hits, misses = metrics.get("sql.cache.hits"), metrics.get("sql.cache.misses")
+        for name, build in statements.items():
+            await _execute_time(build, 50)  # warm up the compiled cache
+            rows.append((name, variant, _prepare_time(build, calls), await _execute_time(build, calls)))
+        hits, misses = metrics.get("sql.cache.hits") - hits, metrics.get("sql.cache.misses") - misses
+        print(f"{variant}: compiled cache hit rate {hits / max(1, hits + misses):.2%}")
+
+    await dispose_engine()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["BOOK_API_DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(directory) / 'bench_statements.db'}"
+        os.environ["BOOK_API_SQL_ECHO"] = "0"
+        rows = asyncio.run(run(args.calls))
+
+    print(f"{'query':>20} {'variant':>8} {'prepare us':>11} {'execute us':>11}")
+    for name, variant, prepare, execute in sorted(rows):
+        print(f"{name:>20} {variant:>8} {prepare:>11.1f} {execute:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
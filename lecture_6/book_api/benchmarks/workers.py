@@ -0,0 +1,104 @@
+"""Throughput of the Book API with 1..N worker processes.
+
+Starts `python -m book_api.serve` with a growing `BOOK_API_WORKERS`,
+drives it with concurrent GET requests for a fixed time and prints
+requests per second for each worker count.
+
+Usage (from lecture_6/):
+    python -m book_api.benchmarks.workers --workers 1 2 4 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+import httpx
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+
+
+def start_server(workers: int, port: int, database_url: str) -> subprocess.Popen:
+    """Start the API in a subprocess with the given number of workers."""
+    env = dict(
+        os.environ,
+        BOOK_API_WORKERS=str(workers),
+        BOOK_API_PORT=str(port),
+        BOOK_API_HOST="127.0.0.1",
+        BOOK_API_DATABASE_URL=database_url,
+        BOOK_API_SQL_ECHO="0",
+    )
+    package = Path(__file__).resolve().parents[1].name
+    return subprocess.Popen(
+        [sys.executable, "-m", f"{package}.serve"],
+        cwd=PACKAGE_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_healthy(base_url: str, timeout: float = 30.0) -> None:
+    """Poll /healthcheck until the server answers or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/healthcheck")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Server did not become healthy in time")
+
+
+async def run_load(base_url: str, duration: float, concurrency: int, path: str) -> int:
+    """Send requests from `concurrency` clients for `duration` seconds."""
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+    completed = 0
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        async def worker() -> None:
+            nonlocal completed
+            while time.monotonic() < deadline:
+                response = await client.get(path)
+                if response.status_code == 200:
+                    completed += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return completed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/books/?page=1&limit=10")
+    parser.add_argument("--database", default=f"sqlite+aiosqlite:///{PACKAGE_ROOT / 'bench_workers.db'}")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    baseline = None
+
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8}")
+    for workers in args.workers:
+        server = start_server(workers, args.port, args.database)
+        try:
+            asyncio.run(wait_healthy(base_url))
+            completed = asyncio.run(run_load(base_url, args.duration, args.concurrency, args.path))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        rps = completed / args.duration
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:>10.1f} {rps / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
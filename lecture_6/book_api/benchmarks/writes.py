@@ -0,0 +1,69 @@
+"""Latency of the write services (create, update, delete) on a file database.
+
+Runs `create_book`, `update_book_in_db` and `remove_book` against a fresh
+SQLite file and prints the mean and p95 latency of each operation.
+
+Usage (from lecture_6/):
+    python -m book_api.benchmarks.writes --operations 2000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run(operations: int) -> dict[str, list[float]]:
+    """Execute `operations` create/update/delete cycles and collect latencies."""
+    from ..app.book.schemas import BookItemCreate, BookItemUpdate
+    from ..app.book.services import create_book, remove_book, update_book_in_db
+    from ..repository.database import async_session, dispose_engine
+    from ..repository.init_db import init_database
+
+    await init_database()
+    timings: dict[str, list[float]] = {"create": [], "update": [], "delete": []}
+
+    for i in range(operations):
+        async with async_session() as db:
+            started = time.perf_counter()
+            book = await create_book(db, BookItemCreate(title=f"Bench {i}", author="Bench Author", year=2000))
+            timings["create"].append(time.perf_counter() - started)
+
+        async with async_session() as db:
+            started = time.perf_counter()
+            await update_book_in_db(db, book.id, BookItemUpdate(year=2001))
+            timings["update"].append(time.perf_counter() - started)
+
+        async with async_session() as db:
+            started = time.perf_counter()
+            await remove_book(db, book.id)
+            timings["delete"].append(time.perf_counter() - started)
+
+    await dispose_engine()
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operations", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["BOOK_API_DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(directory) / 'bench_writes.db'}"
+        os.environ["BOOK_API_SQL_ECHO"] = "0"
+        timings = asyncio.run(run(args.operations))
+
+    print(f"{'operation':>10} {'mean ms':>9} {'p95 ms':>9}")
+    for name, samples in timings.items():
+        print(f"{name:>10} {statistics.mean(samples) * 1000:>9.3f} {_percentile(samples, 0.95) * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import hmac
+from fastapi import Header, HTTPException
+from . import config
+
+
+def is_admin_token(token: str) -> bool:
+    """True if `token` matches the configured `BOOK_API_ADMIN_TOKEN` (never when unset)."""
+    return bool(config.ADMIN_TOKEN) and hmac.compare_digest(token.encode(), config.ADMIN_TOKEN.encode())
+
+
+async def require_admin(x_admin_token: str = Header("", description="Value of BOOK_API_ADMIN_TOKEN")) -> None:
+    """Dependency guarding the diagnostics endpoints mounted under `/admin`.
+
+    Raises:
+        HTTPException: 403 if the token is missing, wrong or not configured.
+    """
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,195 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+from .metrics import metrics
+
+EXEMPT_PATHS = ("/healthcheck", "/metrics")
+STREAM_PATHS = ("/books/changes/stream", "/books/search/stream")
+"""Long-lived streaming responses: limited by `max_streams`, not by a route slot."""
+
+
+class _RouteGate:
+    """Concurrency limit and bounded wait queue of one route."""
+
+    def __init__(self, limit: int) -> None:
+        self.semaphore = asyncio.Semaphore(limit)
+        self.waiting = 0
+        self.active = 0
+
+
+class TokenBucket:
+    """Per-client token buckets: `rate` tokens per second, at most `burst` stored.
+
+    Only the most recently seen `max_clients` clients are remembered, so the
+    memory used by the limiter is bounded.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 10000) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, client: str) -> float:
+        """Take one token for `client`.
+
+        Returns:
+            float: 0 if the request may proceed, otherwise seconds until a token is available.
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        if tokens >= 1:
+            self._buckets[client] = (tokens - 1, now)
+            wait = 0.0
+        else:
+            self._buckets[client] = (tokens, now)
+            wait = (1 - tokens) / self.rate
+
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+        return wait
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware that sheds load instead of letting requests pile up.
+
+    - Per-client token-bucket rate limiting (disabled when `rate_limit` is 0):
+      a client without tokens gets **429** with `Retry-After`.
+    - Per-route concurrency limit: at most `max_concurrency` requests of a route
+      run at once (see `route_limits` for overrides by route path).
+    - Bounded wait queue: up to `queue_size` further requests of the route wait
+      at most `queue_timeout` seconds for a slot; beyond that the request is
+      rejected immediately with **503** and `Retry-After`.
+    - Streaming routes (`STREAM_PATHS`) stay open as long as the client
+      listens, so they do not take a route slot: at most `max_streams` of
+      them are open at once, and one more is rejected with **503** at once.
+
+    `/healthcheck` and `/metrics` are never limited. Counters
+    `admission.admitted`, `admission.rejected.queue_full`,
+    `admission.rejected.timeout`, `admission.rejected.streams` and
+    `admission.rate_limited`, and gauges `admission.active`,
+    `admission.waiting` and `admission.streams` are exported to `core.metrics`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrency: int = 32,
+        queue_size: int = 64,
+        queue_timeout: float = 2.0,
+        rate_limit: float = 0.0,
+        rate_burst: int = 100,
+        route_limits: Optional[Dict[str, int]] = None,
+        max_streams: int = 256,
+        stream_paths: Tuple[str, ...] = STREAM_PATHS,
+    ) -> None:
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.route_limits = route_limits or {}
+        self.buckets = TokenBucket(rate_limit, rate_burst) if rate_limit > 0 else None
+        self.max_streams = max_streams
+        self.stream_paths = stream_paths
+        self.streams = 0
+        self._gates: Dict[str, _RouteGate] = {}
+
+        metrics.gauge("admission.active", lambda: sum(gate.active for gate in self._gates.values()))
+        metrics.gauge("admission.waiting", lambda: sum(gate.waiting for gate in self._gates.values()))
+        metrics.gauge("admission.streams", lambda: self.streams)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if self.buckets is not None:
+            client = scope.get("client")
+            retry_after = self.buckets.take(client[0] if client else "unknown")
+            if retry_after:
+                metrics.inc("admission.rate_limited")
+                await self._reject(scope, receive, send, 429, "Rate limit exceeded", retry_after)
+                return
+
+        if scope["path"] in self.stream_paths:
+            await self._stream(scope, receive, send)
+            return
+
+        gate = self._gate(scope)
+
+        if gate.semaphore.locked():
+            if gate.waiting >= self.queue_size:
+                metrics.inc("admission.rejected.queue_full")
+                await self._reject(scope, receive, send, 503, "Server is overloaded", self.queue_timeout)
+                return
+
+            gate.waiting += 1
+            try:
+                await asyncio.wait_for(gate.semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                metrics.inc("admission.rejected.timeout")
+                await self._reject(scope, receive, send, 503, "Server is overloaded", self.queue_timeout)
+                return
+            finally:
+                gate.waiting -= 1
+        else:
+            await gate.semaphore.acquire()
+
+        metrics.inc("admission.admitted")
+        gate.active += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.active -= 1
+            gate.semaphore.release()
+
+    async def _stream(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run a streaming request under the open-stream limit instead of a route slot."""
+        if self.streams >= self.max_streams:
+            metrics.inc("admission.rejected.streams")
+            await self._reject(scope, receive, send, 503, "Too many open streams", self.queue_timeout)
+            return
+
+        metrics.inc("admission.admitted")
+        self.streams += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.streams -= 1
+
+    def _gate(self, scope: Scope) -> _RouteGate:
+        """Return the gate of the route matching the request (by route path template)."""
+        route_path = scope["path"]
+        router = getattr(scope.get("app"), "router", None)
+
+        for route in getattr(router, "routes", ()):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                route_path = route.path
+                break
+
+        key = f'{scope["method"]} {route_path}'
+        gate = self._gates.get(key)
+        if gate is None:
+            limit = self.route_limits.get(route_path, self.max_concurrency)
+            gate = self._gates[key] = _RouteGate(limit)
+        return gate
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send,
+                      status_code: int, detail: str, retry_after: float) -> None:
+        """Send a fast error response with a `Retry-After` header (whole seconds)."""
+        response = JSONResponse(
+            {"detail": detail},
+            status_code=status_code,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        await response(scope, receive, send)
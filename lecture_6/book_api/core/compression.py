@@ -0,0 +1,208 @@
+import zlib
+from typing import Callable, Dict, Optional
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .metrics import metrics
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript",
+                      "application/msgpack", "application/vnd.book-api.columns+msgpack")
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)  # long-lived streams must not be buffered
+
+
+class _Gzip:
+    """Streaming gzip encoder."""
+
+    def __init__(self) -> None:
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    """Streaming brotli encoder (requires the `brotli` package)."""
+
+    def __init__(self) -> None:
+        self._compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Zstd:
+    """Streaming zstd encoder (requires the `zstandard` package)."""
+
+    def __init__(self) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encoders() -> Dict[str, Callable]:
+    """Return the encoders usable in this environment, most preferred first."""
+    encoders: Dict[str, Callable] = {}
+    if zstandard is not None:
+        encoders["zstd"] = _Zstd
+    if brotli is not None:
+        encoders["br"] = _Brotli
+    encoders["gzip"] = _Gzip
+    return encoders
+
+
+def choose_encoding(accept_encoding: str, encoders: Dict[str, Callable]) -> Optional[str]:
+    """Pick the best encoding offered by the client (honouring `q=0`).
+
+    Args:
+        accept_encoding (str): Value of the `Accept-Encoding` request header.
+        encoders: Available encoders, most preferred first.
+
+    Returns:
+        str | None: Chosen encoding name, or None to send the body as is.
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for name in encoders:
+        if accepted.get(name, accepted.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+class CompressionMiddleware:
+    """Negotiated response compression (zstd, brotli when installed, gzip).
+
+    - Bodies smaller than `minimum_size` are sent uncompressed: the CPU cost
+      and framing overhead are not worth it.
+    - Complete bodies of `offload_size` bytes or more are compressed in a
+      worker thread so the event loop keeps serving other requests.
+    - Streaming responses are compressed chunk by chunk; every chunk is
+      flushed so clients receive data as it is produced.
+
+    Only textual content types are compressed. Counters
+    `compression.<encoding>.bytes_in` / `bytes_out` go to `core.metrics`.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, offload_size: int = 256 * 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.encoders = available_encoders()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encoders)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    """Per-response state machine wrapping the ASGI `send` callable."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+                or content_type.startswith(UNCOMPRESSIBLE_TYPES)
+            )
+            return
+
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start is not None:
+            start, self.start = self.start, None
+
+            if self.passthrough or (not more_body and len(body) < self.middleware.minimum_size):
+                await self.downstream(start)
+                await self.downstream(message)
+                self.passthrough = True
+                return
+
+            self.encoder = self.middleware.encoders[self.encoding]()
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                compressed = await self._encode(body, final=True)
+                headers["Content-Length"] = str(len(compressed))
+                await self.downstream(start)
+                await self.downstream({"type": "http.response.body", "body": compressed})
+                return
+
+            del headers["Content-Length"]
+            await self.downstream(start)
+
+        if self.passthrough:
+            await self.downstream(message)
+            return
+
+        compressed = await self._encode(body, final=not more_body)
+        await self.downstream({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    async def _encode(self, body: bytes, final: bool) -> bytes:
+        """Compress `body` (in a worker thread if it is large)."""
+        def run() -> bytes:
+            data = self.encoder.compress(body) if body else b""
+            return data + self.encoder.finish() if final else data
+
+        if len(body) >= self.middleware.offload_size:
+            compressed = await anyio.to_thread.run_sync(run)
+        else:
+            compressed = run()
+
+        metrics.inc(f"compression.{self.encoding}.bytes_in", len(body))
+        metrics.inc(f"compression.{self.encoding}.bytes_out", len(compressed))
+        return compressed
@@ -0,0 +1,59 @@
+import os
+from pathlib import Path
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean flag from the environment ("1", "true", "yes" are true)."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+REPOSITORY_DIR = Path(__file__).resolve().parent.parent / "repository"
+
+DB_BOOK = os.getenv("BOOK_API_DB_FILE", "DB.db")
+DATABASE_URL = os.getenv("BOOK_API_DATABASE_URL", f"sqlite+aiosqlite:///{REPOSITORY_DIR / DB_BOOK}")
+SQL_ECHO = _env_bool("BOOK_API_SQL_ECHO", True)
+
+HOST = os.getenv("BOOK_API_HOST", "0.0.0.0")
+PORT = int(os.getenv("BOOK_API_PORT", "8000"))
+WORKERS = int(os.getenv("BOOK_API_WORKERS", "1"))
+
+PROFILE_STARTUP = _env_bool("BOOK_API_PROFILE_STARTUP", False)
+
+SHARDS = int(os.getenv("BOOK_API_SHARDS", "0"))
+SHARD_DIR = Path(os.getenv("BOOK_API_SHARD_DIR", str(REPOSITORY_DIR)))
+SHARD_MAX_OFFSET = int(os.getenv("BOOK_API_SHARD_MAX_OFFSET", "10000"))
+
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("BOOK_API_MAX_CONCURRENCY", "32"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("BOOK_API_QUEUE_SIZE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("BOOK_API_QUEUE_TIMEOUT", "2.0"))
+ADMISSION_MAX_STREAMS = int(os.getenv("BOOK_API_MAX_STREAMS", "256"))
+RATE_LIMIT_PER_SECOND = float(os.getenv("BOOK_API_RATE_LIMIT", "0"))
+RATE_LIMIT_BURST = int(os.getenv("BOOK_API_RATE_BURST", "100"))
+
+COMPRESSION_MIN_SIZE = int(os.getenv("BOOK_API_COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_OFFLOAD_SIZE = int(os.getenv("BOOK_API_COMPRESSION_OFFLOAD_SIZE", str(256 * 1024)))
+
+JOB_WORKERS = int(os.getenv("BOOK_API_JOB_WORKERS", "2"))
+JOB_STALE_AFTER = float(os.getenv("BOOK_API_JOB_STALE_AFTER", "60"))
+EXPORT_DIR = Path(os.getenv("BOOK_API_EXPORT_DIR", str(REPOSITORY_DIR / "exports")))
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("BOOK_API_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+RETRY_ATTEMPTS = int(os.getenv("BOOK_API_RETRY_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = float(os.getenv("BOOK_API_RETRY_BASE_DELAY", "0.02"))
+RETRY_MAX_DELAY = float(os.getenv("BOOK_API_RETRY_MAX_DELAY", "1.0"))
+RETRY_DEADLINE = float(os.getenv("BOOK_API_RETRY_DEADLINE", "10.0"))
+
+ADMIN_TOKEN = os.getenv("BOOK_API_ADMIN_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("BOOK_API_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("BOOK_API_PROFILE_DIR", str(REPOSITORY_DIR / "profiles")))
+PROFILE_KEEP = int(os.getenv("BOOK_API_PROFILE_KEEP", "50"))
+
+LOOP_LAG_INTERVAL = float(os.getenv("BOOK_API_LOOP_LAG_INTERVAL", "0.1"))
+LOOP_LAG_WINDOW = int(os.getenv("BOOK_API_LOOP_LAG_WINDOW", "600"))
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("BOOK_API_LOOP_BLOCK_THRESHOLD_MS", "0"))
+
+QUERY_TIMEOUT = float(os.getenv("BOOK_API_QUERY_TIMEOUT", "5.0"))
+SEARCH_QUERY_TIMEOUT = float(os.getenv("BOOK_API_SEARCH_QUERY_TIMEOUT", "2.0"))
@@ -0,0 +1,224 @@
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import msgpack
+except ImportError:  # optional dependency; the pure-Python codec below is used instead
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+COLUMNS = "application/vnd.book-api.columns+msgpack"
+MSGPACK_ALIASES = {"application/msgpack": MSGPACK, "application/x-msgpack": MSGPACK,
+                   "application/vnd.msgpack": MSGPACK, COLUMNS: COLUMNS, JSON: JSON}
+
+
+def negotiate(accept: Optional[str], offered: Sequence[str]) -> str:
+    """Pick the response media type for an `Accept` header.
+
+    Args:
+        accept (str | None): Value of the `Accept` request header.
+        offered: Media types the route can produce, default (JSON) first.
+
+    Returns:
+        str: The offered type with the highest quality; the default when the
+        header is missing, says `*/*` or names nothing we produce.
+    """
+    if not accept:
+        return offered[0]
+
+    best, best_quality = offered[0], 0.0
+    for part in accept.split(","):
+        name, _, params = part.strip().partition(";")
+        media_type = MSGPACK_ALIASES.get(name.strip().lower())
+        if media_type not in offered:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            if param.strip().startswith("q="):
+                try:
+                    quality = float(param.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+def to_columns(rows: Iterable[Any], fields: Sequence[str]) -> Dict[str, list]:
+    """Columnar layout of `rows`: one array per field instead of one map per row.
+
+    Rows may be dicts or objects with the fields as attributes (ORM rows,
+    Pydantic models).
+    """
+    rows = list(rows)
+    if rows and isinstance(rows[0], dict):
+        return {field: [row[field] for row in rows] for field in fields}
+    return {field: [getattr(row, field) for row in rows] for field in fields}
+
+
+_pack_uint8 = struct.Struct(">BB").pack
+_pack_uint16 = struct.Struct(">BH").pack
+_pack_uint32 = struct.Struct(">BI").pack
+_pack_uint64 = struct.Struct(">BQ").pack
+_pack_int8 = struct.Struct(">Bb").pack
+_pack_int16 = struct.Struct(">Bh").pack
+_pack_int32 = struct.Struct(">Bi").pack
+_pack_int64 = struct.Struct(">Bq").pack
+_pack_float = struct.Struct(">Bd").pack
+
+
+def _header(size: int, fix_base: int, fix_limit: int, codes: Tuple[int, int, int]) -> bytes:
+    """Length prefix of a str/bin/array/map (`codes`: 8-, 16- and 32-bit forms; 0 if absent)."""
+    if size < fix_limit:
+        return bytes((fix_base | size,))
+    if size < 0x100 and codes[0]:
+        return _pack_uint8(codes[0], size)
+    if size < 0x10000:
+        return _pack_uint16(codes[1], size)
+    return _pack_uint32(codes[2], size)
+
+
+def _pack_int(value: int) -> bytes:
+    if 0 <= value < 0x80:
+        return bytes((value,))
+    if -0x20 <= value < 0:
+        return bytes((value & 0xFF,))
+    if value >= 0:
+        if value < 0x100:
+            return _pack_uint8(0xCC, value)
+        if value < 0x10000:
+            return _pack_uint16(0xCD, value)
+        if value < 0x100000000:
+            return _pack_uint32(0xCE, value)
+        return _pack_uint64(0xCF, value)
+    if value >= -0x80:
+        return _pack_int8(0xD0, value)
+    if value >= -0x8000:
+        return _pack_int16(0xD1, value)
+    if value >= -0x80000000:
+        return _pack_int32(0xD2, value)
+    return _pack_int64(0xD3, value)
+
+
+def _pack_into(value: Any, out: List[bytes]) -> None:
+    kind = type(value)
+    if kind is str:
+        data = value.encode("utf-8")
+        out.append(_header(len(data), 0xA0, 32, (0xD9, 0xDA, 0xDB)))
+        out.append(data)
+    elif kind is int:
+        out.append(_pack_int(value))
+    elif value is None:
+        out.append(b"\xc0")
+    elif kind is bool:
+        out.append(b"\xc3" if value else b"\xc2")
+    elif kind is float:
+        out.append(_pack_float(0xCB, value))
+    elif kind is dict:
+        out.append(_header(len(value), 0x80, 16, (0, 0xDE, 0xDF)))
+        for key, item in value.items():
+            _pack_into(key, out)
+            _pack_into(item, out)
+    elif kind is list or kind is tuple:
+        out.append(_header(len(value), 0x90, 16, (0, 0xDC, 0xDD)))
+        for item in value:
+            _pack_into(item, out)
+    elif kind is bytes:
+        out.append(_header(len(value), 0, 0, (0xC4, 0xC5, 0xC6)))
+        out.append(value)
+    else:
+        raise TypeError(f"Cannot encode {kind.__name__} as MessagePack")
+
+
+def pack(value: Any) -> bytes:
+    """MessagePack encoding of JSON-like data (dict, list, str, int, float, bool, None, bytes).
+
+    Uses the `msgpack` package when installed, a pure-Python encoder otherwise.
+    """
+    if msgpack is not None:
+        return msgpack.packb(value, use_bin_type=True)
+    out: List[bytes] = []
+    _pack_into(value, out)
+    return b"".join(out)
+
+
+def _unpack_at(data: bytes, offset: int) -> Tuple[Any, int]:
+    code = data[offset]
+    offset += 1
+    if code < 0x80:
+        return code, offset
+    if code >= 0xE0:
+        return code - 0x100, offset
+    if 0xA0 <= code <= 0xBF:
+        end = offset + (code & 0x1F)
+        return data[offset:end].decode("utf-8"), end
+    if 0x90 <= code <= 0x9F:
+        return _unpack_array(data, offset, code & 0x0F)
+    if 0x80 <= code <= 0x8F:
+        return _unpack_map(data, offset, code & 0x0F)
+    if code == 0xC0:
+        return None, offset
+    if code in (0xC2, 0xC3):
+        return code == 0xC3, offset
+    if code in _FIXED:
+        layout = _FIXED[code]
+        return layout.unpack_from(data, offset)[0], offset + layout.size
+    if code in _SIZED:
+        layout, kind = _SIZED[code]
+        size = layout.unpack_from(data, offset)[0]
+        offset += layout.size
+        if kind == "str":
+            return data[offset:offset + size].decode("utf-8"), offset + size
+        if kind == "bin":
+            return bytes(data[offset:offset + size]), offset + size
+        if kind == "array":
+            return _unpack_array(data, offset, size)
+        return _unpack_map(data, offset, size)
+    raise ValueError(f"Unsupported MessagePack type 0x{code:02x}")
+
+
+def _unpack_array(data: bytes, offset: int, size: int) -> Tuple[list, int]:
+    items = []
+    for _ in range(size):
+        item, offset = _unpack_at(data, offset)
+        items.append(item)
+    return items, offset
+
+
+def _unpack_map(data: bytes, offset: int, size: int) -> Tuple[dict, int]:
+    items = {}
+    for _ in range(size):
+        key, offset = _unpack_at(data, offset)
+        items[key], offset = _unpack_at(data, offset)
+    return items, offset
+
+
+_FIXED = {0xCA: struct.Struct(">f"), 0xCB: struct.Struct(">d"),
+          0xCC: struct.Struct(">B"), 0xCD: struct.Struct(">H"), 0xCE: struct.Struct(">I"), 0xCF: struct.Struct(">Q"),
+          0xD0: struct.Struct(">b"), 0xD1: struct.Struct(">h"), 0xD2: struct.Struct(">i"), 0xD3: struct.Struct(">q")}
+_SIZED = {0xD9: (struct.Struct(">B"), "str"), 0xDA: (struct.Struct(">H"), "str"), 0xDB: (struct.Struct(">I"), "str"),
+          0xC4: (struct.Struct(">B"), "bin"), 0xC5: (struct.Struct(">H"), "bin"), 0xC6: (struct.Struct(">I"), "bin"),
+          0xDC: (struct.Struct(">H"), "array"), 0xDD: (struct.Struct(">I"), "array"),
+          0xDE: (struct.Struct(">H"), "map"), 0xDF: (struct.Struct(">I"), "map")}
+
+
+def unpack_all(data: bytes) -> List[Any]:
+    """Decode a sequence of concatenated MessagePack values (a whole body or stream)."""
+    if msgpack is not None:
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(data)
+        return list(unpacker)
+    values, offset = [], 0
+    while offset < len(data):
+        value, offset = _unpack_at(data, offset)
+        values.append(value)
+    return values
+
+
+def unpack(data: bytes) -> Any:
+    """Decode a single MessagePack value."""
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False)
+    value, _ = _unpack_at(data, 0)
+    return value
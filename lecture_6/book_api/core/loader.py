@@ -0,0 +1,99 @@
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Set, TypeVar
+from .metrics import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """DataLoader-style micro-batching of point lookups.
+
+    `load(key)` does not query immediately: keys requested on the event loop
+    within `window` seconds (or until `max_batch_size` keys are pending) are
+    resolved together by one call of `batch_fn(keys)`, and every waiter gets
+    its own value back. Missing keys resolve to None; an exception of the
+    batch function is raised in every waiter of that batch.
+
+    The batch runs in its own task with an empty context: it serves many
+    requests, so the statement deadline or the disconnect of whichever
+    request happened to start it (`core.query_guard.current_scope`) must not
+    abort it for the others.
+
+    Counters `loader.<name>.batches` and `loader.<name>.keys` are published
+    to `core.metrics`; their ratio is the average batch size.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]],
+        window: float = 0.002,
+        max_batch_size: int = 100,
+    ) -> None:
+        self.name = name
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[K, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> Optional[V]:
+        """Queue `key` for the next batch and wait for its value.
+
+        Args:
+            key (K): Key to resolve.
+
+        Returns:
+            V | None: Value returned by the batch function for `key`, or None.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = {}
+            self._timer = None
+            self._tasks = set()
+
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._dispatch)
+
+        return await future
+
+    def _dispatch(self) -> None:
+        """Hand the pending keys over to a batch task and start a new batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = self._loop.create_task(self._resolve(batch), context=contextvars.Context())
+            self._tasks.add(task)  # the loop keeps only weak references to tasks
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch: Dict[K, List[asyncio.Future]]) -> None:
+        """Run the batch function once and distribute its result to the waiters."""
+        metrics.inc(f"loader.{self.name}.batches")
+        metrics.inc(f"loader.{self.name}.keys", len(batch))
+
+        try:
+            values = await self.batch_fn(list(batch))
+        except Exception as error:  # noqa: BLE001 - not swallowed: raised in every waiter
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+            return
+
+        for key, futures in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(values.get(key))
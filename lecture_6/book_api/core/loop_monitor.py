@@ -0,0 +1,173 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import List, Optional
+from fastapi import APIRouter, Query
+from . import config
+from .metrics import metrics
+from .utils import logger
+
+MAX_EVENTS = 20
+STACK_DEPTH = 25
+PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of `samples` (0 for no samples)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class LoopMonitor:
+    """Event loop lag sampler with an optional blocking-call detector.
+
+    A task sleeps `interval` seconds in a loop and records by how much it
+    wakes up late; the last `window` lags are exported as the
+    `loop.lag.p50_ms` / `p90_ms` / `p99_ms` / `max_ms` gauges. Lag is what
+    every request on the loop waits on top of its own work.
+
+    With `block_threshold` (seconds) above 0 a watchdog thread checks the
+    sampler's heartbeat. When the sampler is overdue by more than the
+    threshold, the loop thread is stuck in one callback; the watchdog then
+    captures the stack the loop thread is executing (`sys._current_frames`),
+    counts `loop.blocked` and logs a warning. The sampler completes the event
+    with the total lag once the loop is free again. The watchdog costs a
+    thread wake-up every `block_threshold / 2`, so it is meant for debugging.
+    """
+
+    def __init__(self, interval: float, window: int, block_threshold: float = 0.0) -> None:
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self._samples: deque = deque(maxlen=window)
+        self._events: deque = deque(maxlen=MAX_EVENTS)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop_thread: Optional[int] = None
+        self._beat: Optional[float] = None
+        self._reported_beat: Optional[float] = None
+        self._open_event: Optional[dict] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._watchdog_stop = threading.Event()
+
+        for name, fraction in PERCENTILES:
+            metrics.gauge(f"loop.lag.{name}_ms",
+                          lambda fraction=fraction: round(percentile(list(self._samples), fraction) * 1000, 3))
+
+    def start(self) -> None:
+        """Start sampling on the running loop, and the watchdog if enabled (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop and self._task is not None:
+            return
+
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._samples.clear()
+        self._beat = None
+        self._task = loop.create_task(self._sample())
+        self.set_block_threshold(self.block_threshold)
+
+    async def stop(self) -> None:
+        """Stop the sampler and the watchdog."""
+        self._stop_watchdog()
+        task, self._task = self._task, None
+        self._beat = None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def set_block_threshold(self, seconds: float) -> None:
+        """Enable (seconds > 0) or disable (0) the blocking-call detector."""
+        self.block_threshold = seconds
+        self._stop_watchdog()
+        if seconds > 0 and self._task is not None:
+            self._watchdog_stop = threading.Event()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def stats(self) -> dict:
+        """Lag percentiles over the window and the latest blocking events."""
+        samples = list(self._samples)
+        with self._lock:
+            events = list(self._events)
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": len(samples),
+            "lag_ms": {name: round(percentile(samples, fraction) * 1000, 3)
+                       for name, fraction in PERCENTILES},
+            "block_threshold_ms": self.block_threshold * 1000,
+            "blocked": metrics.get("loop.blocked"),
+            "events": events,
+        }
+
+    async def _sample(self) -> None:
+        """Measure how late `asyncio.sleep(interval)` returns."""
+        while True:
+            started = time.monotonic()
+            self._beat = started
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - started - self.interval)
+            self._samples.append(lag)
+
+            with self._lock:
+                event, self._open_event = self._open_event, None
+            if event is not None:
+                event["lag_ms"] = round(lag * 1000, 3)
+
+    def _stop_watchdog(self) -> None:
+        self._watchdog_stop.set()
+        if self._watchdog is not None and self._watchdog is not threading.current_thread():
+            self._watchdog.join()
+        self._watchdog = None
+
+    def _watch(self) -> None:
+        """Watchdog thread: capture the loop thread's stack when the sampler is overdue."""
+        stop = self._watchdog_stop
+        while not stop.wait(self.block_threshold / 2):
+            beat = self._beat
+            if beat is None or beat == self._reported_beat:
+                continue
+
+            overdue = time.monotonic() - beat - self.interval
+            if overdue <= self.block_threshold:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)[-STACK_DEPTH:]) if frame is not None else ""
+            event = {"detected_at": time.time(), "blocked_ms": round(overdue * 1000, 3), "lag_ms": None,
+                     "stack": stack}
+            with self._lock:
+                self._events.append(event)
+                self._open_event = event
+            self._reported_beat = beat
+
+            metrics.inc("loop.blocked")
+            logger.warning("Event loop blocked for over %.0f ms in:\n%s", overdue * 1000, stack)
+
+
+loop_monitor = LoopMonitor(config.LOOP_LAG_INTERVAL, config.LOOP_LAG_WINDOW,
+                           config.LOOP_BLOCK_THRESHOLD_MS / 1000)
+"""Process-wide monitor; started in the application lifespan."""
+
+router = APIRouter()
+"""Loop monitor endpoints, mounted under `/admin` in `main.py`."""
+
+
+@router.get("/loop", summary="Event loop lag and blocking calls")
+async def loop_stats() -> dict:
+    """Return lag percentiles and the latest blocking events with their stacks."""
+    return loop_monitor.stats()
+
+
+@router.post("/loop/debug", summary="Configure the blocking-call detector")
+async def loop_debug(
+    threshold_ms: float = Query(..., ge=0, description="Report callbacks blocking longer than this; 0 disables"),
+) -> dict:
+    """Enable, retune or disable the blocking-call detector at runtime."""
+    loop_monitor.set_block_threshold(threshold_ms / 1000)
+    return loop_monitor.stats()
@@ -0,0 +1,195 @@
+import asyncio
+import functools
+import tracemalloc
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Query
+from .metrics import metrics
+
+try:
+    import resource
+except ImportError:  # Windows: no max RSS in the status
+    resource = None
+
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+OTHER = "<other>"
+MAX_SNAPSHOTS = 5
+
+
+@functools.lru_cache(maxsize=4096)
+def own_module(filename: str) -> Optional[str]:
+    """Dotted module name of `filename` relative to this package, or None."""
+    path = Path(filename)
+    if not path.is_relative_to(PACKAGE_ROOT):
+        return None
+    return ".".join(path.relative_to(PACKAGE_ROOT).with_suffix("").parts)
+
+
+def own_location(traceback: tracemalloc.Traceback, by_line: bool) -> str:
+    """Name the most recent frame of `traceback` that lies in this package.
+
+    An allocation made inside SQLAlchemy or Pydantic on behalf of, say,
+    `app/book/services.py` is attributed to `app.book.services` (or
+    `app.book.services:<line>`); allocations that never pass through our
+    code are grouped as `<other>`.
+    """
+    for frame in reversed(traceback):
+        module = own_module(frame.filename)
+        if module is not None:
+            return f"{module}:{frame.lineno}" if by_line else module
+    return OTHER
+
+
+def group_snapshot(snapshot: tracemalloc.Snapshot, by_line: bool) -> Dict[str, Tuple[int, int]]:
+    """Total size and number of live blocks per own module (or module line)."""
+    groups: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    for trace in snapshot.traces:
+        group = groups[own_location(trace.traceback, by_line)]
+        group[0] += trace.size
+        group[1] += 1
+    return {location: (size, count) for location, (size, count) in groups.items()}
+
+
+class MemoryDiagnostics:
+    """tracemalloc control with a small set of named snapshots.
+
+    Tracing is off until `start()`: while on, every allocation is slower
+    and takes extra memory for its traceback, so it is meant to be switched
+    on for the time of an investigation. At most `MAX_SNAPSHOTS` snapshots
+    are kept, the oldest is dropped first.
+    """
+
+    def __init__(self) -> None:
+        self._snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+
+    def start(self, frames: int) -> None:
+        """Start tracing with `frames` frames per allocation traceback."""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        """Stop tracing; the stored snapshots are kept."""
+        tracemalloc.stop()
+
+    def status(self) -> dict:
+        """Tracing state, traced and peak memory, process max RSS and snapshot names."""
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "frames": tracemalloc.get_traceback_limit(),
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+            "snapshots": list(self._snapshots),
+        }
+
+    def take(self, name: str) -> dict:
+        """Store a snapshot of the traced allocations under `name`."""
+        if not tracemalloc.is_tracing():
+            raise HTTPException(status_code=409, detail="tracemalloc is not running")
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ))
+        self._snapshots.pop(name, None)
+        self._snapshots[name] = snapshot
+        while len(self._snapshots) > MAX_SNAPSHOTS:
+            self._snapshots.popitem(last=False)
+
+        metrics.inc("memory.snapshots")
+        return {"name": name, "traces": len(snapshot.traces),
+                "size_bytes": sum(trace.size for trace in snapshot.traces)}
+
+    def drop(self, name: str) -> None:
+        """Forget snapshot `name`."""
+        self._get(name)
+        del self._snapshots[name]
+
+    def top(self, name: str, by_line: bool, limit: int) -> List[dict]:
+        """Largest allocation sites of snapshot `name`."""
+        groups = group_snapshot(self._get(name), by_line)
+        ranked = sorted(groups.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        return [{"location": location, "size_bytes": size, "count": count} for location, (size, count) in ranked]
+
+    def diff(self, base: str, target: str, by_line: bool, limit: int) -> List[dict]:
+        """Growth per allocation site from snapshot `base` to `target`, largest change first."""
+        before = group_snapshot(self._get(base), by_line)
+        after = group_snapshot(self._get(target), by_line)
+
+        rows = []
+        for location in before.keys() | after.keys():
+            size_before, count_before = before.get(location, (0, 0))
+            size_after, count_after = after.get(location, (0, 0))
+            if size_after != size_before or count_after != count_before:
+                rows.append({"location": location, "size_bytes": size_after,
+                             "size_diff_bytes": size_after - size_before,
+                             "count": count_after, "count_diff": count_after - count_before})
+
+        rows.sort(key=lambda row: abs(row["size_diff_bytes"]), reverse=True)
+        return rows[:limit]
+
+    def _get(self, name: str) -> tracemalloc.Snapshot:
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            raise HTTPException(status_code=404, detail=f"Snapshot {name!r} not found")
+        return snapshot
+
+
+memory_diagnostics = MemoryDiagnostics()
+
+router = APIRouter()
+"""Memory diagnostics endpoints, mounted under `/admin` in `main.py`."""
+
+GROUP = Query("module", pattern="^(module|line)$", description="Group by own `module` or `module:line`")
+
+
+@router.get("/memory", summary="tracemalloc status")
+async def memory_status() -> dict:
+    """Return whether tracing is on, traced memory and the stored snapshots."""
+    return memory_diagnostics.status()
+
+
+@router.post("/memory/start", summary="Start tracemalloc")
+async def memory_start(frames: int = Query(25, ge=1, le=100, description="Frames per traceback")) -> dict:
+    """Start (or restart) allocation tracing."""
+    memory_diagnostics.start(frames)
+    return memory_diagnostics.status()
+
+
+@router.post("/memory/stop", summary="Stop tracemalloc")
+async def memory_stop() -> dict:
+    """Stop allocation tracing."""
+    memory_diagnostics.stop()
+    return memory_diagnostics.status()
+
+
+@router.post("/memory/snapshots/{name}", summary="Take a named snapshot")
+async def memory_take_snapshot(name: str) -> dict:
+    """Take a snapshot of the traced allocations (in a worker thread)."""
+    return await asyncio.to_thread(memory_diagnostics.take, name)
+
+
+@router.delete("/memory/snapshots/{name}", summary="Delete a snapshot")
+async def memory_drop_snapshot(name: str) -> dict:
+    """Forget a stored snapshot."""
+    memory_diagnostics.drop(name)
+    return memory_diagnostics.status()
+
+
+@router.get("/memory/snapshots/{name}/top", summary="Top allocation sites of a snapshot")
+async def memory_top(name: str, group: str = GROUP, limit: int = Query(20, ge=1, le=200)) -> List[dict]:
+    """Largest allocation sites of a snapshot, attributed to our own modules."""
+    return await asyncio.to_thread(memory_diagnostics.top, name, group == "line", limit)
+
+
+@router.get("/memory/diff", summary="Allocation growth between two snapshots")
+async def memory_diff(
+    base: str = Query(..., description="Earlier snapshot"),
+    target: str = Query(..., description="Later snapshot"),
+    group: str = GROUP,
+    limit: int = Query(20, ge=1, le=200),
+) -> List[dict]:
+    """Allocation sites whose size or block count changed between `base` and `target`."""
+    return await asyncio.to_thread(memory_diagnostics.diff, base, target, group == "line", limit)
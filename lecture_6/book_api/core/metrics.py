@@ -0,0 +1,43 @@
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Union
+
+Number = Union[int, float]
+
+
+class Metrics:
+    """Process-wide registry of named counters and gauges for monitoring.
+
+    Counters only grow (`inc`); gauges are sampled on demand by callbacks
+    registered with `gauge`, so hot paths pay a single dict update.
+    The registry is exposed by the `/metrics` endpoint in `main.py`.
+    """
+
+    def __init__(self) -> None:
+        self._counters: Dict[str, Number] = defaultdict(int)
+        self._gauges: Dict[str, Callable[[], Number]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: Number = 1) -> None:
+        """Increase counter `name` by `value`."""
+        with self._lock:
+            self._counters[name] += value
+
+    def gauge(self, name: str, read: Callable[[], Number]) -> None:
+        """Register a callback returning the current value of gauge `name`."""
+        self._gauges[name] = read
+
+    def get(self, name: str) -> Number:
+        """Return the current value of counter `name` (0 if never increased)."""
+        return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, Number]:
+        """Return all counters and gauges as a flat, sorted dict."""
+        with self._lock:
+            values = dict(self._counters)
+        for name, read in self._gauges.items():
+            values[name] = read()
+        return dict(sorted(values.items()))
+
+
+metrics = Metrics()
@@ -0,0 +1,185 @@
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from . import config
+from .admin import is_admin_token
+from .metrics import metrics
+from .utils import logger
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+_PROFILE_ID = re.compile(r"^[0-9]+-[0-9]+$")
+
+
+class ProfileStore:
+    """Bounded on-disk ring of request profiles.
+
+    Every profile is a `<id>.prof` file (pstats format) plus `<id>.json`
+    with the request line and duration. Ids start with a nanosecond time
+    stamp, so they sort by age; after each save only the newest `keep`
+    profiles remain. Several worker processes may share the directory.
+    """
+
+    def __init__(self, directory: Path, keep: int) -> None:
+        self.directory = directory
+        self.keep = keep
+
+    @staticmethod
+    def new_id() -> str:
+        """A fresh profile id: nanosecond time stamp and process id."""
+        return f"{time.time_ns()}-{os.getpid()}"
+
+    def save(self, profile_id: str, profile: cProfile.Profile, meta: dict) -> None:
+        """Write a profile and its metadata, then trim the ring to `keep` profiles."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(self.directory / f"{profile_id}.prof")
+        (self.directory / f"{profile_id}.json").write_text(json.dumps({"id": profile_id, **meta}))
+
+        ids = self.ids()
+        for stale in ids[:max(0, len(ids) - self.keep)]:
+            for suffix in (".prof", ".json"):
+                (self.directory / f"{stale}{suffix}").unlink(missing_ok=True)
+
+    def ids(self) -> List[str]:
+        """Ids of the stored profiles, oldest first."""
+        if not self.directory.exists():
+            return []
+        return sorted(
+            (path.stem for path in self.directory.glob("*.prof")),
+            key=lambda profile_id: tuple(int(part) for part in profile_id.split("-")),
+        )
+
+    def path(self, profile_id: str) -> Optional[Path]:
+        """Path of the pstats file of `profile_id`, or None if it is not stored."""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.prof"
+        return path if path.exists() else None
+
+    def meta(self, profile_id: str) -> Optional[dict]:
+        """Metadata of `profile_id`, or None."""
+        try:
+            return json.loads((self.directory / f"{profile_id}.json").read_text())
+        except (OSError, ValueError):
+            return None
+
+
+profile_store = ProfileStore(config.PROFILE_DIR, config.PROFILE_KEEP)
+
+
+class ProfilingMiddleware:
+    """Opt-in cProfile of single requests.
+
+    A request is profiled when it carries `X-Profile: <BOOK_API_ADMIN_TOKEN>`
+    or is picked by `sample_rate` (0..1). The profile covers the handler and
+    everything below this middleware, is saved to `profile_store` off the
+    event loop, and its id is returned in the `X-Profile-Id` header.
+
+    cProfile traces the whole thread, so coroutines of other requests that
+    run meanwhile appear in the profile too; only one request per process
+    is profiled at a time (concurrent candidates run unprofiled). The profile
+    is written after the response has been sent.
+
+    Without a configured admin token and with `sample_rate=0` an unprofiled
+    request costs two attribute checks; headers are only parsed when a
+    token is configured.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 0.0, store: ProfileStore = profile_store) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.store = store
+        self._busy = threading.Lock()
+
+    def _wanted(self, scope: Scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if config.ADMIN_TOKEN:
+            token = Headers(scope=scope).get(PROFILE_HEADER)
+            return token is not None and is_admin_token(token)
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._busy.release()
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request under cProfile and store the result."""
+        profile = cProfile.Profile()
+        profile_id = self.store.new_id()
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = profile_id
+            await send(message)
+
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.disable()
+            meta = {"method": scope["method"], "path": scope["path"],
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3), "created": time.time()}
+            try:
+                await asyncio.to_thread(self.store.save, profile_id, profile, meta)
+                metrics.inc("profiling.saved")
+            except OSError as error:
+                logger.error(f"Could not save request profile: {error}")
+
+
+router = APIRouter()
+"""Profile retrieval endpoints, mounted under `/admin` in `main.py`."""
+
+
+@router.get("/profiles", summary="List stored request profiles")
+async def list_profiles() -> List[dict]:
+    """Return the metadata of stored profiles, newest first."""
+    return [meta for meta in map(profile_store.meta, reversed(profile_store.ids())) if meta is not None]
+
+
+@router.get("/profiles/{profile_id}", summary="Get a request profile")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("text", pattern="^(text|pstats)$", description="`text` report or raw `pstats` file"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$"),
+    limit: int = Query(40, ge=1, le=500, description="Functions in the text report"),
+):
+    """Return one profile as a pstats text report or as the raw pstats file.
+
+    Raises:
+        HTTPException: 404 if the profile is not stored (anymore).
+    """
+    path = profile_store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "pstats":
+        return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+
+    def report() -> str:
+        out = io.StringIO()
+        pstats.Stats(str(path), stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    return PlainTextResponse(await asyncio.to_thread(report))
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional, Set
+from sqlalchemy.exc import OperationalError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .metrics import metrics
+
+PROGRESS_STEPS = 1000
+"""SQLite virtual machine instructions between two checks of the statement deadline."""
+
+
+class StatementGuard:
+    """Per-connection state read by SQLite's progress handler.
+
+    Installed with `set_progress_handler` on every pooled connection (see
+    `repository.database`). The handler runs on the driver thread every
+    `PROGRESS_STEPS` instructions and aborts the statement once its deadline
+    has passed; SQLite then raises "interrupted". `begin()` / `end()` are
+    called around every statement on the event loop.
+    """
+
+    def __init__(self, driver_connection) -> None:
+        self.driver_connection = driver_connection
+        self.deadline: Optional[float] = None
+        self.scope: Optional["QueryScope"] = None
+
+    def __call__(self) -> int:
+        deadline = self.deadline
+        if deadline is not None and time.monotonic() > deadline:
+            self.deadline = None
+            scope = self.scope
+            if scope is not None:
+                scope.interrupted = True
+            return 1
+        return 0
+
+    def begin(self) -> None:
+        """Arm the deadline of the current request for the next statement."""
+        self.end()
+        scope = current_scope.get()
+        self.scope = scope
+        if scope is not None:
+            scope.running.add(self)
+            if scope.timeout:
+                self.deadline = time.monotonic() + scope.timeout
+
+    def end(self) -> None:
+        """Disarm after the statement has finished."""
+        self.deadline = None
+        if self.scope is not None:
+            self.scope.running.discard(self)
+            self.scope = None
+
+    async def interrupt(self) -> None:
+        """Abort the statement running on this connection (safe from any thread)."""
+        try:
+            await self.driver_connection.interrupt()
+        except ValueError:  # connection already closed
+            pass
+
+
+class QueryScope:
+    """Statement timeout and running statements of one request.
+
+    `interrupted` is set once a statement of the request has been aborted
+    by its deadline or by the client disconnect.
+    """
+
+    def __init__(self) -> None:
+        self.timeout: Optional[float] = None
+        self.running: Set[StatementGuard] = set()
+        self.interrupted = False
+
+    async def interrupt(self) -> None:
+        """Abort every statement this request is running."""
+        self.interrupted = True
+        for guard in list(self.running):
+            if guard.scope is self:
+                await guard.interrupt()
+
+
+current_scope: ContextVar[Optional[QueryScope]] = ContextVar("query_scope", default=None)
+
+
+def statement_timeout(seconds: float) -> Callable:
+    """Route dependency limiting each SQL statement of the request to `seconds` (0: no limit)."""
+    async def apply() -> None:
+        scope = current_scope.get()
+        if scope is not None and seconds > 0:
+            scope.timeout = seconds
+    return apply
+
+
+def is_interrupted(error: BaseException) -> bool:
+    """True for a statement aborted by its deadline or by a client disconnect."""
+    return isinstance(error, OperationalError) and "interrupted" in str(error.orig).lower()
+
+
+class QueryScopeMiddleware:
+    """Gives every HTTP request a `QueryScope` and cancels it when the client leaves.
+
+    The request runs in its own task while this middleware keeps reading
+    `receive` (body chunks are passed on). When `http.disconnect` arrives
+    before the response has been sent completely, the task is cancelled and the SQL
+    statements it is running are interrupted, so the aiosqlite thread stops
+    working for nobody and the session from `get_db` is closed and returned
+    to the pool right away (`query.disconnects` in /metrics).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        query_scope = QueryScope()
+        messages: asyncio.Queue = asyncio.Queue()
+        response_sent = False
+
+        async def send_tracked(message: Message) -> None:
+            nonlocal response_sent
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_sent = True
+
+        async def listen() -> None:
+            while True:
+                message: Message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        token = current_scope.set(query_scope)
+        try:
+            handler = asyncio.create_task(self.app(scope, messages.get, send_tracked))
+        finally:
+            current_scope.reset(token)
+        listener = asyncio.create_task(listen())
+
+        disconnected = False
+        try:
+            await asyncio.wait((handler, listener), return_when=asyncio.FIRST_COMPLETED)
+            if not handler.done() and response_sent:
+                await asyncio.wait((handler,))
+            elif not handler.done():
+                disconnected = True
+                metrics.inc("query.disconnects")
+                handler.cancel()
+                await query_scope.interrupt()
+        finally:
+            listener.cancel()
+            handler.cancel()
+            outcome, _ = await asyncio.gather(handler, listener, return_exceptions=True)
+
+        if isinstance(outcome, BaseException) and not (disconnected and isinstance(outcome, asyncio.CancelledError)):
+            raise outcome
@@ -0,0 +1,122 @@
+import asyncio
+import functools
+import random
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Callable, TypeVar
+from fastapi import HTTPException
+from sqlalchemy.exc import OperationalError
+from . import config
+from .metrics import metrics
+from .utils import logger
+
+T = TypeVar("T")
+
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+TRANSIENT_MESSAGES = ("database is locked", "database table is locked", "database is busy")
+
+retries_allowed: ContextVar[bool] = ContextVar("retries_allowed", default=True)
+"""False while services run inside an enclosing transaction: a transient error then fails with 503 at once."""
+
+
+def is_transient(error: BaseException) -> bool:
+    """True for SQLite lock contention (SQLITE_BUSY / SQLITE_LOCKED) that is worth retrying."""
+    if not isinstance(error, OperationalError):
+        return False
+
+    code = getattr(error.orig, "sqlite_errorcode", None)
+    if code is not None and code & 0xFF in (SQLITE_BUSY, SQLITE_LOCKED):
+        return True
+
+    message = str(error.orig).lower()
+    return any(text in message for text in TRANSIENT_MESSAGES)
+
+
+class RetryPolicy:
+    """Retry of transient database errors with jittered exponential backoff.
+
+    Attempt `n` (from 0) that fails with a transient error is followed by a
+    sleep drawn uniformly from [0, min(max_delay, base_delay * 2**n)]
+    ("full jitter"), so writers that collided do not collide again in
+    lockstep. No new attempt starts after `attempts` tries or when the
+    sleep would end past `deadline` seconds from the first call; the
+    request then fails with 503 and `Retry-After` instead of 500.
+
+    Counters `retry.<name>.retries`, `retry.<name>.recovered` and
+    `retry.<name>.giveups` are published to `core.metrics`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        attempts: int = 5,
+        base_delay: float = 0.02,
+        max_delay: float = 1.0,
+        deadline: float = 10.0,
+    ) -> None:
+        self.name = name
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, attempt: int) -> float:
+        """Sleep before the retry that follows failed attempt `attempt`."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def run(self, fn: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """Call `fn(*args, **kwargs)`, retrying it on transient database errors.
+
+        `fn` must leave its session usable after a failure (roll back) and
+        be safe to repeat, which holds for work done in one transaction.
+
+        Raises:
+            HTTPException: 503 when the retries are exhausted.
+        """
+        started = time.monotonic()
+        attempt = 0
+
+        while True:
+            try:
+                result = await fn(*args, **kwargs)
+            except OperationalError as error:
+                if not is_transient(error):
+                    raise
+
+                delay = self.backoff(attempt)
+                attempt += 1
+                if (not retries_allowed.get() or attempt >= self.attempts
+                        or time.monotonic() - started + delay > self.deadline):
+                    metrics.inc(f"retry.{self.name}.giveups")
+                    logger.warning("Giving up %s after %s attempts: %s", fn.__name__, attempt, error.orig)
+                    raise HTTPException(status_code=503, detail="Database is busy, retry later",
+                                        headers={"Retry-After": "1"})
+
+                metrics.inc(f"retry.{self.name}.retries")
+                await asyncio.sleep(delay)
+                continue
+
+            if attempt:
+                metrics.inc(f"retry.{self.name}.recovered")
+            return result
+
+
+database_retry = RetryPolicy(
+    "database",
+    attempts=config.RETRY_ATTEMPTS,
+    base_delay=config.RETRY_BASE_DELAY,
+    max_delay=config.RETRY_MAX_DELAY,
+    deadline=config.RETRY_DEADLINE,
+)
+"""Policy of the service layer, configured by `BOOK_API_RETRY_*`."""
+
+
+def retry_transient(policy: RetryPolicy = database_retry):
+    """Decorator running an async service function under `policy`."""
+    def decorate(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            return await policy.run(fn, *args, **kwargs)
+        return wrapper
+    return decorate
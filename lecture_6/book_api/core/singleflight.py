@@ -0,0 +1,76 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+from .metrics import metrics
+from .query_guard import current_scope
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Collapses concurrent identical calls into one in-flight execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive with the same key while it is running wait for the leader's
+    result (or exception) instead of running it again. Nothing is cached:
+    once the call finishes the key is forgotten.
+
+    If the leader is cancelled (e.g. its client disconnected) or its call
+    fails because the leader's own request was interrupted (statement
+    deadline or disconnect, see `core.query_guard`), waiting callers are
+    not failed; the next one becomes the leader and retries under its own
+    limits.
+
+    Counters `singleflight.<name>.executed` and `singleflight.<name>.collapsed`
+    are published to `core.metrics`.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn` for `key`, or join the identical call that is already running.
+
+        Args:
+            key (Hashable): Identity of the call (operation and all its arguments).
+            fn: Coroutine function performing the call.
+
+        Returns:
+            T: Result of the (possibly shared) call.
+        """
+        counted = False
+
+        while key in self._calls:
+            future = self._calls[key]
+            if not counted:
+                metrics.inc(f"singleflight.{self.name}.collapsed")
+                counted = True
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        metrics.inc(f"singleflight.{self.name}.executed")
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            scope = current_scope.get()
+            if scope is not None and scope.interrupted:
+                future.cancel()
+            else:
+                future.set_exception(error)
+                future.exception()  # followers may be gone; mark it retrieved
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(key, None)
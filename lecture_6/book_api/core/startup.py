@@ -0,0 +1,42 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator
+from .utils import logger
+
+PROCESS_START = time.perf_counter()
+
+
+class StartupProfiler:
+    """Collects durations of named startup phases (logging, database, ...).
+
+    Phases are always timed (the overhead is two clock reads), but they are
+    only reported when startup profiling is enabled via
+    `BOOK_API_PROFILE_STARTUP=1`.
+
+    Attributes:
+        enabled (bool): Whether `report` writes the timings to the log.
+        phases (list[tuple[str, float]]): Phase names with durations in seconds.
+    """
+
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self.phases: list[tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as a startup phase called `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def report(self) -> None:
+        """Log every phase and the time since `book_api` was first imported."""
+        if not self.enabled:
+            return
+
+        for name, duration in self.phases:
+            logger.info("Startup phase %-16s %8.1f ms", name, duration * 1000)
+        logger.info("Startup ready after %.1f ms since import",
+                    (time.perf_counter() - PROCESS_START) * 1000)
@@ -29,30 +29,43 @@ class CustomTimedRotatingFileHandler(TimedRotatingFileHandler):
 
 
 LOG_DIR = Path(__file__).resolve().parent / "log"
-LOG_DIR.mkdir(parents=True, exist_ok=True)
-
 LOG_FILE = LOG_DIR / "app.log"
 
 logger = logging.getLogger("my_app")
 logger.setLevel(logging.INFO)
 
-formatter = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 
-file_handler = CustomTimedRotatingFileHandler(
-    LOG_FILE,
-    when="midnight",
-    interval=1,
-    backupCount=7,
-    encoding="utf-8"
-)
-file_handler.setFormatter(formatter)
+def configure_logging() -> None:
+    """Attach file and console handlers to the application logger.
+
+    Called from the application lifespan instead of at import time, so
+    importing `book_api` does not create directories or open files.
+    The file itself is opened on the first record (`delay=True`).
+    Repeated calls are no-ops.
+    """
+    if logger.handlers:
+        return
+
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+    formatter = logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    file_handler = CustomTimedRotatingFileHandler(
+        LOG_FILE,
+        when="midnight",
+        interval=1,
+        backupCount=7,
+        encoding="utf-8",
+        delay=True
+    )
+    file_handler.setFormatter(formatter)
 
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
 
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
 
-logger.info("Logger initialized successfully.")
+    logger.info("Logger initialized successfully.")
@@ -1,10 +1,24 @@
 import sys
 from pathlib import Path
+from .core import config
+from .core.admin import require_admin
+from .core.admission import AdmissionControlMiddleware
+from .core.compression import CompressionMiddleware
+from .core.metrics import metrics
+from .core import memory, profiling
+from .core.query_guard import QueryScopeMiddleware
+from .core.loop_monitor import loop_monitor, router as loop_router
+from .core.startup import StartupProfiler
+from .core.utils import configure_logging
 from .repository.init_db import init_database
-from fastapi import FastAPI
+from .repository.database import dispose_engine
+from .repository.sharding import get_shard_router, dispose_shard_router
+from fastapi import Depends, FastAPI
 from contextlib import asynccontextmanager
 from starlette.responses import HTMLResponse
-from .app.book.routes import router as book_router
+from .app.book.routes import router as book_router, batch_router
+from .app.book.changes import change_feed
+from .app.book.jobs import job_runner
 
 current_file = Path(__file__).resolve()
 book_api_root = current_file.parent
@@ -24,6 +38,14 @@ async def lifespan(_: FastAPI):
     Note: The database initialization step can be removed or commented out
     after the first successful launch to avoid redundant table creation.
 
+    With several workers every process runs this lifespan; initialization
+    is serialized by a file lock, and each worker creates its own engine
+    lazily and disposes of it on shutdown.
+
+    Logging is configured here rather than at import time to keep the import
+    of `book_api.main` cheap; with `BOOK_API_PROFILE_STARTUP=1` the duration
+    of every startup phase is written to the log.
+
     Args:
         _: An instance of the FastAPI application (automatically passed by FastAPI,
             but not directly used in this lifespan function).
@@ -31,14 +53,54 @@ async def lifespan(_: FastAPI):
     Yields:
         None: Transfers control to the application after initialization.
     """
-    await init_database()
+    profiler = StartupProfiler(config.PROFILE_STARTUP)
+
+    with profiler.phase("logging"):
+        configure_logging()
+    with profiler.phase("init_database"):
+        await init_database()
+        shards = get_shard_router()
+        if shards is not None:
+            await shards.init()
+
+    profiler.report()
+    loop_monitor.start()
+    if shards is None:
+        change_feed.start()
+        job_runner.start()
     yield
+    await job_runner.stop()
+    await change_feed.stop()
+    await loop_monitor.stop()
+    await dispose_shard_router()
+    await dispose_engine()
 
 
 app = FastAPI(title="Book API -- FastAPI CRUD - a book management application",
               version="1.0.0", lifespan=lifespan)
 
 app.include_router(book_router, prefix="/books", tags=["books"])
+app.include_router(batch_router, tags=["batch"])
+app.include_router(profiling.router, prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+app.include_router(memory.router, prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+app.include_router(loop_router, prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+app.add_middleware(QueryScopeMiddleware)
+app.add_middleware(profiling.ProfilingMiddleware, sample_rate=config.PROFILE_SAMPLE_RATE)
+app.add_middleware(
+    AdmissionControlMiddleware,
+    max_concurrency=config.ADMISSION_MAX_CONCURRENCY,
+    queue_size=config.ADMISSION_QUEUE_SIZE,
+    queue_timeout=config.ADMISSION_QUEUE_TIMEOUT,
+    max_streams=config.ADMISSION_MAX_STREAMS,
+    rate_limit=config.RATE_LIMIT_PER_SECOND,
+    rate_burst=config.RATE_LIMIT_BURST,
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=config.COMPRESSION_MIN_SIZE,
+    offload_size=config.COMPRESSION_OFFLOAD_SIZE,
+)
 
 
 @app.get("/")
@@ -64,3 +126,15 @@ async def healthcheck() -> dict:
     """
 
     return {"status": "ok"}
+
+
+@app.get("/metrics")
+async def get_metrics() -> dict:
+    """Monitoring counters of this worker process.
+
+    Returns:
+        dict: Flat mapping of counter names to values,
+           e.g. {"singleflight.books.collapsed": 12, ...}
+    """
+
+    return metrics.snapshot()
@@ -1,17 +1,195 @@
-from typing import Any, AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, AsyncIterator, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, create_async_engine, \
+    async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from pathlib import Path
+from ..core import config
+from ..core.metrics import metrics
+from ..core.query_guard import PROGRESS_STEPS, StatementGuard
+from ..core.retry import retries_allowed
 
 Base = declarative_base()
 
-DB_BOOK = "DB.db"   # in .env ->
+DB_BOOK = config.DB_BOOK
 
 BASE_DIR = Path(__file__).parent
-DATABASE_URL = f"sqlite+aiosqlite:///{BASE_DIR / DB_BOOK}"
+DATABASE_URL = config.DATABASE_URL
+
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+_engine_pid: Optional[int] = None
+_bound_connection: Optional[AsyncConnection] = None
+
+shared_session: ContextVar[Optional[AsyncSession]] = ContextVar("shared_session", default=None)
+"""Session handed out by `get_db` instead of a new one while set (batch writes)."""
+
+
+def _set_sqlite_pragmas(dbapi_connection, _) -> None:
+    """Enable WAL so several worker processes can read while one writes."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def _disable_driver_transactions(dbapi_connection, _) -> None:
+    """Stop the driver from opening transactions implicitly (see `explicit_transactions`)."""
+    dbapi_connection.isolation_level = None
+
+
+def _emit_begin(conn) -> None:
+    conn.exec_driver_sql("BEGIN")
+
+
+def explicit_transactions(engine: AsyncEngine) -> None:
+    """Make SQLAlchemy, not the driver, start the transactions on `engine`.
+
+    pysqlite/aiosqlite only send BEGIN in front of DML statements, so a
+    SAVEPOINT opened outside of one becomes the outermost transaction and
+    its RELEASE commits. With the driver's own handling disabled and BEGIN
+    sent on every `Connection.begin()` (SQLAlchemy's recipe for SQLite),
+    SAVEPOINTs nest inside the transaction and a rollback undoes all of it.
+    """
+    event.listen(engine.sync_engine, "connect", _disable_driver_transactions)
+    event.listen(engine.sync_engine, "begin", _emit_begin)
+
+
+def _install_statement_guard(dbapi_connection, connection_record) -> None:
+    """Attach a `StatementGuard` as SQLite progress handler of a new connection."""
+    guard = StatementGuard(dbapi_connection.driver_connection)
+    connection_record.info["statement_guard"] = guard
+    dbapi_connection.run_async(lambda driver: driver.set_progress_handler(guard, PROGRESS_STEPS))
+
+
+def _arm_statement_guard(conn, cursor, statement, parameters, context, executemany) -> None:
+    guard = conn.connection.info.get("statement_guard")
+    if guard is not None:
+        guard.begin()
+
+
+def _disarm_statement_guard(conn, cursor, statement, parameters, context, executemany) -> None:
+    guard = conn.connection.info.get("statement_guard")
+    if guard is not None:
+        guard.end()
+
+
+def watch_statements(engine: AsyncEngine) -> None:
+    """Enforce per-request statement timeouts and disconnect cancellation on `engine`."""
+    event.listen(engine.sync_engine, "connect", _install_statement_guard)
+    event.listen(engine.sync_engine, "before_cursor_execute", _arm_statement_guard)
+    event.listen(engine.sync_engine, "after_cursor_execute", _disarm_statement_guard)
+
+
+def _count_statement_cache(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Count compiled-statement cache hits and misses (`sql.cache.*` in /metrics)."""
+    if context is None:
+        return
+    if context.cache_hit is context.dialect.CACHE_HIT:
+        metrics.inc("sql.cache.hits")
+    elif context.cache_hit is context.dialect.CACHE_MISS:
+        metrics.inc("sql.cache.misses")
+
+
+def get_engine() -> AsyncEngine:
+    """Return the async engine of the current process, creating it on first use.
+
+    The engine is bound to the process id: a worker forked from a parent
+    that already had an engine gets a fresh one instead of sharing pooled
+    SQLite connections across processes.
+
+    Returns:
+        AsyncEngine: Engine for `DATABASE_URL`.
+    """
+    global _engine, _session_factory, _engine_pid
+
+    if _engine is None or _engine_pid != os.getpid():
+        _engine = create_async_engine(DATABASE_URL, echo=config.SQL_ECHO)
+        event.listen(_engine.sync_engine, "connect", _set_sqlite_pragmas)
+        event.listen(_engine.sync_engine, "after_cursor_execute", _count_statement_cache)
+        explicit_transactions(_engine)
+        watch_statements(_engine)
+        _session_factory = async_sessionmaker(_engine, expire_on_commit=False)
+        _engine_pid = os.getpid()
+
+    return _engine
+
+
+def async_session() -> AsyncSession:
+    """Create a new session bound to the engine of the current process.
+
+    While a connection is bound with `bind_sessions` (tests), the session
+    runs on that connection inside a SAVEPOINT instead.
+
+    Returns:
+        AsyncSession: New asynchronous SQLAlchemy session.
+    """
+    if _bound_connection is not None:
+        return AsyncSession(bind=_bound_connection, expire_on_commit=False,
+                            join_transaction_mode="create_savepoint")
+
+    get_engine()
+    return _session_factory()
+
+
+def bind_sessions(connection: Optional[AsyncConnection]) -> None:
+    """Route all new sessions to `connection`, or back to the engine with None.
+
+    Used by the test harness: the test holds an open transaction on
+    `connection`, every `commit()` of the application only releases a
+    SAVEPOINT, and rolling the transaction back discards the whole test.
+    """
+    global _bound_connection
+    _bound_connection = connection
+
+
+@asynccontextmanager
+async def transaction() -> AsyncIterator[AsyncSession]:
+    """Session whose commits all belong to one enclosing transaction.
+
+    Service functions commit as usual, but the session joins the
+    transaction with `join_transaction_mode="rollback_only"`: `commit()`
+    only flushes, while `rollback()` rolls back the whole transaction.
+    The transaction is committed when the block exits and rolled back if
+    it exits with an exception. Transient errors are not retried inside
+    it (see `core.retry.retries_allowed`), as the rollback before a retry
+    has already discarded the earlier writes.
+
+    Yields:
+        AsyncSession: Session for the whole transaction.
+    """
+    async with AsyncExitStack() as stack:
+        if _bound_connection is not None:
+            connection = _bound_connection
+            await stack.enter_async_context(connection.begin_nested())
+        else:
+            connection = await stack.enter_async_context(get_engine().connect())
+            await stack.enter_async_context(connection.begin())
+
+        session = await stack.enter_async_context(
+            AsyncSession(bind=connection, expire_on_commit=False, join_transaction_mode="rollback_only")
+        )
+        token = retries_allowed.set(False)
+        try:
+            yield session
+        finally:
+            retries_allowed.reset(token)
+
+
+async def dispose_engine() -> None:
+    """Close pooled connections of the current process engine (on shutdown)."""
+    global _engine, _session_factory, _engine_pid
+
+    if _engine is not None and _engine_pid == os.getpid():
+        await _engine.dispose()
+
+    _engine = None
+    _session_factory = None
+    _engine_pid = None
 
-engine = create_async_engine(DATABASE_URL, echo=True)
-async_session = async_sessionmaker(engine, expire_on_commit=False)
 
 async def get_db() -> AsyncGenerator[AsyncSession, Any]:
     """Asynchronous database session generator for use in FastAPI.
@@ -20,9 +198,16 @@ async def get_db() -> AsyncGenerator[AsyncSession, Any]:
     I got my own asynchronous SQLAlchemy session, which
     closes automatically after exiting the context.
 
+    While `shared_session` is set, that session is yielded and left open.
+
     Yields:
         AsyncSession: Asynchronous SQLAlchemy session for execution
         database queries.
         """
+    session = shared_session.get()
+    if session is not None:
+        yield session
+        return
+
     async with async_session() as session:
         yield session
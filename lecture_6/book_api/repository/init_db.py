@@ -1,21 +1,240 @@
 import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
-from ..core.utils import logger
-from ..repository.database import engine, async_session, DB_BOOK
-from ..app.book.models import Book as Book_create
+from typing import AsyncIterator, TextIO
+from sqlalchemy import Connection, inspect, make_url, text
+from ..core.utils import configure_logging, logger
+from ..repository.database import get_engine, async_session, DATABASE_URL
+from ..app.book.models import Book as Book_create, Job, NATURAL_KEY_INDEX, natural_key
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-worker mode only
+    fcntl = None
+
+DB_FILE = Path(make_url(DATABASE_URL).database or ":memory:")
+LOCK_FILE = DB_FILE.with_name(DB_FILE.name + ".init.lock")
+
+FACET_TRIGGERS = {
+    "book__book_facets_ai": """
+        CREATE TRIGGER book__book_facets_ai AFTER INSERT ON book__book
+        BEGIN
+            INSERT INTO book__facet_author (author, count) VALUES (NEW.author, 1)
+                ON CONFLICT(author) DO UPDATE SET count = count + 1;
+            INSERT INTO book__facet_year (year, count) SELECT NEW.year, 1 WHERE NEW.year IS NOT NULL
+                ON CONFLICT(year) DO UPDATE SET count = count + 1;
+        END
+    """,
+    "book__book_facets_ad": """
+        CREATE TRIGGER book__book_facets_ad AFTER DELETE ON book__book
+        BEGIN
+            UPDATE book__facet_author SET count = count - 1 WHERE author = OLD.author;
+            DELETE FROM book__facet_author WHERE author = OLD.author AND count <= 0;
+            UPDATE book__facet_year SET count = count - 1 WHERE year = OLD.year;
+            DELETE FROM book__facet_year WHERE year = OLD.year AND count <= 0;
+        END
+    """,
+    "book__book_facets_au": """
+        CREATE TRIGGER book__book_facets_au AFTER UPDATE OF author, year ON book__book
+        WHEN OLD.author IS NOT NEW.author OR OLD.year IS NOT NEW.year
+        BEGIN
+            UPDATE book__facet_author SET count = count - 1 WHERE author = OLD.author;
+            DELETE FROM book__facet_author WHERE author = OLD.author AND count <= 0;
+            UPDATE book__facet_year SET count = count - 1 WHERE year = OLD.year;
+            DELETE FROM book__facet_year WHERE year = OLD.year AND count <= 0;
+            INSERT INTO book__facet_author (author, count) VALUES (NEW.author, 1)
+                ON CONFLICT(author) DO UPDATE SET count = count + 1;
+            INSERT INTO book__facet_year (year, count) SELECT NEW.year, 1 WHERE NEW.year IS NOT NULL
+                ON CONFLICT(year) DO UPDATE SET count = count + 1;
+        END
+    """,
+}
+
+
+def ensure_schema(conn: Connection) -> None:
+    """Create missing tables, indexes and triggers on an existing connection.
+
+    Safe to run on every startup: tables are created with `checkfirst`
+    and each migration step below only acts when its object is missing.
+
+    Args:
+        conn (Connection): Synchronous SQLAlchemy connection inside a transaction.
+    """
+    Book_create.metadata.create_all(conn)
+
+    _ensure_columns(conn)
+    _ensure_facet_triggers(conn)
+    _ensure_change_log(conn)
+    _ensure_natural_key(conn)
+
+
+ADDED_COLUMNS = {
+    Book_create.__tablename__: {
+        "version": "INTEGER NOT NULL DEFAULT 1",
+        "natural_key": "VARCHAR NOT NULL DEFAULT ''",
+    },
+    Job.__tablename__: {
+        "heartbeat_at": "DATETIME",
+    },
+}
+"""Columns added after a table's first release, with their DDL, per table."""
+
+
+def _ensure_columns(conn: Connection) -> None:
+    """Add columns from `ADDED_COLUMNS` that an older table lacks."""
+    for table, columns in ADDED_COLUMNS.items():
+        present = {column["name"] for column in inspect(conn).get_columns(table)}
+
+        for name, ddl in columns.items():
+            if name not in present:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                logger.info("Column %s added to %s.", name, table)
+
+
+def _ensure_facet_triggers(conn: Connection) -> None:
+    """Install the facet triggers, rebuilding the aggregates if any is missing.
+
+    Triggers are missing on the first run against a database created before
+    facets existed; rebuilding then guarantees the counters match 'book__book'.
+    """
+    existing = set(conn.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+    ).scalars())
+    missing = [name for name in FACET_TRIGGERS if name not in existing]
+
+    if not missing:
+        return
+
+    for name in FACET_TRIGGERS:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+
+    rebuild_facets(conn)
+
+    for ddl in FACET_TRIGGERS.values():
+        conn.execute(text(ddl))
+
+    logger.info("Facet aggregates rebuilt and triggers installed.")
+
+
+def rebuild_facets(conn: Connection) -> None:
+    """Recompute the facet aggregate tables from 'book__book'."""
+    conn.execute(text("DELETE FROM book__facet_author"))
+    conn.execute(text("DELETE FROM book__facet_year"))
+    conn.execute(text(
+        "INSERT INTO book__facet_author (author, count) "
+        "SELECT author, COUNT(*) FROM book__book GROUP BY author"
+    ))
+    conn.execute(text(
+        "INSERT INTO book__facet_year (year, count) "
+        "SELECT year, COUNT(*) FROM book__book WHERE year IS NOT NULL GROUP BY year"
+    ))
+
+
+def _ensure_natural_key(conn: Connection) -> None:
+    """Fill the `natural_key` column and put the unique index on it.
+
+    Runs on databases that predate the column or still index SQLite's
+    lower(trim(title)), lower(trim(author)) expressions. The key of every
+    row is computed in Python (see `models.natural_key`); duplicates are
+    removed first, keeping the oldest row (lowest id) of every natural key.
+    Every removed book is logged with the id it duplicates and gets a
+    'delete' entry in the change log, so sync clients drop it as well.
+    """
+    index = NATURAL_KEY_INDEX
+    indexed = [row[2] for row in conn.execute(text(f"PRAGMA index_info({index.name})"))]
+
+    if indexed == ["natural_key"]:
+        return
+
+    kept, duplicates, keys = {}, [], []
+    for book_id, title, author in conn.execute(text("SELECT id, title, author FROM book__book ORDER BY id")):
+        key = natural_key(title, author)
+        if key in kept:
+            duplicates.append({"id": book_id, "kept": kept[key]})
+        else:
+            kept[key] = book_id
+            keys.append({"id": book_id, "key": key})
+
+    conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    if duplicates:
+        logger.warning("Removing duplicate books: %s.",
+                       ", ".join(f"{row['id']} (duplicate of {row['kept']})" for row in duplicates))
+        conn.execute(text("DELETE FROM book__book WHERE id = :id"), duplicates)
+        conn.execute(text("INSERT INTO book__change (book_id, op) VALUES (:id, 'delete')"), duplicates)
+    if keys:
+        conn.execute(text("UPDATE book__book SET natural_key = :key WHERE id = :id"), keys)
+    index.create(conn)
+
+    logger.info("Natural key index created, %s duplicate books removed.", len(duplicates))
+
+
+def _ensure_change_log(conn: Connection) -> None:
+    """Start an empty change log with a 'create' entry for every stored book.
+
+    Books written before the change log existed (or seeded directly) would
+    otherwise never reach delta sync clients that start from watermark 0.
+    Runs before `_ensure_natural_key`, whose tombstones would otherwise
+    make the log look started.
+    """
+    if conn.execute(text("SELECT 1 FROM book__change LIMIT 1")).first() is not None:
+        return
+
+    added = conn.execute(text(
+        "INSERT INTO book__change (book_id, op, payload) "
+        "SELECT id, 'create', json_object('id', id, 'title', title, 'author', author, "
+        "'year', year, 'version', version) FROM book__book ORDER BY id"
+    )).rowcount
+
+    if added:
+        logger.info("Change log started with %s existing books.", added)
+
+
+@asynccontextmanager
+async def init_lock() -> AsyncIterator[None]:
+    """Hold an exclusive inter-process file lock for database initialization.
+
+    Every uvicorn worker runs the application lifespan, so without the lock
+    several processes could see an empty database at the same time and all
+    of them would create tables and seed test data. The lock file is opened
+    and the blocking `flock` waits in a worker thread, so the event loop
+    keeps running meanwhile.
+    """
+    if fcntl is None or DB_FILE.name == ":memory:":
+        yield
+        return
+
+    lock = await asyncio.to_thread(_acquire_lock, LOCK_FILE)
+    try:
+        yield
+    finally:
+        fcntl.flock(lock, fcntl.LOCK_UN)
+        lock.close()
+
+
+def _acquire_lock(path: Path) -> TextIO:
+    """Open `path` and wait for an exclusive `flock` on it (blocking)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock = open(path, "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+    except BaseException:
+        lock.close()
+        raise
+    return lock
 
-DB_FILE = Path(__file__).parent / DB_BOOK
 
 async def init_database():
     """Asynchronous database initialization.
 
-    Checks if the SQLite database file exists. If there is no file:
+    Runs under an inter-process file lock (see `init_lock`), so with several
+    workers it is executed exactly once. Checks if the books table exists.
+    If there is no table:
         - creates a database file,
         - creates all tables defined in Base.metadata,
         - displays a message about the creation and initialization of the database.
 
-    If the database already exists, the function does not change anything and outputs
-    a message about skipping creation.
+    If the database already exists, only missing tables and triggers are added
+    (see `ensure_schema`) and a message about skipping creation is output.
 
     It is used for the safe start of FastAPI applications or others.
     asynchronous tasks with the database.
@@ -33,20 +252,27 @@ async def init_database():
         {"title": "Working Effectively with Legacy Code", "author": "Michael Feathers", "year": 2004},
     ]
 
-    if not DB_FILE.exists():
-        async with engine.begin() as conn:
-            await conn.run_sync(Book_create.metadata.create_all)
+    async with init_lock():
+        async with get_engine().begin() as conn:
+            is_new = not await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).has_table(Book_create.__tablename__)
+            )
+            await conn.run_sync(ensure_schema)
+
+        if is_new:
             async with async_session() as session:
                 async with session.begin():
                     for b in test_books:
                         book = Book_create(title=b["title"], author=b["author"], year=b["year"])
                         session.add(book)
-                await session.commit()
                 logger.info("10 test books added to database!")
-        logger.info("Database created and initialized with tables and 10 test books added to database!")
-    else:
-        logger.warning("Database already exists, skipping creation.")
+            async with get_engine().begin() as conn:
+                await conn.run_sync(_ensure_change_log)
+            logger.info("Database created and initialized with tables and 10 test books added to database!")
+        else:
+            logger.warning("Database already exists, skipping creation.")
 
 
 if __name__ == "__main__":
+    configure_logging()
     asyncio.run(init_database())
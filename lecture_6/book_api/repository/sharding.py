@@ -0,0 +1,130 @@
+import asyncio
+import os
+import zlib
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, TypeVar
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from ..core import config
+from ..core.utils import logger
+from .database import _set_sqlite_pragmas, explicit_transactions, watch_statements
+from .init_db import ensure_schema
+
+T = TypeVar("T")
+
+
+class ShardRouter:
+    """Routes book operations across N SQLite files ('DB.shard<i>.db').
+
+    Books are partitioned by id: shard `i` owns the ids with
+    `(id - 1) % N == i` and allocates new ids in that residue class
+    (i + 1, i + 1 + N, ...), so ids stay globally unique without a
+    central sequence and a point operation touches exactly one file.
+    New books go to the shard picked by a hash of their natural key:
+    inserts of the same book meet on one unique index, and different books
+    still spread over shards, so concurrent writes take different SQLite
+    write locks.
+
+    Attributes:
+        count (int): Number of shards.
+        directory (Path): Directory holding the shard files.
+    """
+
+    def __init__(self, count: int, directory: Path, echo: bool = False) -> None:
+        if count < 2:
+            raise ValueError("Sharding needs at least two shards")
+
+        self.count = count
+        self.directory = Path(directory)
+        self._engines: list[AsyncEngine] = []
+        self._sessions: list[async_sessionmaker] = []
+
+        for index in range(count):
+            url = f"sqlite+aiosqlite:///{self.directory / f'DB.shard{index}.db'}"
+            engine = create_async_engine(url, echo=echo)
+            event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+            explicit_transactions(engine)
+            watch_statements(engine)
+            self._engines.append(engine)
+            self._sessions.append(async_sessionmaker(engine, expire_on_commit=False))
+
+    def shard_for(self, book_id: int) -> int:
+        """Return the index of the shard that owns `book_id`."""
+        return (book_id - 1) % self.count
+
+    def shard_for_key(self, key: str) -> int:
+        """Return the shard for a new book with natural key `key`.
+
+        CRC-32 instead of `hash()`, whose string hashing is salted per
+        process: every worker has to pick the same shard for a key.
+        """
+        return zlib.crc32(key.encode("utf-8")) % self.count
+
+    def engine(self, shard: int) -> AsyncEngine:
+        """Return the engine of shard `shard`."""
+        return self._engines[shard]
+
+    def session(self, shard: int) -> AsyncSession:
+        """Open a new session on shard `shard`."""
+        return self._sessions[shard]()
+
+    async def fan_out(self, query: Callable[[AsyncSession], Awaitable[T]]) -> list[T]:
+        """Run `query` on every shard concurrently, each with its own session.
+
+        Args:
+            query: Coroutine function receiving a shard session.
+
+        Returns:
+            list[T]: Results in shard order.
+        """
+        async def run(shard: int) -> T:
+            async with self.session(shard) as session:
+                return await query(session)
+
+        return list(await asyncio.gather(*(run(shard) for shard in range(self.count))))
+
+    async def init(self) -> None:
+        """Create missing tables and triggers in every shard file."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for engine in self._engines:
+            async with engine.begin() as conn:
+                await conn.run_sync(ensure_schema)
+        logger.info("Initialized %s SQLite shards in %s", self.count, self.directory)
+
+    async def dispose(self) -> None:
+        """Close pooled connections of all shards."""
+        for engine in self._engines:
+            await engine.dispose()
+
+
+_router: Optional[ShardRouter] = None
+_router_pid: Optional[int] = None
+
+
+def get_shard_router() -> Optional[ShardRouter]:
+    """Return the process-wide shard router, or None in single-file mode.
+
+    Sharding is enabled with `BOOK_API_SHARDS=N` (N >= 2); like the default
+    engine, the router is created lazily per process.
+    """
+    global _router, _router_pid
+
+    if config.SHARDS < 2:
+        return None
+
+    if _router is None or _router_pid != os.getpid():
+        _router = ShardRouter(config.SHARDS, config.SHARD_DIR, echo=config.SQL_ECHO)
+        _router_pid = os.getpid()
+
+    return _router
+
+
+async def dispose_shard_router() -> None:
+    """Dispose of the shard router of the current process, if any."""
+    global _router, _router_pid
+
+    if _router is not None and _router_pid == os.getpid():
+        await _router.dispose()
+
+    _router = None
+    _router_pid = None
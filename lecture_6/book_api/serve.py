@@ -0,0 +1,40 @@
+import asyncio
+import uvicorn
+from .core import config
+from .core.utils import configure_logging, logger
+from .repository.database import dispose_engine
+from .repository.init_db import init_database
+
+
+async def _prepare_database() -> None:
+    """Initialize the database once in the parent and release its connections."""
+    await init_database()
+    await dispose_engine()
+
+
+def main() -> None:
+    """Run the Book API with the number of worker processes from config.
+
+    The database is initialized in the parent process before uvicorn starts
+    the workers, so every worker finds a ready schema; the lifespan of each
+    worker repeats the (locked, idempotent) check and creates its own engine.
+
+    Usage:
+        BOOK_API_WORKERS=4 python -m book_api.serve
+    """
+    configure_logging()
+    asyncio.run(_prepare_database())
+
+    logger.info("Starting Book API on %s:%s with %s worker(s)",
+                config.HOST, config.PORT, config.WORKERS)
+
+    uvicorn.run(
+        f"{__package__}.main:app",
+        host=config.HOST,
+        port=config.PORT,
+        workers=config.WORKERS,
+    )
+
+
+if __name__ == "__main__":
+    main()